@@ -1,7 +1,7 @@
 // Simple Patch Finder
 //
 // High-level flow:
-// - Load `./patches.json` (same-origin)
+// - Load `./patches.json` and `./taxonomy.json` (same-origin)
 // - Normalize upstream schema into a flat array of patch rows
 // - Derive filter option lists (value + count)
 // - Hydrate filters from URL query params (shareable links)
@@ -23,6 +23,7 @@
  * @property {string} name
  * @property {string} qfeId
  * @property {string} version
+ * @property {number} familyMask
  * @property {boolean} isEnterpriseFamily
  * @property {string[]} productsTokens
  * @property {string} productsDisplay
@@ -68,32 +69,14 @@ const els = {
 const PAGE_SIZE = 25;
 const ENTERPRISE_PRODUCT_VALUE = "ArcGIS Enterprise";
 
-// Keep this set in sync with scripts/generate_rss.py.
-const ENTERPRISE_FAMILY_TOKENS = new Set([
-  "ArcGIS Enterprise",
-  "ArcGIS Server",
-  "Portal for ArcGIS",
-  "ArcGIS Data Store",
-  "ArcGIS GeoEvent Server",
-  "GeoEvent",
-  "ArcGIS Notebook Server",
-  "ArcGIS Mission Server",
-  "ArcGIS Video Server",
-  "ArcGIS Knowledge Server",
-  "ArcGIS Workflow Manager Server",
-  "ArcGIS Image Server",
-  "ArcGIS Web Adaptor (IIS)",
-  "ArcGIS Web Adaptor (Java Platform)",
-  "ArcGIS GeoAnalytics Server",
-  "ArcGIS Data Interoperability for Server",
-  "ArcGIS Maritime for Server",
-  "Maritime Server",
-  "ArcGIS Roads and Highways for Server",
-  "ArcGIS Production Mapping for Server",
-  "ArcGIS Defense Mapping for Server",
-  "Esri Production Mapping for Server",
-  "Esri Defense Mapping for Server",
-]);
+const ENTERPRISE_FAMILY = "enterprise";
+
+// Product-family bitmasks published by scripts/taxonomy.py (./taxonomy.json).
+// productMasks maps a product token to the OR of its family bits.
+const taxonomy = {
+  familyBits: new Map(),
+  productMasks: new Map(),
+};
 
 let grid = null;
 let gridInitTries = 0;
@@ -1082,8 +1065,39 @@ function tokenizeCsv(s) {
     .filter(Boolean);
 }
 
-function isEnterpriseProductTokens(tokens) {
-  return (tokens || []).some((token) => ENTERPRISE_FAMILY_TOKENS.has(String(token || "").trim()));
+async function loadTaxonomy() {
+  try {
+    const res = await fetch("./taxonomy.json", { cache: "no-store" });
+    if (!res.ok) throw new Error(`HTTP ${res.status} loading ./taxonomy.json`);
+    const data = await res.json();
+    const products = Array.isArray(data?.products) ? data.products : [];
+    const masks = Array.isArray(data?.masks) ? data.masks : [];
+    for (const family of Array.isArray(data?.families) ? data.families : []) {
+      if (family && typeof family.bit === "number") taxonomy.familyBits.set(String(family.name), family.bit);
+    }
+    products.forEach((token, id) => {
+      const mask = Number(masks[id]) | 0;
+      if (mask) taxonomy.productMasks.set(String(token), mask);
+    });
+    if (!taxonomy.familyBits.size) throw new Error("./taxonomy.json lists no product families");
+  } catch (err) {
+    // Without the taxonomy no family aggregates are offered: "ArcGIS Enterprise"
+    // then filters on the literal product token like any other product.
+    console.warn("Product family filters are off:", err);
+    taxonomy.familyBits.clear();
+    taxonomy.productMasks.clear();
+  }
+}
+
+function familyMaskForTokens(tokens) {
+  let mask = 0;
+  for (const token of tokens || []) mask |= taxonomy.productMasks.get(token) || 0;
+  return mask;
+}
+
+function hasFamily(familyMask, family) {
+  const bit = taxonomy.familyBits.get(family) || 0;
+  return (familyMask & bit) !== 0;
 }
 
 function classifyCritical(raw) {
@@ -1196,7 +1210,8 @@ function normalizeDataset(data) {
       const typeSet = new Set(files.map((f) => f.ext).filter(Boolean));
       const productsTokens = tokenizeCsv(productsRaw);
       const platformTokens = tokenizeCsv(platformRaw);
-      const isEnterpriseFamily = isEnterpriseProductTokens(productsTokens);
+      const familyMask = familyMaskForTokens(productsTokens);
+      const isEnterpriseFamily = hasFamily(familyMask, ENTERPRISE_FAMILY);
 
       const md5 = Array.isArray(p?.MD5sums) ? p.MD5sums : [];
       const sha256 = Array.isArray(p?.SHA256sums) ? p.SHA256sums : [];
@@ -1220,6 +1235,7 @@ function normalizeDataset(data) {
         name,
         qfeId,
         version,
+        familyMask,
         isEnterpriseFamily,
         productsRaw,
         productsTokens,
@@ -1646,7 +1662,9 @@ function anyTokenSelected(tokens, selectedSet) {
 function productMatchesSelection(patch, selectedValue) {
   const selected = String(selectedValue || "").trim();
   if (!selected) return false;
-  if (selected === ENTERPRISE_PRODUCT_VALUE) return !!patch?.isEnterpriseFamily;
+  if (selected === ENTERPRISE_PRODUCT_VALUE && taxonomy.familyBits.has(ENTERPRISE_FAMILY)) {
+    return !!patch?.isEnterpriseFamily;
+  }
   return (patch?.productsTokens || []).includes(selected);
 }
 
@@ -2553,10 +2571,12 @@ function wireEvents() {
 async function loadDataset() {
   // Load raw dataset and normalize into PatchRow[].
   setStatusText("Loading...");
+  const taxonomyReady = loadTaxonomy();
   try {
     const res = await fetch("./patches.json", { cache: "no-store" });
     if (!res.ok) throw new Error(`HTTP ${res.status} loading ./patches.json`);
     const data = await res.json();
+    await taxonomyReady;
     state.all = normalizeDataset(data);
     state.options = buildOptions(state.all);
     datasetEpoch += 1;
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""Atomic, content-aware writes for every generated artifact.
+
+Output is rendered into a temporary file next to the target while its
+SHA-256 is computed. When the digest matches the existing file, the temporary
+file is dropped and the target is left untouched (same bytes, same mtime, no
+git churn). Otherwise the temporary file is fsynced and renamed over the
+target, so a crash never leaves a half-written feed behind.
+
+Every write is recorded; ``save_changed_artifacts`` ends a run by writing the
+repo-relative paths of the artifacts that actually changed to
+.build/changed-artifacts.json.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import os
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+CHANGED_ARTIFACTS_JSON = ROOT / ".build" / "changed-artifacts.json"
+CHUNK_SIZE = 1 << 20
+
+# Artifacts written in this process: path -> True when its bytes changed.
+WRITES: dict[Path, bool] = {}
+
+
+def file_sha256(path: Path) -> str | None:
+    digest = hashlib.sha256()
+    try:
+        with path.open("rb") as f:
+            while chunk := f.read(CHUNK_SIZE):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def _umask() -> int:
+    """The process umask, read on first use (os.umask can only swap it)."""
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+def _fsync_directory(path: Path) -> None:
+    if os.name == "nt":
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class AtomicFile(io.FileIO):
+    """Binary temp file that replaces path on commit() only if its bytes differ."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        fd, temp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        super().__init__(fd, "wb")
+        self.temp_path = Path(temp)
+        self.size = 0
+        self._sha256 = hashlib.sha256()
+
+    def write(self, data) -> int:
+        written = super().write(data)
+        self._sha256.update(memoryview(data)[:written])
+        self.size += written
+        return written
+
+    def write_all(self, data) -> None:
+        """Write every byte of data; a raw write() may write only part of it."""
+        view = memoryview(data).cast("B")
+        while view:
+            view = view[self.write(view) :]
+
+    @property
+    def sha256(self) -> str:
+        """Hex SHA-256 of the bytes written so far."""
+        return self._sha256.hexdigest()
+
+    def commit(self, record: bool = True, current_sha256: str | None = None) -> bool:
+        """Finish the write; return True when the target changed.
+
+        current_sha256, when known (e.g. from patches.meta.json), is trusted as
+        the digest of the existing target instead of reading it back.
+        """
+        try:
+            changed = not (
+                self.path.is_file()
+                and self.path.stat().st_size == self.size
+                and (current_sha256 or file_sha256(self.path)) == self.sha256
+            )
+            if changed:
+                os.fsync(self.fileno())
+                # New files get the usual permissions instead of mkstemp's 0600.
+                mode = (
+                    self.path.stat().st_mode & 0o7777
+                    if self.path.exists()
+                    else 0o666 & ~_umask()
+                )
+                os.chmod(self.temp_path, mode)
+            self.close()
+            if changed:
+                os.replace(self.temp_path, self.path)
+                _fsync_directory(self.path.parent)
+            else:
+                self.temp_path.unlink()
+        except BaseException:
+            self.abort()
+            raise
+        if record:
+            WRITES[self.path] = changed
+        return changed
+
+    def abort(self) -> None:
+        self.close()
+        self.temp_path.unlink(missing_ok=True)
+
+
+def write_bytes_atomic(path: Path, data: bytes, record: bool = True) -> bool:
+    target = AtomicFile(path)
+    try:
+        target.write_all(data)
+    except BaseException:
+        target.abort()
+        raise
+    return target.commit(record)
+
+
+def write_text_atomic(path: Path, content: str, record: bool = True) -> bool:
+    # Encoded as is: newlines stay "\n" even when generated on Windows.
+    return write_bytes_atomic(path, content.encode("utf-8"), record)
+
+
+def changed_artifacts() -> list[str]:
+    out = []
+    for path, changed in WRITES.items():
+        if changed:
+            try:
+                out.append(path.resolve().relative_to(ROOT).as_posix())
+            except ValueError:
+                out.append(str(path))
+    return sorted(out)
+
+
+def save_changed_artifacts(path: Path = CHANGED_ARTIFACTS_JSON) -> str:
+    """Write this run's changed artifacts as JSON and return a summary line."""
+    changed = changed_artifacts()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {"changed": changed, "unchanged": len(WRITES) - len(changed)}
+    write_text_atomic(path, json.dumps(payload, indent=2) + "\n", record=False)
+    return f"Artifacts: {len(changed)} changed, {payload['unchanged']} unchanged (see {path.name})"
@@ -0,0 +1,668 @@
+#!/usr/bin/env python3
+"""Benchmarks for the sitemap and RSS generators.
+
+Synthetic datasets are built by replicating the real patches.json N times
+(QFE_IDs are suffixed so every copy survives de-duplication). Subcommands:
+
+- loader: json.loads vs streaming dataset loaders, with peak allocation
+- memory: retained memory per patch record for each record layout
+- feed: top-K feed selection and single-pass routing vs a full sort
+- incremental: merging one new patch into a large feed vs a full rebuild
+- stream: full-archive feed joined in memory vs streamed (plain and gzip)
+- suite: every generator stage, saved as JSON and checked against a baseline
+
+Examples:
+    python3 scripts/bench.py loader --scale 10 --scale 100
+    python3 scripts/bench.py memory --scale 1 --scale 10
+    python3 scripts/bench.py feed --scale 100
+    python3 scripts/bench.py incremental --scale 100 --limit 20000
+    python3 scripts/bench.py stream --scale 100
+    python3 scripts/bench.py suite --size 10k --size 100k --baseline base.json
+
+The suite subcommand times each generator stage on the real patches.json and
+on synthetic datasets (see synth_patches.py), records peak memory with
+tracemalloc and saves the results as JSON. Given a baseline, it fails when a
+stage got slower or grew its peak memory beyond the thresholds.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from datetime import datetime, timezone
+from typing import Callable
+
+import generate_rss
+import generate_sitemap
+import synth_patches
+from check_feeds import legacy_feed_entries
+from feed_ledger import FeedLedger
+from patch_dataset import (
+    BASE_URL,
+    canonical_patch_url,
+    classify_critical,
+    dedupe_entries,
+    guid_digest,
+    identity_key,
+    load_dataset,
+    load_patch_entries,
+    normalize_record,
+    parse_release_date,
+    tokenize_csv,
+)
+from patch_stream import iter_patch_records
+from synth_patches import parse_count
+from xml_stream import read_output, write_lines
+
+ROOT = Path(__file__).resolve().parents[1]
+PATCHES_JSON = ROOT / "patches.json"
+SUITE_JSON = ROOT / ".tmp" / "benchmark.json"
+SUITE_VERSION = 1
+
+
+def write_scaled_dataset(
+    source: Path, scale: int, out_path: Path, blank_dates_every: int = 0
+) -> None:
+    raw = json.loads(source.read_text(encoding="utf-8"))
+    groups = raw.get("Product") if isinstance(raw, dict) else []
+    groups = groups if isinstance(groups, list) else []
+
+    with out_path.open("w", encoding="utf-8", newline="\n") as f:
+        f.write('{"Product":[')
+        first = True
+        for copy in range(scale):
+            for group in groups:
+                if not isinstance(group, dict):
+                    continue
+                patches = []
+                for patch in group.get("patches") or []:
+                    if not isinstance(patch, dict):
+                        continue
+                    if copy:
+                        patch = dict(patch)
+                        patch["QFE_ID"] = f"{patch.get('QFE_ID', '')}-S{copy}"
+                    if blank_dates_every and len(patches) % blank_dates_every == 0:
+                        # Undated patches exercise the pubDate fallback path.
+                        patch = dict(patch, ReleaseDate="")
+                    patches.append(patch)
+                if not first:
+                    f.write(",")
+                first = False
+                f.write(json.dumps({"version": group.get("version", ""), "patches": patches}))
+        f.write("]}")
+
+
+def legacy_records(path: Path):
+    raw = json.loads(path.read_text(encoding="utf-8"))
+    groups = raw.get("Product") if isinstance(raw, dict) else []
+    groups = groups if isinstance(groups, list) else []
+    for group in groups:
+        version = (
+            str(group.get("version", "")).strip() if isinstance(group, dict) else ""
+        )
+        patches = group.get("patches") if isinstance(group, dict) else []
+        patches = patches if isinstance(patches, list) else []
+        for patch in patches:
+            if isinstance(patch, dict):
+                yield version, patch
+
+
+def legacy_entries(path: Path):
+    return dedupe_entries(normalize_record(v, p) for v, p in legacy_records(path))
+
+
+@dataclass(frozen=True)
+class LegacyPatchEntry:
+    """The pre-compaction record layout, kept for memory comparisons."""
+
+    key: str
+    name: str
+    qfe_id: str
+    version: str
+    critical_kind: str
+    release_date_text: str
+    release_date_iso: str
+    release_ordinal: int
+    products_tokens: tuple[str, ...]
+    platform_tokens: tuple[str, ...]
+    patch_page_url: str
+    permalink: str
+
+
+def legacy_dataset_records(path: Path) -> list[LegacyPatchEntry]:
+    out = []
+    for version, patch in iter_patch_records(path):
+        qfe_id = str(patch.get("QFE_ID", "")).strip()
+        name = str(patch.get("Name", "")).strip()
+        release_date_text = str(patch.get("ReleaseDate", "")).strip()
+        patch_page_url = str(patch.get("url", "")).strip()
+        release_date = parse_release_date(release_date_text)
+        out.append(
+            LegacyPatchEntry(
+                key=identity_key(qfe_id, version, name, release_date_text, patch_page_url),
+                name=name,
+                qfe_id=qfe_id,
+                version=version,
+                critical_kind=classify_critical(patch.get("Critical")),
+                release_date_text=release_date_text,
+                release_date_iso=release_date.isoformat() if release_date else "",
+                release_ordinal=release_date.toordinal() if release_date else -1,
+                products_tokens=tuple(tokenize_csv(str(patch.get("Products", "")))),
+                platform_tokens=tuple(tokenize_csv(str(patch.get("Platform", "")))),
+                patch_page_url=patch_page_url,
+                permalink=canonical_patch_url(qfe_id, name) if qfe_id else BASE_URL,
+            )
+        )
+    return out
+
+
+def retained(fn: Callable[[], object]) -> tuple[int, object]:
+    """Return the bytes still allocated by fn's result once fn has returned."""
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    result = fn()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return after - before, result
+
+
+def measure(fn: Callable[[], object]) -> tuple[float, int, object]:
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def count(records) -> int:
+    return sum(1 for _ in records)
+
+
+def bench_loader(source: Path, scales: list[int]) -> None:
+    cases: list[tuple[str, Callable[[Path], object]]] = [
+        ("records json.loads", lambda p: count(legacy_records(p))),
+        ("records streaming", lambda p: count(iter_patch_records(p))),
+        ("entries json.loads", lambda p: len(legacy_entries(p))),
+        ("entries streaming", lambda p: len(load_patch_entries(p))),
+        ("sitemap build_entries", lambda p: len(generate_sitemap.build_entries(p))),
+    ]
+
+    print(f"{'scale':>6} {'MB':>8}  {'case':<24} {'seconds':>9} {'peak MB':>9} {'result':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in scales:
+            path = Path(tmp) / f"patches-x{scale}.json"
+            if scale == 1:
+                path = source
+            else:
+                write_scaled_dataset(source, scale, path)
+            size_mb = path.stat().st_size / 1e6
+            for label, fn in cases:
+                elapsed, peak, result = measure(lambda: fn(path))
+                print(
+                    f"{scale:>6} {size_mb:>8.1f}  {label:<24} {elapsed:>9.3f} {peak / 1e6:>9.1f} {result:>8}"
+                )
+
+
+def bench_memory(source: Path, scales: list[int]) -> None:
+    print(f"{'scale':>6} {'patches':>8}  {'layout':<10} {'retained MB':>12} {'bytes/patch':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in scales:
+            path = Path(tmp) / f"patches-x{scale}.json"
+            if scale == 1:
+                path = source
+            else:
+                write_scaled_dataset(source, scale, path)
+            for label, fn in (
+                ("legacy", lambda: legacy_dataset_records(path)),
+                ("compact", lambda: load_dataset(path).records),
+            ):
+                size, records = retained(fn)
+                n = len(records) or 1
+                print(
+                    f"{scale:>6} {len(records):>8}  {label:<10} {size / 1e6:>12.2f} {size / n:>12.0f}"
+                )
+                del records
+
+
+def bench_feed(source: Path, scales: list[int], limits: list[int]) -> None:
+    """Time top-K selection against the full sort (check_feeds.py checks the order)."""
+    print(f"{'scale':>6} {'entries':>8}  {'mode':<18} {'limit':>6} {'sort s':>8} {'top-k s':>8}  same")
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in scales:
+            path = Path(tmp) / f"patches-x{scale}.json"
+            if scale == 1:
+                path = source
+            else:
+                write_scaled_dataset(source, scale, path, blank_dates_every=7)
+            dataset = load_dataset(path)
+            lastmod = dataset.lastmod or generate_rss.EPOCH
+            # Give a slice of undated entries a remembered pubDate.
+            existing = {
+                generate_rss.entry_guid(entry): lastmod.replace(year=lastmod.year - 1)
+                for entry in dataset.entries[::11]
+                if not entry.release_date_iso
+            }
+            for mode, _ in generate_rss.FEED_OUTPUTS:
+                for limit in limits:
+                    started = time.perf_counter()
+                    expected = legacy_feed_entries(dataset.entries, mode, limit, existing, lastmod)
+                    sort_s = time.perf_counter() - started
+                    started = time.perf_counter()
+                    got = generate_rss.feed_entries(dataset.entries, mode, limit, existing, lastmod)
+                    topk_s = time.perf_counter() - started
+                    same = [e.key for e in got] == [e.key for e in expected]
+                    failures += not same
+                    print(
+                        f"{scale:>6} {len(dataset.entries):>8}  {mode:<18} {limit:>6} {sort_s:>8.3f} {topk_s:>8.3f}  {'yes' if same else 'NO'}"
+                    )
+            # Single-pass router over every configured feed vs one call per feed.
+            feeds = list(generate_rss.FEED_CONFIG.feeds)
+            for limit in limits:
+                started = time.perf_counter()
+                expected_all = {
+                    feed.id: generate_rss.feed_entries(dataset.entries, feed.id, limit, existing, lastmod)
+                    for feed in feeds
+                }
+                per_feed_s = time.perf_counter() - started
+                started = time.perf_counter()
+                routed = generate_rss.route_feeds(
+                    dataset.entries, feeds, {feed.id: limit for feed in feeds}, existing, lastmod
+                )
+                router_s = time.perf_counter() - started
+                same = all(
+                    [e.key for e in routed[feed_id]] == [e.key for e in expected]
+                    for feed_id, expected in expected_all.items()
+                )
+                failures += not same
+                print(
+                    f"{scale:>6} {len(dataset.entries):>8}  {'router (all feeds)':<18} {limit:>6} {per_feed_s:>8.3f} {router_s:>8.3f}  {'yes' if same else 'NO'}"
+                )
+    if failures:
+        raise SystemExit(f"{failures} feed selections differ from the full sort")
+
+
+def bench_incremental(source: Path, scale: int, limit: int) -> None:
+    """Add one patch to a large feed: full rebuild vs merging into the old XML."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = source
+        if scale != 1:
+            path = Path(tmp) / f"patches-x{scale}.json"
+            write_scaled_dataset(source, scale, path)
+        dataset = load_dataset(path)
+    lastmod = dataset.lastmod
+    pub_dates: dict = {}
+    current = generate_rss.feed_entries(dataset.entries, "all", limit, pub_dates, lastmod)
+    # The newest entry plays the patch that appeared since the previous run.
+    newest = current[0]
+    previous = [entry for entry in dataset.entries if entry is not newest]
+    previous_selected = generate_rss.feed_entries(previous, "all", limit, pub_dates, lastmod)
+    existing_xml = generate_rss.build_rss_xml(previous_selected, "all", lastmod, pub_dates)
+    # What FragmentCache.record_feed would have stored for the existing file.
+    written = {
+        guid_digest(generate_rss.entry_guid(entry)): content_hash
+        for entry, content_hash in zip(
+            previous_selected,
+            generate_rss.feed_item_hashes(previous_selected, pub_dates, lastmod),
+        )
+    }
+
+    started = time.perf_counter()
+    full = generate_rss.build_rss_xml(current, "all", lastmod, pub_dates)
+    full_s = time.perf_counter() - started
+    started = time.perf_counter()
+    merged = generate_rss.merge_rss_xml(existing_xml, written, current, "all", lastmod, pub_dates)
+    merge_s = time.perf_counter() - started
+
+    if merged is None or merged[0] != full:
+        raise SystemExit("Incremental feed differs from the full rebuild")
+    print(
+        f"{len(current)} items, {len(full) / 1e6:.1f} MB: full rebuild {full_s:.3f}s, "
+        f"incremental {merge_s:.3f}s ({full_s / merge_s:.1f}x), {merged[1]} blocks reused, byte-identical"
+    )
+
+
+def bench_stream(source: Path, scale: int) -> None:
+    """Write a full-archive feed joined in memory vs streamed (plain and gzip)."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = source
+        if scale != 1:
+            path = Path(tmp) / f"patches-x{scale}.json"
+            write_scaled_dataset(source, scale, path)
+        dataset = load_dataset(path)
+        lastmod = dataset.lastmod
+        pub_dates: dict = {}
+        entries = generate_rss.feed_entries(dataset.entries, "all", 0, pub_dates, lastmod)
+        out = Path(tmp)
+
+        def joined(target: Path) -> None:
+            xml = generate_rss.build_rss_xml(entries, "all", lastmod, pub_dates)
+            with target.open("w", encoding="utf-8", newline="\n") as f:
+                f.write(xml)
+
+        def streamed(target: Path) -> None:
+            write_lines(target, generate_rss.iter_rss_lines(entries, "all", lastmod, pub_dates))
+
+        print(f"{len(entries)} items")
+        print(f"{'writer':<16} {'seconds':>8} {'peak MB':>8} {'file MB':>8}")
+        for label, fn, target in (
+            ("joined", joined, out / "joined.xml"),
+            ("streamed", streamed, out / "streamed.xml"),
+            ("streamed .gz", streamed, out / "streamed.xml.gz"),
+        ):
+            elapsed, peak, _ = measure(lambda: fn(target))
+            print(f"{label:<16} {elapsed:>8.3f} {peak / 1e6:>8.1f} {target.stat().st_size / 1e6:>8.1f}")
+        expected = (out / "joined.xml").read_text(encoding="utf-8")
+        if read_output(out / "streamed.xml") != expected or read_output(out / "streamed.xml.gz") != expected:
+            raise SystemExit("Streamed feed differs from the joined feed")
+        print("streamed output is byte-identical")
+
+
+def suite_stages(
+    path: Path, tmp: Path, feed_limit: int
+) -> list[tuple[str, Callable[[], object]]]:
+    """Stage name -> callable, each run on the dataset at path."""
+    dataset = load_dataset(path)
+    lastmod = dataset.lastmod
+    feeds = list(generate_rss.FEED_CONFIG.feeds)
+    selected = generate_rss.feed_entries(dataset.entries, "all", feed_limit, {}, lastmod)
+
+    def write_feed() -> str:
+        # A fresh ledger each time, so every run writes the feed.
+        return generate_rss.maybe_write_feed(
+            current_entries=dataset.entries,
+            previous_entries=[],
+            output_path=tmp / "rss.xml",
+            mode="all",
+            limit=feed_limit,
+            dataset_lastmod=lastmod,
+            force=True,
+            ledger=FeedLedger(tmp / "feed-ledger.json"),
+        )
+
+    return [
+        ("load_patch_entries", lambda: load_patch_entries(path)),
+        ("load_dataset", lambda: load_dataset(path)),
+        (
+            "feed_entries",
+            lambda: generate_rss.feed_entries(
+                dataset.entries, "all", feed_limit, {}, lastmod
+            ),
+        ),
+        (
+            "route_feeds",
+            lambda: generate_rss.route_feeds(
+                dataset.entries,
+                feeds,
+                {feed.id: feed_limit for feed in feeds},
+                {},
+                lastmod,
+            ),
+        ),
+        (
+            "build_rss_xml",
+            lambda: generate_rss.build_rss_xml(selected, "all", lastmod, {}),
+        ),
+        ("maybe_write_feed", write_feed),
+        ("sitemap build_entries", lambda: generate_sitemap.build_entries(path)),
+    ]
+
+
+def run_suite(
+    source: Path, sizes: list[int], seed: int, repeat: int, feed_limit: int
+) -> list[dict]:
+    results = []
+    print(f"{'dataset':<13} {'patches':>8}  {'stage':<22} {'seconds':>9} {'peak MB':>9}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp = Path(tmp_dir)
+        datasets = [("real", source)]
+        if sizes:
+            profile = synth_patches.Profile(source)
+            for size in sizes:
+                path = tmp / f"synthetic-{size}.json"
+                synth_patches.write_synthetic_dataset(profile, size, seed, path)
+                datasets.append((f"synth-{size}", path))
+        for label, path in datasets:
+            stages = suite_stages(path, tmp, feed_limit)
+            patches = count(iter_patch_records(path))
+            for stage, fn in stages:
+                # Best of repeat untraced runs; tracemalloc slows the code it traces.
+                seconds = min(measure_time(fn) for _ in range(max(repeat, 1)))
+                _, peak, _ = measure(fn)
+                results.append(
+                    {
+                        "dataset": label,
+                        "patches": patches,
+                        "stage": stage,
+                        "seconds": round(seconds, 6),
+                        "peak_bytes": peak,
+                    }
+                )
+                print(
+                    f"{label:<13} {patches:>8}  {stage:<22} {seconds:>9.3f} {peak / 1e6:>9.1f}"
+                )
+    return results
+
+
+def measure_time(fn: Callable[[], object]) -> float:
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def suite_regressions(
+    results: list[dict],
+    baseline: list[dict],
+    max_slowdown: float,
+    max_memory_growth: float,
+    min_seconds: float,
+) -> list[str]:
+    """Stages slower or hungrier than the baseline by more than the thresholds."""
+    previous = {(r["dataset"], r["stage"]): r for r in baseline}
+    out = []
+    for result in results:
+        before = previous.get((result["dataset"], result["stage"]))
+        if before is None:
+            continue
+        name = f"{result['dataset']} {result['stage']}"
+        seconds, base_seconds = result["seconds"], before["seconds"]
+        # Stages below min_seconds are too short to compare reliably.
+        if (
+            max(seconds, base_seconds) >= min_seconds
+            and seconds > base_seconds * (1 + max_slowdown)
+        ):
+            out.append(f"{name}: {base_seconds:.3f}s -> {seconds:.3f}s")
+        peak, base_peak = result["peak_bytes"], before["peak_bytes"]
+        if base_peak and peak > base_peak * (1 + max_memory_growth):
+            out.append(f"{name}: peak {base_peak / 1e6:.1f} MB -> {peak / 1e6:.1f} MB")
+    return out
+
+
+def bench_suite(args: argparse.Namespace) -> None:
+    baseline = None
+    if args.baseline:
+        raw = json.loads(args.baseline.read_text(encoding="utf-8"))
+        if raw.get("version") != SUITE_VERSION:
+            raise SystemExit(f"Unsupported baseline version in {args.baseline}")
+        baseline = raw["results"]
+
+    results = run_suite(args.source, args.size or [], args.seed, args.repeat, args.limit)
+    payload = {
+        "version": SUITE_VERSION,
+        "created_at_utc": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "python": platform.python_version(),
+        "platform": sys.platform,
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "feed_limit": args.limit,
+        "results": results,
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(payload, indent=2) + "\n", encoding="utf-8")
+    print(f"Wrote {args.output}")
+
+    if baseline is not None:
+        regressions = suite_regressions(
+            results,
+            baseline,
+            args.max_slowdown,
+            args.max_memory_growth,
+            args.min_seconds,
+        )
+        if regressions:
+            print("Regressions against the baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            raise SystemExit(f"{len(regressions)} regression(s) beyond the thresholds")
+        print(f"No regressions against {args.baseline}")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    loader = sub.add_parser("loader", help="Compare json.loads and streaming loaders")
+    loader.add_argument(
+        "--source", type=Path, default=PATCHES_JSON, help="Base patches.json to replicate"
+    )
+    loader.add_argument(
+        "--scale",
+        type=int,
+        action="append",
+        help="Replication factor (repeatable, default: 1, 10, 100)",
+    )
+
+    memory = sub.add_parser("memory", help="Report retained memory per patch record")
+    memory.add_argument(
+        "--source", type=Path, default=PATCHES_JSON, help="Base patches.json to replicate"
+    )
+    memory.add_argument(
+        "--scale",
+        type=int,
+        action="append",
+        help="Replication factor (repeatable, default: 1, 10)",
+    )
+
+    feed = sub.add_parser("feed", help="Compare top-K feed selection with a full sort")
+    feed.add_argument(
+        "--source", type=Path, default=PATCHES_JSON, help="Base patches.json to replicate"
+    )
+    feed.add_argument(
+        "--scale",
+        type=int,
+        action="append",
+        help="Replication factor (repeatable, default: 1, 100)",
+    )
+    feed.add_argument(
+        "--limit",
+        type=int,
+        action="append",
+        help="Feed limit (repeatable, default: 50, 1000)",
+    )
+
+    incremental = sub.add_parser(
+        "incremental", help="Compare incremental feed updates with a full rebuild"
+    )
+    incremental.add_argument(
+        "--source", type=Path, default=PATCHES_JSON, help="Base patches.json to replicate"
+    )
+    incremental.add_argument(
+        "--scale", type=int, default=100, help="Replication factor (default: 100)"
+    )
+    incremental.add_argument(
+        "--limit", type=int, default=20000, help="Feed limit (default: 20000)"
+    )
+
+    stream = sub.add_parser("stream", help="Compare joined and streamed full-archive feed writes")
+    stream.add_argument(
+        "--source", type=Path, default=PATCHES_JSON, help="Base patches.json to replicate"
+    )
+    stream.add_argument(
+        "--scale", type=int, default=100, help="Replication factor (default: 100)"
+    )
+
+    suite = sub.add_parser(
+        "suite", help="Time and memory-profile every stage, save JSON, check regressions"
+    )
+    suite.add_argument(
+        "--source",
+        type=Path,
+        default=PATCHES_JSON,
+        help="Real patches.json (also the synthetic profile)",
+    )
+    suite.add_argument(
+        "--size",
+        type=parse_count,
+        action="append",
+        help="Also run on a synthetic dataset of this many patches, e.g. 10k (repeatable)",
+    )
+    suite.add_argument("--seed", type=int, default=1, help="Synthetic dataset seed (default: 1)")
+    suite.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Timed runs per stage; the fastest counts (default: 3)",
+    )
+    suite.add_argument(
+        "--limit",
+        type=int,
+        default=1000,
+        help="Feed limit for the feed stages (default: 1000)",
+    )
+    suite.add_argument(
+        "--output",
+        type=Path,
+        default=SUITE_JSON,
+        help="Results JSON path (default: .tmp/benchmark.json)",
+    )
+    suite.add_argument(
+        "--baseline", type=Path, default=None, help="Results JSON to compare against"
+    )
+    suite.add_argument(
+        "--max-slowdown",
+        type=float,
+        default=0.25,
+        help="Fail when a stage is this fraction slower than the baseline (default: 0.25)",
+    )
+    suite.add_argument(
+        "--max-memory-growth",
+        type=float,
+        default=0.25,
+        help="Fail when a stage's peak memory grew by this fraction (default: 0.25)",
+    )
+    suite.add_argument(
+        "--min-seconds",
+        type=float,
+        default=0.01,
+        help="Ignore timing changes of stages faster than this (default: 0.01)",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if args.command == "loader":
+        bench_loader(args.source, args.scale or [1, 10, 100])
+    elif args.command == "memory":
+        bench_memory(args.source, args.scale or [1, 10])
+    elif args.command == "feed":
+        bench_feed(args.source, args.scale or [1, 100], args.limit or [50, 1000])
+    elif args.command == "incremental":
+        bench_incremental(args.source, args.scale, args.limit)
+    elif args.command == "stream":
+        bench_stream(args.source, args.scale)
+    elif args.command == "suite":
+        bench_suite(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+"""Build every derived artifact (sitemap.xml, taxonomy.json and the RSS feeds).
+
+patches.json and patches.meta.json are read and normalized once into a shared
+Dataset. Each registered generator then runs off that model, and per-stage
+timings are printed at the end. RSS feeds are defined in scripts/feeds.json;
+their filters are evaluated together in one pass over the dataset.
+
+Generators whose build key (dataset hash, code fingerprint and options) is
+unchanged are skipped; when every generator is fresh the dataset is not even
+opened. Otherwise each remaining generator is checked against
+.build/manifest.json (see build_manifest.py) and only runs when its declared
+inputs changed, so a new patch only rebuilds the feeds it belongs to.
+
+With --jobs N the generators that need to run are split into independent
+tasks (facet feeds in shards) and run in forked workers; see
+build_executor.py. Results are merged in registration order, so output does
+not depend on N.
+
+New outputs only need a register_generator() call.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import Callable, Iterator
+
+from artifact_writer import save_changed_artifacts
+from build_cache import BuildCache, build_key, dataset_inputs
+from build_executor import can_fork, run_tasks
+from build_history import append_history, build_record
+from build_manifest import BuildManifest
+from build_profile import (
+    add_profile_arguments,
+    finish_profiler,
+    span,
+    spanned,
+    start_profiler,
+)
+from feed_archive import FeedArchives
+from feed_formats import FEED_WRITERS
+from feed_ledger import FeedLedger
+from fragment_cache import FragmentCache
+from generate_rss import (
+    DEFAULT_LIMIT,
+    FEED_CONFIG,
+    RSS_ITEM_TEMPLATE_VERSION,
+    feed_inputs,
+    feed_step,
+    feed_limit,
+    maybe_write_feed,
+    select_feeds,
+)
+from facet_feeds import (
+    FACET_INDEX_JSON,
+    facet_feeds,
+    facet_postings,
+    write_facet_feed,
+    write_facet_index,
+)
+from generate_sitemap import SITEMAP_XML, write_sitemap
+from taxonomy import TAXONOMY_JSON, write_taxonomy
+from patch_dataset import (
+    PATCHES_JSON,
+    PATCHES_META_JSON,
+    Dataset,
+    PatchEntry,
+    load_dataset,
+    load_patch_entries,
+    read_meta,
+)
+
+
+@dataclass(frozen=True)
+class BuildContext:
+    dataset: Dataset
+    previous_entries: list[PatchEntry]
+    limit: int
+    force: bool
+    ledger: FeedLedger
+    incremental: bool
+    fragments: FragmentCache
+    archives: FeedArchives
+    # Feed id -> its newest entries, selected for every feed in one pass.
+    selections: dict[str, list[PatchEntry]]
+    # Feed id -> every entry of the feed, for feeds with archive pages.
+    members: dict[str, list[PatchEntry]]
+
+
+@dataclass(frozen=True)
+class Generator:
+    name: str
+    run: Callable[[BuildContext], str]
+    outputs: tuple[Path, ...]
+    # Command-line options that feed into the build cache key.
+    options: tuple[str, ...] = ()
+    # Declared inputs once the dataset is loaded (see build_manifest.py);
+    # None means the dataset hash, update time, code and options.
+    inputs: Callable[[BuildContext], dict] | None = None
+    # Optional split into independent tasks for --jobs, plus the function
+    # that turns their results (in task order) into the step's message.
+    split: Callable[[BuildContext], Split] | None = None
+
+    def tasks(self, ctx: BuildContext) -> Split:
+        if self.split is not None:
+            return self.split(ctx)
+        return [partial(self.run, ctx)], lambda results: results[0]
+
+
+Split = tuple[list[Callable[[], object]], Callable[[list], str]]
+GENERATORS: list[Generator] = []
+# Facet feeds are written in this many independent tasks.
+FACET_SHARDS = 8
+
+
+def register_generator(
+    name: str,
+    run: Callable[[BuildContext], str],
+    outputs: tuple[Path, ...],
+    options: tuple[str, ...] = (),
+    inputs: Callable[[BuildContext], dict] | None = None,
+    split: Callable[[BuildContext], Split] | None = None,
+) -> None:
+    if any(generator.name == name for generator in GENERATORS):
+        raise ValueError(f"Generator already registered: {name}")
+    GENERATORS.append(
+        Generator(
+            name=name,
+            run=run,
+            outputs=outputs,
+            options=options,
+            inputs=inputs,
+            split=split,
+        )
+    )
+
+
+def feed_generator(mode: str, output_path: Path) -> Callable[[BuildContext], str]:
+    def run(ctx: BuildContext) -> str:
+        return maybe_write_feed(
+            current_entries=ctx.dataset.entries,
+            previous_entries=ctx.previous_entries,
+            output_path=output_path,
+            mode=mode,
+            limit=feed_limit(mode, ctx.limit),
+            dataset_lastmod=ctx.dataset.lastmod,
+            force=ctx.force,
+            ledger=ctx.ledger,
+            incremental=ctx.incremental,
+            fragments=ctx.fragments,
+            selected=ctx.selections[mode],
+            archives=ctx.archives,
+            members=ctx.members.get(mode),
+        )
+
+    return run
+
+
+def feed_generator_inputs(mode: str) -> Callable[[BuildContext], dict]:
+    def inputs(ctx: BuildContext) -> dict:
+        return feed_inputs(
+            mode,
+            ctx.selections[mode],
+            feed_limit(mode, ctx.limit),
+            ctx.ledger,
+            ctx.dataset.lastmod,
+        )
+
+    return inputs
+
+
+register_generator("sitemap", lambda ctx: write_sitemap(ctx.dataset), (SITEMAP_XML,))
+register_generator(
+    "taxonomy", lambda ctx: write_taxonomy(ctx.dataset.catalog), (TAXONOMY_JSON,)
+)
+for _feed in FEED_CONFIG.feeds:
+    register_generator(
+        f"rss:{_feed.id}",
+        feed_generator(_feed.id, _feed.path),
+        (_feed.path, *(writer.output_path(_feed.path) for writer in FEED_WRITERS)),
+        options=("limit",),
+        inputs=feed_generator_inputs(_feed.id),
+    )
+
+
+def facet_split(ctx: BuildContext) -> Split:
+    feeds = facet_feeds(ctx.dataset.catalog, facet_postings(ctx.dataset.entries))
+
+    def write_shard(shard: list) -> int:
+        return sum(
+            write_facet_feed(
+                feed,
+                posting,
+                ctx.previous_entries,
+                ctx.limit,
+                ctx.dataset.lastmod,
+                ctx.force,
+                ctx.ledger,
+                ctx.incremental,
+                ctx.fragments,
+            )
+            for feed, posting in shard
+        )
+
+    shards = [feeds[i::FACET_SHARDS] for i in range(FACET_SHARDS)]
+    tasks = [partial(write_shard, shard) for shard in shards if shard]
+    return tasks, lambda results: write_facet_index(feeds, sum(results))
+
+
+def facet_generator(ctx: BuildContext) -> str:
+    tasks, finish = facet_split(ctx)
+    return finish([task() for task in tasks])
+
+
+register_generator(
+    "rss:facets",
+    facet_generator,
+    (FACET_INDEX_JSON,),
+    options=("limit",),
+    split=facet_split,
+)
+
+
+@contextmanager
+def timed(timings: list[tuple[str, float]], stage: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        with span(stage):
+            yield
+    finally:
+        timings.append((stage, time.perf_counter() - started))
+
+
+def print_timings(timings: list[tuple[str, float]]) -> None:
+    width = max((len(stage) for stage, _ in timings), default=5)
+    print("Stage timings:")
+    for stage, seconds in timings:
+        print(f"  {stage:<{width}}  {seconds * 1000:9.1f} ms")
+    total = sum(seconds for _, seconds in timings)
+    print(f"  {'total':<{width}}  {total * 1000:9.1f} ms")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--current", type=Path, default=PATCHES_JSON, help="Current patches.json path"
+    )
+    parser.add_argument(
+        "--previous",
+        type=Path,
+        default=None,
+        help="Previous patches.json snapshot path",
+    )
+    parser.add_argument(
+        "--meta", type=Path, default=PATCHES_META_JSON, help="patches.meta.json path"
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=DEFAULT_LIMIT,
+        help="Max items per feed unless feeds.json sets a limit (0 = full archive)",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Rewrite feeds even if no new patch is detected",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Run generators even if the build cache says nothing changed",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Reuse the <item> blocks of unchanged entries from the existing feeds",
+    )
+    parser.add_argument(
+        "--only",
+        action="append",
+        choices=[generator.name for generator in GENERATORS],
+        help="Run only the named generator (repeatable)",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Run independent generators in this many forked worker processes "
+        "(output does not depend on it)",
+    )
+    add_profile_arguments(parser)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    profiler = start_profiler(args, "build_all.py")
+    if profiler is not None and args.jobs > 1:
+        # Spans and profiles are only collected in this process.
+        print("Profiling: running generators with --jobs 1")
+        args.jobs = 1
+    try:
+        build(args)
+    finally:
+        finish_profiler(profiler, args.profile_output)
+
+
+def build(args: argparse.Namespace) -> None:
+    timings: list[tuple[str, float]] = []
+    cache = BuildCache()
+    manifest = BuildManifest()
+
+    stale: list[tuple[Generator, str | None, dict]] = []
+    with timed(timings, "cache check"):
+        meta = read_meta(args.meta)
+        for generator in GENERATORS:
+            if args.only and generator.name not in args.only:
+                continue
+            config = {option: getattr(args, option) for option in generator.options}
+            key = build_key(meta, args.current, config)
+            if args.force or args.no_cache or not cache.is_fresh(
+                generator.name, key, list(generator.outputs)
+            ):
+                stale.append((generator, key, config))
+            else:
+                print(f"Skipped {generator.name}: dataset, code and config unchanged")
+
+    dataset: Dataset | None = None
+    ran: set[str] = set()
+    if stale:
+        stale_names = {generator.name for generator, _, _ in stale}
+        with timed(timings, "load dataset"):
+            dataset = load_dataset(args.current, args.meta)
+        with timed(timings, "load previous"):
+            previous_entries = (
+                load_patch_entries(args.previous) if args.previous else []
+            )
+
+        ledger = FeedLedger()
+        with timed(timings, "route feeds"):
+            selections, members = select_feeds(
+                dataset.entries,
+                [
+                    feed
+                    for feed in FEED_CONFIG.feeds
+                    if f"rss:{feed.id}" in stale_names
+                ],
+                args.limit,
+                ledger,
+                dataset.lastmod,
+            )
+
+        ctx = BuildContext(
+            dataset=dataset,
+            previous_entries=previous_entries,
+            limit=args.limit,
+            force=args.force,
+            ledger=ledger,
+            incremental=args.incremental,
+            fragments=FragmentCache(RSS_ITEM_TEMPLATE_VERSION),
+            archives=FeedArchives(),
+            selections=selections,
+            members=members,
+        )
+        built_from = {
+            "patches_sha256": str(meta.get("patches_sha256", "")).strip(),
+            "updated_at_utc": dataset.updated_at_utc,
+        }
+        to_run: list[tuple[Generator, dict]] = []
+        for generator, key, config in stale:
+            outputs = list(generator.outputs)
+            inputs = (
+                generator.inputs(ctx)
+                if generator.inputs is not None
+                else dataset_inputs(meta, config)
+            )
+            # Default inputs trust patches.meta.json only when build_key could
+            # verify it against patches.json.
+            trusted = generator.inputs is not None or key is not None
+            if (
+                trusted
+                and not (args.force or args.no_cache)
+                and manifest.is_fresh(generator.name, inputs, outputs)
+            ):
+                print(f"Skipped {generator.name}: declared inputs unchanged")
+            else:
+                to_run.append((generator, inputs))
+            cache.record(generator.name, key)
+
+        tasks: list[Callable[[], object]] = []
+        splits = []
+        for generator, inputs in to_run:
+            started = time.perf_counter()
+            generator_tasks, finish = generator.tasks(ctx)
+            split_seconds = time.perf_counter() - started
+            splits.append(
+                (generator, inputs, len(generator_tasks), finish, split_seconds)
+            )
+            tasks.extend(spanned(generator.name, task) for task in generator_tasks)
+
+        parallel = args.jobs > 1 and len(tasks) > 1 and can_fork()
+        started = time.perf_counter()
+        results = run_tasks(
+            tasks, args.jobs, (ctx.ledger, ctx.fragments, ctx.archives)
+        )
+        wall = time.perf_counter() - started
+
+        offset = 0
+        for generator, inputs, count, finish, split_seconds in splits:
+            chunk = results[offset : offset + count]
+            offset += count
+            started = time.perf_counter()
+            print(finish([result for result, _ in chunk]))
+            seconds = (
+                split_seconds
+                + sum(task_seconds for _, task_seconds in chunk)
+                + time.perf_counter()
+                - started
+            )
+            if parallel:
+                print(
+                    f"  {generator.name}: {seconds * 1000:.1f} ms over {count} task(s)"
+                )
+            else:
+                timings.append((generator.name, seconds))
+            ran.add(generator.name)
+            manifest.record(
+                generator.name, inputs, list(generator.outputs), built_from
+            )
+        if parallel:
+            timings.append((f"generators ({args.jobs} jobs)", wall))
+        ctx.ledger.save()
+        ctx.archives.save()
+        # Feeds whose step did not run (cache hits, --only) left their files
+        # alone, so their fragment records still hold.
+        ctx.fragments.keep_recorded(lambda mode: feed_step(mode) not in ran)
+        ctx.fragments.save()
+        manifest.save()
+        cache.save()
+
+    print(save_changed_artifacts())
+    print_timings(timings)
+    if not ran:
+        # Cache hits would only dilute the stage medians of the history.
+        print("History: no generator ran, run not recorded")
+        return
+    record = build_record(
+        meta,
+        args.current,
+        timings,
+        patches=len(dataset.records) if dataset else None,
+        entries=len(dataset.entries) if dataset else None,
+        generators=[g.name for g in GENERATORS if g.name in ran],
+        jobs=args.jobs,
+        # Forced rewrites say nothing about how fast new patches get out.
+        feed_paths=[] if args.force else [feed.path for feed in FEED_CONFIG.feeds],
+    )
+    print(append_history(record))
+
+
+if __name__ == "__main__":
+    main()
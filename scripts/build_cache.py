@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Skip generator runs whose inputs have not changed since the last build.
+
+A build key combines the dataset hash recorded in patches.meta.json
+(``patches_sha256``, ``bytes``, ``updated_at_utc``), a fingerprint of the
+generator code and JSON configuration in scripts/ and the step configuration.
+When the key stored in .build/build-cache.json matches and the outputs exist,
+the step is skipped without opening patches.json.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from functools import lru_cache
+from pathlib import Path
+
+from patch_dataset import BUILD_DIR, write_text_lf
+
+BUILD_CACHE_JSON = BUILD_DIR / "build-cache.json"
+SCRIPTS_DIR = Path(__file__).resolve().parent
+
+
+@lru_cache(maxsize=None)
+def code_fingerprint(scripts_dir: Path = SCRIPTS_DIR) -> str:
+    digest = hashlib.sha256()
+    # Python sources plus JSON configuration such as feeds.json.
+    for path in sorted([*scripts_dir.glob("*.py"), *scripts_dir.glob("*.json")]):
+        digest.update(path.name.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(path.read_bytes())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def dataset_inputs(meta: dict, config: dict) -> dict:
+    """Default inputs of a step: dataset hash and update time, code and config."""
+    return {
+        "patches_sha256": str(meta.get("patches_sha256", "")).strip(),
+        "updated_at_utc": str(meta.get("updated_at_utc", "")).strip(),
+        "code": code_fingerprint(),
+        "config": config,
+    }
+
+
+def inputs_digest(inputs: dict) -> str:
+    raw = json.dumps(inputs, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def build_key(meta: dict, patches_path: Path, config: dict) -> str | None:
+    """Return the cache key for a step, or None when the dataset is unverifiable."""
+    inputs = dataset_inputs(meta, config)
+    if not inputs["patches_sha256"]:
+        return None
+    try:
+        # A cheap stat guards against patches.json changing without its meta.
+        if patches_path.stat().st_size != meta.get("bytes"):
+            return None
+    except OSError:
+        return None
+    return inputs_digest(inputs)
+
+
+class BuildCache:
+    def __init__(self, path: Path = BUILD_CACHE_JSON) -> None:
+        self.path = path
+        self.steps: dict[str, str] = {}
+        self.dirty = False
+        try:
+            raw = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            raw = {}
+        steps = raw.get("steps") if isinstance(raw, dict) else None
+        if isinstance(steps, dict):
+            self.steps = {str(k): str(v) for k, v in steps.items()}
+
+    def is_fresh(self, step: str, key: str | None, outputs: list[Path]) -> bool:
+        if key is None or self.steps.get(step) != key:
+            return False
+        return all(path.exists() for path in outputs)
+
+    def record(self, step: str, key: str | None) -> None:
+        if key is None:
+            if self.steps.pop(step, None) is not None:
+                self.dirty = True
+            return
+        if self.steps.get(step) != key:
+            self.steps[step] = key
+            self.dirty = True
+
+    def save(self) -> None:
+        if not self.dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        write_text_lf(
+            self.path,
+            json.dumps({"steps": self.steps}, indent=2, sort_keys=True) + "\n",
+        )
+        self.dirty = False
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Run independent build tasks across a process pool.
+
+Workers are forked after the dataset has been loaded and the feeds routed, so
+they inherit the normalized Dataset and the build context copy-on-write:
+nothing is re-parsed and only task indexes and results cross process
+boundaries. Tasks are plain callables and never pickled.
+
+State that tasks share (feed ledger, fragment cache, archive state and the
+changed-artifact log) is journaled inside each worker and returned with the
+task's result. The parent replays the journals in task order, which is the
+order a serial run would apply them in, so outputs and state files do not
+depend on --jobs or on which worker finishes first.
+
+Without the fork start method (Windows), or with a single job, tasks run
+in-process one after another.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import time
+from typing import Callable, Protocol, Sequence
+
+import artifact_writer
+
+
+class Journaled(Protocol):
+    def start_journal(self) -> None: ...
+
+    def take_journal(self) -> object: ...
+
+    def apply_journal(self, journal: object) -> None: ...
+
+
+# Set in the parent right before forking; workers read their inherited copy.
+_TASKS: Sequence[Callable[[], object]] = ()
+_STATE: Sequence[Journaled] = ()
+
+
+def can_fork() -> bool:
+    return "fork" in multiprocessing.get_all_start_methods()
+
+
+def _run_task(index: int) -> tuple[object, list[object], dict, float]:
+    for state in _STATE:
+        state.start_journal()
+    artifact_writer.WRITES.clear()
+    started = time.perf_counter()
+    result = _TASKS[index]()
+    elapsed = time.perf_counter() - started
+    journals = [state.take_journal() for state in _STATE]
+    return result, journals, dict(artifact_writer.WRITES), elapsed
+
+
+def run_tasks(
+    tasks: Sequence[Callable[[], object]],
+    jobs: int,
+    state: Sequence[Journaled] = (),
+) -> list[tuple[object, float]]:
+    """Run tasks and return (result, seconds) per task, in task order."""
+    global _TASKS, _STATE
+    if jobs <= 1 or len(tasks) <= 1 or not can_fork():
+        out = []
+        for task in tasks:
+            started = time.perf_counter()
+            result = task()
+            out.append((result, time.perf_counter() - started))
+        return out
+
+    _TASKS, _STATE = tasks, state
+    try:
+        context = multiprocessing.get_context("fork")
+        with context.Pool(min(jobs, len(tasks))) as pool:
+            # imap yields in task order; chunksize 1 lets idle workers pick
+            # up the next task instead of a fixed share.
+            results = list(pool.imap(_run_task, range(len(tasks)), chunksize=1))
+    finally:
+        _TASKS, _STATE = (), ()
+
+    out = []
+    for result, journals, writes, elapsed in results:
+        for shared, journal in zip(state, journals):
+            shared.apply_journal(journal)
+        artifact_writer.WRITES.update(writes)
+        out.append((result, elapsed))
+    return out
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""Run-over-run build history (.build/history.jsonl) and a trend report.
+
+build_all.py appends one compact JSON line per run that ran a generator:
+dataset size and patch count, per-stage durations, the generators that ran,
+how many artifacts changed and, for every configured feed the run rewrote,
+the seconds from the dataset's upstream ``updated_at_utc`` to the feed being
+written. Only the newest MAX_HISTORY runs are kept.
+
+Run this script to summarize the history: dataset growth, median stage times
+over the window against the most recent runs, publication latency, and flags
+for stages that got slower.
+
+Examples:
+    python3 scripts/build_history.py
+    python3 scripts/build_history.py --last 100 --recent 10 --threshold 0.5
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+from datetime import datetime, timezone
+from pathlib import Path
+
+from artifact_writer import WRITES, changed_artifacts, write_text_atomic
+from patch_dataset import BUILD_DIR, ROOT, parse_isoish
+
+BUILD_HISTORY_JSONL = BUILD_DIR / "history.jsonl"
+MAX_HISTORY = 2000
+
+
+def read_history(path: Path = BUILD_HISTORY_JSONL) -> list[dict]:
+    try:
+        lines = path.read_text(encoding="utf-8").splitlines()
+    except OSError:
+        return []
+    out = []
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(record, dict):
+            out.append(record)
+    return out
+
+
+def _relative(path: Path) -> str:
+    try:
+        return path.resolve().relative_to(ROOT).as_posix()
+    except ValueError:
+        return str(path)
+
+
+def build_record(
+    meta: dict,
+    dataset_path: Path,
+    timings: list[tuple[str, float]],
+    patches: int | None,
+    entries: int | None,
+    generators: list[str],
+    jobs: int,
+    feed_paths: list[Path],
+) -> dict:
+    now = datetime.now(timezone.utc)
+    changed = changed_artifacts()
+    latency = {}
+    updated = parse_isoish(str(meta.get("updated_at_utc", "")))
+    if updated is not None:
+        for path in feed_paths:
+            name = _relative(path)
+            if name in changed:
+                latency[name] = round((now - updated).total_seconds(), 1)
+    try:
+        dataset_bytes = dataset_path.stat().st_size
+    except OSError:
+        dataset_bytes = None
+    return {
+        "at": now.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "dataset_sha256": str(meta.get("patches_sha256", "")).strip(),
+        "dataset_bytes": dataset_bytes,
+        "patches": patches,
+        "entries": entries,
+        "generators": generators,
+        "jobs": jobs,
+        "stages_ms": {stage: round(seconds * 1000, 1) for stage, seconds in timings},
+        "total_ms": round(sum(seconds for _, seconds in timings) * 1000, 1),
+        "artifacts_written": len(WRITES),
+        "artifacts_changed": len(changed),
+        "feed_latency_s": latency,
+    }
+
+
+def append_history(record: dict, path: Path = BUILD_HISTORY_JSONL) -> str:
+    lines = [json.dumps(r, separators=(",", ":")) for r in read_history(path)]
+    lines.append(json.dumps(record, separators=(",", ":")))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    write_text_atomic(path, "\n".join(lines[-MAX_HISTORY:]) + "\n", record=False)
+    kept = min(len(lines), MAX_HISTORY)
+    return f"History: run recorded in {_relative(path)} ({kept} runs kept)"
+
+
+def _median(values: list[float]) -> float | None:
+    return statistics.median(values) if values else None
+
+
+def _change(before: float | None, after: float | None) -> str:
+    if not before or after is None:
+        return ""
+    return f"{(after - before) / before * 100:+.0f}%"
+
+
+def _size(value: float | None) -> str:
+    return "?" if value is None else f"{value / 1e3:.1f} KB"
+
+
+def history_report(
+    records: list[dict], recent: int, threshold: float, min_ms: float
+) -> tuple[str, list[str]]:
+    """Return the report text and the slowdown flags."""
+    if not records:
+        return "No build history yet.", []
+    lines = [
+        f"History: {len(records)} runs, "
+        f"{records[0].get('at')} -> {records[-1].get('at')}"
+    ]
+
+    sized = [r for r in records if r.get("dataset_bytes")]
+    counted = [r for r in records if r.get("patches")]
+    if sized:
+        first, last = sized[0]["dataset_bytes"], sized[-1]["dataset_bytes"]
+        growth = f"Dataset: {_size(first)} -> {_size(last)} ({_change(first, last)})"
+        if counted:
+            first_n, last_n = counted[0]["patches"], counted[-1]["patches"]
+            growth += f", {first_n} -> {last_n} patches ({_change(first_n, last_n)})"
+        lines.append(growth)
+
+    stages: dict[str, list[float]] = {}
+    for record in records:
+        for stage, ms in (record.get("stages_ms") or {}).items():
+            stages.setdefault(stage, []).append(float(ms))
+    # Only runs of every generator have comparable totals (the workflow also
+    # runs the security feed on its own).
+    most = max((len(r.get("generators") or []) for r in records), default=0)
+    totals = [
+        (float(r["total_ms"]), r.get("patches"))
+        for r in records
+        if most and len(r.get("generators") or []) == most and "total_ms" in r
+    ]
+    if totals:
+        stages["total (full runs)"] = [ms for ms, _ in totals]
+
+    flags = []
+    width = max(len(stage) for stage in stages) if stages else 5
+    lines.extend(
+        [
+            "",
+            f"{'stage':<{width}}  {'runs':>5}  {'median ms':>10}  "
+            f"{'recent ms':>10}  {'change':>7}",
+        ]
+    )
+    for stage, values in stages.items():
+        before = _median(values[:-recent])
+        after = _median(values[-recent:])
+        lines.append(
+            f"{stage:<{width}}  {len(values):>5}  "
+            f"{(before if before is not None else after):>10.1f}  "
+            f"{after:>10.1f}  {_change(before, after):>7}"
+        )
+        slower = before is not None and after > before * (1 + threshold)
+        if slower and after >= min_ms:
+            flags.append(
+                f"SLOWER {stage}: median {after:.1f} ms over the last "
+                f"{min(recent, len(values))} runs vs {before:.1f} ms before "
+                f"({_change(before, after)})"
+            )
+
+    per_patch = [ms * 1000 / n for ms, n in totals if n]
+    if per_patch:
+        before = _median(per_patch[:-recent])
+        after = _median(per_patch[-recent:])
+        line = f"\nFull run per 1k patches: {after:.1f} ms recently"
+        if before:
+            line += f" vs {before:.1f} ms before ({_change(before, after)})"
+        lines.append(line)
+
+    latency: dict[str, list[float]] = {}
+    for record in records:
+        for feed, seconds in (record.get("feed_latency_s") or {}).items():
+            latency.setdefault(feed, []).append(float(seconds))
+    if latency:
+        lines.append("\nUpstream update -> feed written (runs that rewrote it):")
+        for feed, values in sorted(latency.items()):
+            lines.append(
+                f"  {feed}: {len(values)} runs, "
+                f"median {statistics.median(values):.0f} s, last {values[-1]:.0f} s"
+            )
+
+    lines.append("")
+    lines.extend(flags or ["No slowdowns flagged."])
+    return "\n".join(lines), flags
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--history", type=Path, default=BUILD_HISTORY_JSONL, help="history.jsonl path"
+    )
+    parser.add_argument(
+        "--last", type=int, default=50, help="Runs to summarize (default: 50)"
+    )
+    parser.add_argument(
+        "--recent",
+        type=int,
+        default=5,
+        help="Newest runs compared against the rest of the window (default: 5)",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="Flag stages whose recent median is this fraction slower (default: 0.25)",
+    )
+    parser.add_argument(
+        "--min-ms",
+        type=float,
+        default=5.0,
+        help="Do not flag stages faster than this (default: 5)",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    records = read_history(args.history)[-args.last :] if args.last > 0 else []
+    report, _ = history_report(
+        records, max(args.recent, 1), args.threshold, args.min_ms
+    )
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
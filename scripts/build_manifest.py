@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Record what every artifact was built from (.build/manifest.json).
+
+Each generator declares the inputs its outputs depend on. By default these
+are the dataset hash and ``updated_at_utc`` from patches.meta.json, the code
+fingerprint and the step configuration (see build_cache.dataset_inputs).
+Feeds declare narrower inputs instead: a digest of the entries selected for
+the feed, the feed definition and the code fingerprint.
+
+The manifest stores, per step, the declared inputs, their digest, the outputs
+and the dataset the outputs were produced from. After the dataset is loaded,
+a step whose inputs hash to the recorded digest (and whose outputs still
+exist) is skipped. A dataset change therefore only rebuilds the artifacts it
+reaches: a new security patch rebuilds rss.xml and rss-security-critical.xml
+but not rss-enterprise.xml.
+
+.build/build-cache.json remains the cheaper first check that skips loading
+the dataset when nothing at all changed.
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from build_cache import inputs_digest
+from patch_dataset import BUILD_DIR, ROOT, write_text_lf
+
+BUILD_MANIFEST_JSON = BUILD_DIR / "manifest.json"
+MANIFEST_VERSION = 1
+
+
+def _relative(path: Path) -> str:
+    try:
+        return path.resolve().relative_to(ROOT).as_posix()
+    except ValueError:
+        return str(path)
+
+
+class BuildManifest:
+    def __init__(self, path: Path = BUILD_MANIFEST_JSON) -> None:
+        self.path = path
+        self.artifacts: dict[str, dict] = {}
+        self.dirty = False
+        try:
+            raw = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            raw = {}
+        artifacts = raw.get("artifacts") if isinstance(raw, dict) else None
+        if isinstance(artifacts, dict) and raw.get("version") == MANIFEST_VERSION:
+            self.artifacts = {
+                str(step): entry
+                for step, entry in artifacts.items()
+                if isinstance(entry, dict)
+            }
+
+    def is_fresh(self, step: str, inputs: dict, outputs: list[Path]) -> bool:
+        entry = self.artifacts.get(step)
+        if entry is None or entry.get("digest") != inputs_digest(inputs):
+            return False
+        return all(path.exists() for path in outputs)
+
+    def record(
+        self, step: str, inputs: dict, outputs: list[Path], built_from: dict
+    ) -> None:
+        entry = {
+            "inputs": inputs,
+            "digest": inputs_digest(inputs),
+            "outputs": [_relative(path) for path in outputs],
+            "built_from": built_from,
+        }
+        if self.artifacts.get(step) != entry:
+            self.artifacts[step] = entry
+            self.dirty = True
+
+    def save(self) -> None:
+        if not self.dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {"version": MANIFEST_VERSION, "artifacts": self.artifacts}
+        write_text_lf(self.path, json.dumps(payload, indent=2, sort_keys=True) + "\n")
+        self.dirty = False
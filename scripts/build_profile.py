@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""Optional profiling of a build run (--profile).
+
+Pipeline stages are wrapped in span() blocks, which do nothing unless a
+Profiler is running. With --profile each span records its wall time, nested
+under the span it ran in; spans with the same path (one per facet feed, say)
+are added up. --profile-cpu also runs cProfile over the whole build and
+--profile-memory traces allocations with tracemalloc.
+
+The report (.tmp/profile.txt by default) lists the spans, the top
+functions by cumulative and by own time, and the top allocation sites at the
+end of the top-level stage that left the most memory allocated. --profile-cpu
+also saves the raw cProfile data next to it (profile.prof) for pstats or
+snakeviz.
+"""
+
+from __future__ import annotations
+
+import argparse
+import cProfile
+import io
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Iterator
+
+from artifact_writer import ROOT, write_text_atomic
+
+PROFILE_TXT = ROOT / ".tmp" / "profile.txt"
+TOP_FUNCTIONS = 25
+TOP_ALLOCATIONS = 25
+
+_ACTIVE: Profiler | None = None
+
+
+class Profiler:
+    def __init__(self, title: str, cpu: bool = False, memory: bool = False) -> None:
+        self.title = title
+        self.cpu = cProfile.Profile() if cpu else None
+        self.memory = memory
+        # Span path -> [calls, seconds, net allocated bytes], in first-seen order.
+        self.spans: dict[tuple[str, ...], list] = {}
+        self.stack: list[str] = []
+        self.started = 0.0
+        self.elapsed = 0.0
+        # Taken at the end of the top-level span holding the most memory.
+        self.snapshot: tracemalloc.Snapshot | None = None
+        self.snapshot_span = ""
+        self.snapshot_size = -1
+        self.peak = 0
+
+    def start(self) -> None:
+        global _ACTIVE
+        _ACTIVE = self
+        if self.memory:
+            tracemalloc.start()
+        self.started = time.perf_counter()
+        if self.cpu is not None:
+            self.cpu.enable()
+
+    def stop(self) -> None:
+        global _ACTIVE
+        if self.cpu is not None:
+            self.cpu.disable()
+        self.elapsed = time.perf_counter() - self.started
+        if self.memory:
+            _, self.peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        _ACTIVE = None
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        self.stack.append(name)
+        # Registered on entry so parents are listed before their children.
+        stats = self.spans.setdefault(tuple(self.stack), [0, 0.0, 0])
+        allocated = tracemalloc.get_traced_memory()[0] if self.memory else 0
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            stats[0] += 1
+            stats[1] += time.perf_counter() - started
+            if self.memory:
+                current = tracemalloc.get_traced_memory()[0]
+                stats[2] += current - allocated
+                if len(self.stack) == 1 and current > self.snapshot_size:
+                    self.snapshot = tracemalloc.take_snapshot()
+                    self.snapshot_span = name
+                    self.snapshot_size = current
+            self.stack.pop()
+
+    def report(self) -> str:
+        now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        lines = [f"Profile of {self.title} ({now})", ""]
+        width = max((2 * (len(p) - 1) + len(p[-1]) for p in self.spans), default=5)
+        width = max(width, len("total"))
+        header = f"  {'span':<{width}}  {'calls':>7}  {'ms':>10}"
+        lines.append("Spans (wall time, nested spans are included in their parent):")
+        lines.append(header + (f"  {'net MB':>8}" if self.memory else ""))
+        for path, (calls, seconds, allocated) in self.spans.items():
+            label = "  " * (len(path) - 1) + path[-1]
+            line = f"  {label:<{width}}  {calls:>7}  {seconds * 1000:>10.1f}"
+            if self.memory:
+                line += f"  {allocated / 1e6:>+8.2f}"
+            lines.append(line)
+        lines.append(f"  {'total':<{width}}  {'':>7}  {self.elapsed * 1000:>10.1f}")
+
+        if self.cpu is not None:
+            for order, heading in (
+                ("cumulative", "Top functions by cumulative time:"),
+                ("tottime", "Top functions by own time:"),
+            ):
+                out = io.StringIO()
+                stats = pstats.Stats(self.cpu, stream=out)
+                stats.sort_stats(order).print_stats(TOP_FUNCTIONS)
+                lines.extend(["", heading, _trim_pstats(out.getvalue())])
+
+        if self.snapshot is not None:
+            lines.extend(
+                [
+                    "",
+                    f"Peak traced memory: {self.peak / 1e6:.1f} MB",
+                    "Top allocation sites at the end of "
+                    f"{self.snapshot_span!r} (most memory held at a stage boundary):",
+                ]
+            )
+            snapshot = self.snapshot.filter_traces(
+                [tracemalloc.Filter(False, tracemalloc.__file__)]
+            )
+            for stat in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]:
+                frame = stat.traceback[0]
+                lines.append(
+                    f"  {stat.size / 1e6:>8.2f} MB  {stat.count:>9} blocks  "
+                    f"{_relative(frame.filename)}:{frame.lineno}"
+                )
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: Path) -> str:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_text_atomic(path, self.report(), record=False)
+        written = [path]
+        if self.cpu is not None:
+            raw = path.with_suffix(".prof")
+            self.cpu.dump_stats(raw)
+            written.append(raw)
+        return f"Profile: wrote {', '.join(_relative(str(p)) for p in written)}"
+
+
+def _relative(filename: str) -> str:
+    try:
+        return Path(filename).resolve().relative_to(ROOT).as_posix()
+    except ValueError:
+        return filename
+
+
+def _trim_pstats(text: str) -> str:
+    # Drop pstats' preamble (profile totals, "Ordered by", blank lines).
+    lines = text.splitlines()
+    for i, line in enumerate(lines):
+        if line.lstrip().startswith("ncalls"):
+            lines = lines[i:]
+            break
+    prefix = str(ROOT) + "/"
+    return "\n".join(line.replace(prefix, "") for line in lines if line.strip())
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time a pipeline stage when profiling; free otherwise."""
+    if _ACTIVE is None:
+        yield
+        return
+    with _ACTIVE.span(name):
+        yield
+
+
+def spanned(name: str, fn: Callable[[], object]) -> Callable[[], object]:
+    def run() -> object:
+        with span(name):
+            return fn()
+
+    return run
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Time every pipeline stage and write a report (see --profile-output)",
+    )
+    parser.add_argument(
+        "--profile-cpu",
+        action="store_true",
+        help="Also run cProfile and list the top functions (implies --profile)",
+    )
+    parser.add_argument(
+        "--profile-memory",
+        action="store_true",
+        help="Also trace allocations with tracemalloc (implies --profile)",
+    )
+    parser.add_argument(
+        "--profile-output",
+        type=Path,
+        default=PROFILE_TXT,
+        help="Profile report path (default: .tmp/profile.txt)",
+    )
+
+
+def start_profiler(args: argparse.Namespace, title: str) -> Profiler | None:
+    if not (args.profile or args.profile_cpu or args.profile_memory):
+        return None
+    profiler = Profiler(title, cpu=args.profile_cpu, memory=args.profile_memory)
+    profiler.start()
+    return profiler
+
+
+def finish_profiler(profiler: Profiler | None, path: Path) -> None:
+    if profiler is None:
+        return
+    profiler.stop()
+    print(profiler.write(path))
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""Golden checks for the feed pipeline; exits non-zero when one fails.
+
+ordering
+    The heap-based top-K selection (feed_entries) and the single-pass router
+    (route_feeds) must pick the same entries, in the same order, as a full
+    sort of every matching entry, for every configured feed and limit. The
+    dataset is checked as is and with every Nth release date blanked, so the
+    remembered-pubDate fallback is ordered too.
+
+incremental
+    A feed updated with --incremental must be byte-identical to a fresh
+    render of the same selection. The check replays the sequence that used
+    to break it: a patch already in the feed changes (its Products) without
+    anything new, so the feed is skipped; then a new patch arrives and the
+    feed is merged into the file written before the change. It repeats the
+    merge after the file was edited behind the generator's back.
+
+pruning
+    The fragment cache must only hold fragments of items that are in a feed.
+    The check replays the workflow's sequence: every feed is built, then the
+    security feed alone (build_all.py --only), then the other feeds while the
+    security feed is a cache hit. Fragments of items that left a feed in
+    between must be gone, and those of the skipped feed must be kept.
+
+Unlike the bench.py timings these only report mismatches, so CI can run them
+on every dataset refresh.
+
+Examples:
+    python3 scripts/check_feeds.py
+    python3 scripts/check_feeds.py ordering --source .tmp/patches-100k.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import json
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Mapping
+
+import generate_rss
+from feed_ledger import FeedLedger
+from fragment_cache import FragmentCache
+from patch_dataset import PATCHES_JSON, PatchEntry, guid_digest, load_dataset
+from xml_stream import read_output
+
+BLANK_DATES_EVERY = 7
+DEFAULT_LIMITS = [1, 50, 1000, 0]
+
+
+def legacy_feed_entries(
+    entries: list[PatchEntry],
+    mode: str,
+    limit: int,
+    existing_pub_dates: Mapping[str, datetime],
+    dataset_lastmod: datetime | None,
+) -> list[PatchEntry]:
+    """The original selection: sort every matching entry, keep the first limit."""
+    filtered = list(generate_rss.entries_for_mode(entries, mode, dataset_lastmod))
+    filtered.sort(
+        key=lambda entry: (
+            -entry.release_ordinal,
+            -generate_rss.effective_entry_pub_date(
+                entry, existing_pub_dates, dataset_lastmod
+            ).timestamp(),
+            entry.name.lower(),
+            entry.qfe_id.lower(),
+            entry.version.lower(),
+        )
+    )
+    return filtered[: limit or None]
+
+
+def blank_dates(entries: list[PatchEntry], every: int) -> list[PatchEntry]:
+    return [
+        dataclasses.replace(
+            entry, release_date_text="", release_date_iso="", release_ordinal=-1
+        )
+        if i % every == 0
+        else entry
+        for i, entry in enumerate(entries)
+    ]
+
+
+def check_ordering(source: Path, limits: list[int]) -> list[str]:
+    dataset = load_dataset(source)
+    lastmod = dataset.lastmod or generate_rss.EPOCH
+    feeds = list(generate_rss.FEED_CONFIG.feeds)
+    failures = []
+    undated = blank_dates(dataset.entries, BLANK_DATES_EVERY)
+    for label, entries in (
+        ("dataset", dataset.entries),
+        (f"every {BLANK_DATES_EVERY}th date blank", undated),
+    ):
+        # Give a slice of undated entries a remembered pubDate.
+        existing = {
+            generate_rss.entry_guid(entry): lastmod.replace(year=lastmod.year - 1)
+            for entry in entries[::11]
+            if not entry.release_date_iso
+        }
+        for limit in limits:
+            expected = {
+                feed.id: [
+                    e.key
+                    for e in legacy_feed_entries(
+                        entries, feed.id, limit, existing, lastmod
+                    )
+                ]
+                for feed in feeds
+            }
+            routed = generate_rss.route_feeds(
+                entries, feeds, {feed.id: limit for feed in feeds}, existing, lastmod
+            )
+            for feed in feeds:
+                selected = generate_rss.feed_entries(
+                    entries, feed.id, limit, existing, lastmod
+                )
+                for how, got in (
+                    ("feed_entries", selected),
+                    ("route_feeds", routed[feed.id]),
+                ):
+                    if [e.key for e in got] != expected[feed.id]:
+                        failures.append(
+                            f"{label}: {how} {feed.id} limit {limit} differs "
+                            "from the full sort"
+                        )
+    print(
+        f"ordering: {len(dataset.entries)} entries, {len(feeds)} feeds, "
+        f"limits {', '.join(map(str, limits))}"
+    )
+    return failures
+
+
+def check_incremental(source: Path, limit: int = 50) -> list[str]:
+    dataset = load_dataset(source)
+    lastmod = dataset.lastmod
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp = Path(tmp_dir)
+        output = tmp / "rss.xml"
+        ledger = FeedLedger(tmp / "feed-ledger.json")
+        fragments = FragmentCache(
+            generate_rss.RSS_ITEM_TEMPLATE_VERSION, tmp / "rss-fragments.json"
+        )
+
+        def write(entries: list[PatchEntry], force: bool = False) -> str:
+            return generate_rss.maybe_write_feed(
+                current_entries=entries,
+                previous_entries=[],
+                output_path=output,
+                mode="all",
+                limit=limit,
+                dataset_lastmod=lastmod,
+                force=force,
+                ledger=ledger,
+                incremental=True,
+                fragments=fragments,
+                formats=(),
+            )
+
+        def compare(entries: list[PatchEntry], step: str) -> None:
+            selected = generate_rss.top_feed_entries(entries, limit, ledger, lastmod)
+            fresh = generate_rss.build_rss_xml(selected, "all", lastmod, ledger)
+            if read_output(output) != fresh:
+                failures.append(f"{step}: differs from a fresh render")
+
+        write(dataset.entries, force=True)
+        selected = generate_rss.top_feed_entries(
+            dataset.entries, limit, ledger, lastmod
+        )
+        if len(selected) < 2:
+            return [f"needs a feed of at least 2 items, got {len(selected)}"]
+        changed = selected[len(selected) // 2]
+        edited = [
+            dataclasses.replace(
+                entry, products_tokens=(*entry.products_tokens, "Changed Product")
+            )
+            if entry is changed
+            else entry
+            for entry in dataset.entries
+        ]
+        if not write(edited).startswith("Skipped"):
+            failures.append("changed patch: expected the feed to be skipped")
+
+        newest = selected[0]
+        added = [
+            *edited,
+            dataclasses.replace(
+                newest, qfe_id=f"{newest.qfe_id}-CHECK", name=f"{newest.name} check"
+            ),
+        ]
+        write(added)
+        compare(added, "skip then merge")
+
+        # A file that is not what the generator last wrote is never trusted.
+        output.write_text(
+            read_output(output).replace(changed.name, "Edited by hand"),
+            encoding="utf-8",
+        )
+        again = [
+            *added,
+            dataclasses.replace(newest, qfe_id=f"{newest.qfe_id}-CHECK2"),
+        ]
+        write(again)
+        compare(again, "merge into an edited file")
+    print(f"incremental: feed of {limit} items from {len(dataset.entries)} entries")
+    return failures
+
+
+def check_pruning(source: Path, limit: int = 20) -> list[str]:
+    dataset = load_dataset(source)
+    lastmod = dataset.lastmod
+    modes = [feed.id for feed in generate_rss.FEED_CONFIG.feeds]
+    only = modes[-1]
+    # The newest patches arrive after the first build and push older ones out.
+    newest = {
+        entry.key
+        for entry in generate_rss.feed_entries(dataset.entries, "all", limit, {}, None)
+    }
+    older = [entry for entry in dataset.entries if entry.key not in newest]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp = Path(tmp_dir)
+        ledger = FeedLedger(tmp / "feed-ledger.json")
+
+        def build(entries: list[PatchEntry], built: list[str]) -> None:
+            fragments = FragmentCache(
+                generate_rss.RSS_ITEM_TEMPLATE_VERSION, tmp / "rss-fragments.json"
+            )
+            ran = set()
+            for mode in built:
+                generate_rss.maybe_write_feed(
+                    current_entries=entries,
+                    previous_entries=[],
+                    output_path=tmp / f"{mode}.xml",
+                    mode=mode,
+                    limit=limit,
+                    dataset_lastmod=lastmod,
+                    force=True,
+                    ledger=ledger,
+                    incremental=True,
+                    fragments=fragments,
+                    selected=generate_rss.feed_entries(
+                        entries, mode, limit, ledger, lastmod
+                    ),
+                    formats=(),
+                )
+                ran.add(generate_rss.feed_step(mode))
+            fragments.keep_recorded(
+                lambda mode: generate_rss.feed_step(mode) not in ran
+            )
+            fragments.save()
+
+        build(older, modes)
+        build(dataset.entries, [only])
+        build(dataset.entries, [mode for mode in modes if mode != only])
+        expected = {
+            guid_digest(generate_rss.entry_guid(entry))
+            for mode in modes
+            for entry in generate_rss.feed_entries(
+                dataset.entries, mode, limit, ledger, lastmod
+            )
+        }
+        raw = json.loads((tmp / "rss-fragments.json").read_text(encoding="utf-8"))
+        cached = set(raw["fragments"])
+    print(f"pruning: {len(modes)} feeds of {limit} items, {only} built alone")
+    failures = []
+    if cached - expected:
+        failures.append(f"{len(cached - expected)} stale fragment(s) kept")
+    if expected - cached:
+        failures.append(f"{len(expected - cached)} fragment(s) of current items lost")
+    return failures
+
+
+CHECKS: dict[str, Callable[[argparse.Namespace], list[str]]] = {
+    "ordering": lambda args: check_ordering(args.source, args.limit or DEFAULT_LIMITS),
+    "incremental": lambda args: check_incremental(args.source),
+    "pruning": lambda args: check_pruning(args.source),
+}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "checks",
+        nargs="*",
+        help=f"Checks to run (default: all of {', '.join(CHECKS)})",
+    )
+    parser.add_argument(
+        "--source", type=Path, default=PATCHES_JSON, help="patches.json to check on"
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        action="append",
+        help="Feed limit for the ordering check (repeatable, default: 1, 50, 1000, 0)",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    unknown = [name for name in args.checks if name not in CHECKS]
+    if unknown:
+        raise SystemExit(f"Unknown check(s): {', '.join(unknown)}")
+    failures = []
+    for name in args.checks or CHECKS:
+        failures.extend(f"{name}: {line}" for line in CHECKS[name](args))
+    if failures:
+        print("\n".join(failures))
+        raise SystemExit(f"{len(failures)} check(s) failed")
+    print("All checks passed")
+
+
+if __name__ == "__main__":
+    main()
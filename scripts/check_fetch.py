@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""End-to-end check of fetch_patches.py against a local http.server.
+
+A copy of patches.json is served from a temporary directory and refreshed
+into a second one, the way the workflow refreshes the real dataset:
+
+200
+    The first refresh downloads the file byte for byte and records its
+    SHA-256, size, ETag and Last-Modified in the meta.
+304
+    The next refresh sends the stored ETag as If-None-Match and gets a 304
+    although the served file's mtime moved (so If-Modified-Since alone would
+    not match); only checked_at_utc moves.
+aborted transfer
+    A server that closes the connection halfway through the body makes the
+    refresh exit with an error and leaves patches.json, its meta and the
+    directory exactly as they were.
+
+Exits non-zero when a check fails. No network access is needed.
+
+Examples:
+    python3 scripts/check_fetch.py
+    python3 scripts/check_fetch.py --source .tmp/patches-100k.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import http.server
+import os
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+from functools import partial
+from pathlib import Path
+from typing import Iterator
+
+from fetch_patches import refresh
+from patch_dataset import PATCHES_JSON, read_meta
+
+ABORTED_PATH = "/aborted.json"
+
+
+class Handler(http.server.SimpleHTTPRequestHandler):
+    """Serves patches.json with a SHA-256 ETag, like the upstream server.
+
+    A matching If-None-Match gets a 304 before Last-Modified is looked at;
+    every If-None-Match received is kept in server.if_none_match.
+    ABORTED_PATH sends half of patches.json only.
+    """
+
+    etag = ""
+
+    def do_GET(self) -> None:
+        body = Path(self.directory, "patches.json").read_bytes()
+        if self.path != ABORTED_PATH:
+            self.etag = f'"{hashlib.sha256(body).hexdigest()}"'
+            if_none_match = self.headers.get("If-None-Match")
+            self.server.if_none_match.append(if_none_match)
+            if if_none_match == self.etag:
+                self.send_response(304)
+                self.end_headers()
+            else:
+                super().do_GET()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body[: len(body) // 2])
+        self.close_connection = True
+
+    def end_headers(self) -> None:
+        if self.etag:
+            self.send_header("ETag", self.etag)
+        super().end_headers()
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+@contextmanager
+def serve(directory: Path) -> Iterator[http.server.ThreadingHTTPServer]:
+    server = http.server.ThreadingHTTPServer(
+        ("127.0.0.1", 0), partial(Handler, directory=str(directory))
+    )
+    server.if_none_match = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def snapshot(directory: Path) -> dict[str, bytes]:
+    return {path.name: path.read_bytes() for path in sorted(directory.iterdir())}
+
+
+def check_fetch(source: Path) -> list[str]:
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        served = Path(tmp_dir, "served")
+        local = Path(tmp_dir, "local")
+        served.mkdir()
+        local.mkdir()
+        shutil.copyfile(source, served / "patches.json")
+        output = local / "patches.json"
+        meta_path = local / "patches.meta.json"
+        with serve(served) as server:
+            base = f"http://127.0.0.1:{server.server_port}"
+            url = f"{base}/patches.json"
+
+            messages = refresh(url, output, meta_path, None, 10)
+            meta = read_meta(meta_path)
+            body = (served / "patches.json").read_bytes()
+            if messages[0] != f"Wrote: {output}":
+                failures.append(f"200: unexpected result {messages[0]!r}")
+            if not output.exists() or output.read_bytes() != body:
+                failures.append("200: patches.json differs from the served file")
+            if meta.get("patches_sha256") != hashlib.sha256(body).hexdigest():
+                failures.append("200: wrong patches_sha256 in the meta")
+            if meta.get("bytes") != len(body) or not meta.get("last_modified"):
+                failures.append("200: meta lacks the size or Last-Modified")
+            etag = f'"{hashlib.sha256(body).hexdigest()}"'
+            if meta.get("etag") != etag:
+                failures.append(f"200: meta etag {meta.get('etag')!r}, not {etag!r}")
+
+            # Same bytes, newer mtime: only the ETag can still answer 304.
+            stat = (served / "patches.json").stat()
+            os.utime(served / "patches.json", (stat.st_atime, stat.st_mtime + 3600))
+            before = read_meta(meta_path)
+            messages = refresh(url, output, meta_path, None, 10)
+            meta = read_meta(meta_path)
+            if server.if_none_match[-1] != etag:
+                failures.append(
+                    f"304: sent If-None-Match {server.if_none_match[-1]!r}, "
+                    f"not {etag!r}"
+                )
+            if not messages[0].startswith("Dataset not modified (304)"):
+                failures.append(f"304: unexpected result {messages[0]!r}")
+            if {k: v for k, v in meta.items() if k != "checked_at_utc"} != {
+                k: v for k, v in before.items() if k != "checked_at_utc"
+            }:
+                failures.append("304: meta changed beyond checked_at_utc")
+
+            before = snapshot(local)
+            try:
+                refresh(f"{base}{ABORTED_PATH}", output, meta_path, None, 10)
+            except SystemExit as error:
+                if not str(error).startswith("Error: GET"):
+                    failures.append(f"aborted transfer: unexpected exit {error}")
+            else:
+                failures.append("aborted transfer: the refresh did not fail")
+            if snapshot(local) != before:
+                failures.append("aborted transfer: the local directory changed")
+    print(f"fetch: {source.stat().st_size} bytes served from {source.name}")
+    return failures
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--source", type=Path, default=PATCHES_JSON, help="patches.json to serve"
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    failures = check_fetch(args.source)
+    if failures:
+        print("\n".join(failures))
+        raise SystemExit(f"{len(failures)} check(s) failed")
+    print("All checks passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""Per-product, per-version and per-platform RSS feeds.
+
+One pass over the entries builds an inverted index (facet value id -> entries)
+from the ids the dataset Catalog already assigns. Each facet feed then selects
+its newest items from its own posting list, so the total work is proportional
+to the number of (entry, facet value) pairs rather than entries x feeds.
+Rendering goes through the shared ledger and fragment cache like the main
+feeds, and feeds without new patches are skipped.
+
+Outputs:
+- feeds/product/<slug>.xml, feeds/version/<slug>.xml, feeds/platform/<slug>.xml,
+  each with <slug>.atom.xml and <slug>.json alternates
+- feeds/index.json listing every facet feed
+
+A feed's slug is its facet value slugified. Distinct values can slugify
+alike ("GeoEvent"/"Geoevent"); a value whose slug is taken gets a suffix
+from the hash of the value instead. Slugs already published in
+feeds/index.json are kept, so a new value never moves an existing feed to
+another URL.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import quote
+
+from feed_formats import FEED_WRITERS
+from feed_ledger import FeedLedger
+from fragment_cache import FragmentCache
+from generate_rss import maybe_write_feed
+from patch_dataset import (
+    BASE_URL,
+    ROOT,
+    Catalog,
+    PatchEntry,
+    StringTable,
+    slugify_patch_name,
+    write_text_lf,
+)
+
+FACETS_DIR = ROOT / "feeds"
+FACET_INDEX_JSON = FACETS_DIR / "index.json"
+# Facet name -> app.js URL filter parameter.
+FACET_PARAMS = {"product": "p", "version": "v", "platform": "os"}
+
+
+@dataclass(frozen=True)
+class FacetFeed:
+    facet: str
+    value: str
+    slug: str
+
+    @property
+    def mode(self) -> str:
+        return f"{self.facet}:{self.slug}"
+
+    @property
+    def relative_path(self) -> str:
+        return f"feeds/{self.facet}/{self.slug}.xml"
+
+    @property
+    def path(self) -> Path:
+        return ROOT / self.relative_path
+
+    @property
+    def channel(self) -> tuple[str, str, str, str]:
+        if self.facet == "version":
+            title = f"Simple Patch Finder - Version {self.value} RSS"
+            description = f"Latest patches for version {self.value} from Simple Patch Finder."
+        elif self.facet == "platform":
+            title = f"Simple Patch Finder - {self.value} platform RSS"
+            description = f"Latest {self.value} platform patches from Simple Patch Finder."
+        else:
+            title = f"Simple Patch Finder - {self.value} RSS"
+            description = f"Latest {self.value} patches from Simple Patch Finder."
+        param = FACET_PARAMS[self.facet]
+        site_link = f"{BASE_URL}?{param}={quote(slugify_patch_name(self.value), safe='')}"
+        return title, description, site_link, f"{BASE_URL}{self.relative_path}"
+
+
+def facet_postings(entries: list[PatchEntry]) -> dict[str, dict[int, list[PatchEntry]]]:
+    """Inverted index: facet -> value id -> entries, built in one pass."""
+    products: dict[int, list[PatchEntry]] = {}
+    versions: dict[int, list[PatchEntry]] = {}
+    platforms: dict[int, list[PatchEntry]] = {}
+    for entry in entries:
+        for product_id in entry.product_ids:
+            products.setdefault(product_id, []).append(entry)
+        versions.setdefault(entry.version_id, []).append(entry)
+        for platform_id in entry.platform_ids:
+            platforms.setdefault(platform_id, []).append(entry)
+    return {"product": products, "version": versions, "platform": platforms}
+
+
+def published_slugs(path: Path = FACET_INDEX_JSON) -> dict[tuple[str, str], str]:
+    """(facet, value) -> slug of every facet feed listed in the index."""
+    try:
+        raw = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    out = {}
+    for feed in raw.get("feeds", []) if isinstance(raw, dict) else []:
+        try:
+            out[(feed["facet"], feed["value"])] = Path(feed["path"]).stem
+        except (KeyError, TypeError):
+            continue
+    return out
+
+
+def facet_feeds(
+    catalog: Catalog,
+    postings: dict[str, dict[int, list[PatchEntry]]],
+    published: dict[tuple[str, str], str] | None = None,
+) -> list[tuple[FacetFeed, list[PatchEntry]]]:
+    """Every facet feed and its entries; published defaults to the index."""
+    if published is None:
+        published = published_slugs()
+    tables: dict[str, StringTable] = {
+        "product": catalog.products,
+        "version": catalog.versions,
+        "platform": catalog.platforms,
+    }
+    out = []
+    for facet, by_id in postings.items():
+        table = tables[facet]
+        values = sorted((table.decode(i), i) for i in by_id)
+        used_slugs = {
+            published[(facet, value)]
+            for value, _ in values
+            if (facet, value) in published
+        }
+        for value, value_id in values:
+            slug = published.get((facet, value))
+            if slug is None:
+                slug = slugify_patch_name(value)
+                if not slug:
+                    continue
+                if slug in used_slugs:
+                    digest = hashlib.sha256(value.encode("utf-8")).hexdigest()
+                    slug = f"{slug}-{digest[:8]}"
+                used_slugs.add(slug)
+            out.append((FacetFeed(facet, value, slug), by_id[value_id]))
+    return out
+
+
+def write_facet_feed(
+    feed: FacetFeed,
+    posting: list[PatchEntry],
+    previous_entries: list[PatchEntry],
+    limit: int,
+    dataset_lastmod: datetime | None,
+    force: bool,
+    ledger: FeedLedger,
+    incremental: bool = False,
+    fragments: FragmentCache | None = None,
+) -> bool:
+    """Write one facet feed; True when it was (re)written."""
+    feed.path.parent.mkdir(parents=True, exist_ok=True)
+    message = maybe_write_feed(
+        current_entries=posting,
+        previous_entries=previous_entries,
+        output_path=feed.path,
+        mode=feed.mode,
+        limit=limit,
+        dataset_lastmod=dataset_lastmod,
+        force=force,
+        ledger=ledger,
+        incremental=incremental,
+        fragments=fragments,
+        channel=feed.channel,
+    )
+    return message.startswith("Wrote ")
+
+
+def write_facet_index(
+    feeds: list[tuple[FacetFeed, list[PatchEntry]]], written: int
+) -> str:
+    index = []
+    for feed, posting in feeds:
+        title, _, _, url = feed.channel
+        index.append(
+            {
+                "facet": feed.facet,
+                "value": feed.value,
+                "title": title,
+                "path": feed.relative_path,
+                "url": url,
+                **{writer.name: writer.output_url(url) for writer in FEED_WRITERS},
+                "patches": len(posting),
+            }
+        )
+
+    FACETS_DIR.mkdir(parents=True, exist_ok=True)
+    write_text_lf(
+        FACET_INDEX_JSON,
+        json.dumps({"feeds": index}, indent=2, ensure_ascii=False) + "\n",
+    )
+    return (
+        f"Facet feeds: {len(feeds)} feeds ({written} written, "
+        f"{len(feeds) - written} skipped); wrote {FACET_INDEX_JSON.relative_to(ROOT)}"
+    )
+
+
+def write_facet_feeds(
+    entries: list[PatchEntry],
+    catalog: Catalog,
+    previous_entries: list[PatchEntry],
+    limit: int,
+    dataset_lastmod: datetime | None,
+    force: bool,
+    ledger: FeedLedger,
+    incremental: bool = False,
+    fragments: FragmentCache | None = None,
+) -> str:
+    feeds = facet_feeds(catalog, facet_postings(entries))
+    written = sum(
+        write_facet_feed(
+            feed,
+            posting,
+            previous_entries,
+            limit,
+            dataset_lastmod,
+            force,
+            ledger,
+            incremental,
+            fragments,
+        )
+        for feed, posting in feeds
+    )
+    return write_facet_index(feeds, written)
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""Paged, immutable RSS archives for the configured feeds (RFC 5005).
+
+A feed with ``archive_page_size`` in scripts/feeds.json is split into its
+head document (the feed itself) and numbered archive pages in an archive/
+directory next to it: rss.xml -> archive/rss-1.xml, archive/rss-2.xml, ...
+Page 1 holds the oldest items.
+
+Items of the feed outside the head's newest-N selection (typically the ones
+that just dropped out of it) stay queued in the head until a full page of
+them has built up; they are then sealed into the next archive page, so the
+head holds between limit and limit + archive_page_size - 1 items. Every
+item of a feed is therefore either in the head or in an archive page. The
+first run of a feed backfills its whole history, the oldest page taking the
+remainder.
+
+Sealed pages are written once and never change, so they can be cached
+forever. They carry <fh:archive/>, a "current" link to the head and a
+"prev-archive" link to the page before. A page only gets a "next-archive"
+link when the following page is sealed in the same run (a sealed page is
+never edited to add it later). The head links its newest page with
+"prev-archive", so readers walk the archive backwards from the subscription.
+
+State lives in .build/feed-archives.json: per feed, the GUID digests of each
+sealed page and of the items currently queued in the head.
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from patch_dataset import BUILD_DIR, GUID_PREFIX, guid_digest, write_text_lf
+
+FEED_ARCHIVES_JSON = BUILD_DIR / "feed-archives.json"
+ARCHIVE_VERSION = 1
+ARCHIVE_DIR = "archive"
+HISTORY_NAMESPACE = "http://purl.org/syndication/history/1.0"
+
+
+def archive_page_name(feed_name: str, page: int) -> str:
+    """rss.xml -> archive/rss-3.xml (a .gz suffix is kept)."""
+    gz = ".gz" if feed_name.endswith(".gz") else ""
+    stem = feed_name.removesuffix(gz)
+    stem, dot, extension = stem.rpartition(".")
+    if not dot:
+        stem, extension = extension, "xml"
+    return f"{ARCHIVE_DIR}/{stem}-{page}.{extension}{gz}"
+
+
+def archive_page_path(feed_path: Path, page: int) -> Path:
+    return feed_path.parent / archive_page_name(feed_path.name, page)
+
+
+def archive_page_url(feed_url: str, page: int) -> str:
+    base, _, name = feed_url.rpartition("/")
+    return f"{base}/{archive_page_name(name, page)}"
+
+
+def split_pages(count: int, page_size: int, backfill: bool) -> list[int]:
+    """Sizes of the pages to seal from count overflow items, oldest first.
+
+    Normally only full pages are sealed and the rest stays queued; a backfill
+    seals everything, the oldest page taking the remainder.
+    """
+    if page_size <= 0:
+        return []
+    full, rest = divmod(count, page_size)
+    sizes = [page_size] * full
+    if backfill and rest:
+        sizes.insert(0, rest)
+    return sizes
+
+
+class FeedArchive:
+    """Sealed pages and queued head items of one feed."""
+
+    __slots__ = ("pages", "queue")
+
+    def __init__(self, pages: list[list[str]], queue: list[str]) -> None:
+        self.pages = pages
+        self.queue = queue
+
+    @property
+    def page_count(self) -> int:
+        return len(self.pages)
+
+    def queued(self) -> set[str]:
+        return {GUID_PREFIX + digest for digest in self.queue}
+
+    def sealed(self) -> set[str]:
+        return {GUID_PREFIX + digest for page in self.pages for digest in page}
+
+
+class FeedArchives:
+    def __init__(self, path: Path = FEED_ARCHIVES_JSON) -> None:
+        self.path = path
+        self.feeds: dict[str, FeedArchive] = {}
+        self.dirty = False
+        # Feeds updated while journaling, to replay them in another process.
+        self.journal: set[str] | None = None
+        try:
+            raw = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            raw = {}
+        feeds = raw.get("feeds") if isinstance(raw, dict) else None
+        if isinstance(feeds, dict) and raw.get("version") == ARCHIVE_VERSION:
+            for mode, state in feeds.items():
+                if isinstance(state, dict):
+                    self.feeds[mode] = FeedArchive(
+                        [list(page) for page in state.get("pages") or []],
+                        list(state.get("queue") or []),
+                    )
+
+    def get(self, mode: str) -> FeedArchive | None:
+        """Archive state of mode, or None before its first (backfill) run."""
+        return self.feeds.get(mode)
+
+    def update(
+        self, mode: str, sealed: list[list[str]], queue: list[str]
+    ) -> FeedArchive:
+        """Append newly sealed pages (GUID lists) and replace the head queue."""
+        archive = self.feeds.get(mode)
+        if archive is None:
+            archive = self.feeds[mode] = FeedArchive([], [])
+            self.dirty = True
+        archive.pages.extend([guid_digest(guid) for guid in page] for page in sealed)
+        digests = [guid_digest(guid) for guid in queue]
+        if sealed or digests != archive.queue:
+            archive.queue = digests
+            self.dirty = True
+        if self.journal is not None:
+            self.journal.add(mode)
+        return archive
+
+    def start_journal(self) -> None:
+        self.journal = set()
+
+    def take_journal(self) -> dict[str, tuple[list[list[str]], list[str]]]:
+        modes, self.journal = self.journal or set(), None
+        return {
+            mode: (self.feeds[mode].pages, self.feeds[mode].queue) for mode in modes
+        }
+
+    def apply_journal(
+        self, journal: dict[str, tuple[list[list[str]], list[str]]]
+    ) -> None:
+        for mode, (pages, queue) in journal.items():
+            self.feeds[mode] = FeedArchive(pages, queue)
+            self.dirty = True
+
+    def save(self) -> None:
+        if not self.dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "version": ARCHIVE_VERSION,
+            "feeds": {
+                mode: {"pages": archive.pages, "queue": archive.queue}
+                for mode, archive in self.feeds.items()
+            },
+        }
+        write_text_lf(
+            self.path,
+            json.dumps(payload, separators=(",", ":"), sort_keys=True) + "\n",
+        )
+        self.dirty = False
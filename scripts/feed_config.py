@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""Declarative feed definitions (scripts/feeds.json).
+
+Each feed names an output path (``.gz`` writes it gzip-compressed), channel
+title/description, an optional item limit (0 keeps the full archive) and an
+optional ``archive_page_size`` for paged archives (see feed_archive.py; the
+feed then holds up to ``limit + archive_page_size - 1`` items), plus a filter
+over the normalized patch entries:
+
+- ``products``: exact product tokens, any of which must appear
+- ``families``: named product families from the ``families`` section
+  (``products`` and ``families`` together form one any-of condition)
+- ``versions`` and ``platforms``: any-of sets of exact tokens
+- ``criticality``: any of ``security``, ``critical``, ``standard``
+- ``released_from`` / ``released_to``: inclusive ISO release-date window
+- ``max_age_days``: released at most N days before the dataset update
+
+Filters are combined with AND; an empty filter matches every patch. Undated
+patches never match a date window. Each family gets a bit in declaration order
+(see taxonomy.py), so family conditions test the precomputed
+``PatchEntry.family_mask``. Each definition is compiled once into a matcher of
+bitwise, set-membership and integer comparisons, and ``FeedIndex`` looks up
+the feeds of an entry from its attributes, so one pass over the dataset routes
+every feed.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Iterable, Mapping, Optional
+
+from patch_dataset import BASE_URL, ROOT, PatchEntry
+
+FEEDS_JSON = Path(__file__).resolve().parent / "feeds.json"
+CRITICALITY_KINDS = ("security", "critical", "standard")
+# Family masks are also evaluated with 32-bit integer ops in js/app.js.
+MAX_FAMILIES = 31
+FILTER_KEYS = {
+    "products",
+    "families",
+    "versions",
+    "platforms",
+    "criticality",
+    "released_from",
+    "released_to",
+    "max_age_days",
+}
+
+Matcher = Callable[[PatchEntry], bool]
+# Feed id and the residual matcher left after FeedIndex dispatch.
+FeedMatch = tuple[str, Optional[Matcher]]
+
+
+@dataclass(frozen=True)
+class ProductFamily:
+    name: str
+    label: str
+    products: frozenset[str]
+    bit: int
+
+
+@dataclass(frozen=True)
+class FeedFilter:
+    products: frozenset[str] = frozenset()
+    family_mask: int = 0
+    versions: frozenset[str] = frozenset()
+    platforms: frozenset[str] = frozenset()
+    criticality: frozenset[str] = frozenset()
+    released_from: date | None = None
+    released_to: date | None = None
+    max_age_days: int | None = None
+
+
+@dataclass(frozen=True)
+class FeedDefinition:
+    id: str
+    relative_path: str
+    title: str
+    description: str
+    link: str = BASE_URL
+    limit: int | None = None
+    # Items per sealed archive page (see feed_archive.py); 0 keeps no archive.
+    archive_page_size: int = 0
+    filter: FeedFilter = field(default_factory=FeedFilter)
+
+    @property
+    def path(self) -> Path:
+        return ROOT / self.relative_path
+
+    @property
+    def channel(self) -> tuple[str, str, str, str]:
+        return self.title, self.description, self.link, f"{BASE_URL}{self.relative_path}"
+
+
+@dataclass(frozen=True)
+class FeedConfig:
+    families: dict[str, ProductFamily]
+    feeds: tuple[FeedDefinition, ...]
+
+    def feed(self, feed_id: str) -> FeedDefinition | None:
+        for feed in self.feeds:
+            if feed.id == feed_id:
+                return feed
+        return None
+
+
+def _string_set(value: object, where: str) -> frozenset[str]:
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+        raise ValueError(f"{where} must be a string or a list of strings")
+    return frozenset(v.strip() for v in value if v.strip())
+
+
+def _iso_date(value: object, where: str) -> date | None:
+    if value is None:
+        return None
+    try:
+        return date.fromisoformat(str(value))
+    except ValueError:
+        raise ValueError(f"{where} must be an ISO date (YYYY-MM-DD)") from None
+
+
+def _parse_filter(
+    raw: object, families: Mapping[str, ProductFamily], where: str
+) -> FeedFilter:
+    if raw is None:
+        return FeedFilter()
+    if not isinstance(raw, dict):
+        raise ValueError(f"{where} must be an object")
+    unknown = raw.keys() - FILTER_KEYS
+    if unknown:
+        raise ValueError(f"{where}: unknown keys {', '.join(sorted(unknown))}")
+
+    family_mask = 0
+    for name in _string_set(raw.get("families", []), f"{where}.families"):
+        family = families.get(name)
+        if family is None:
+            raise ValueError(f"{where}.families: unknown family {name!r}")
+        family_mask |= family.bit
+    criticality = _string_set(raw.get("criticality", []), f"{where}.criticality")
+    bad = criticality - set(CRITICALITY_KINDS)
+    if bad:
+        raise ValueError(
+            f"{where}.criticality: {', '.join(sorted(bad))} not in {', '.join(CRITICALITY_KINDS)}"
+        )
+    max_age_days = raw.get("max_age_days")
+    if max_age_days is not None and (
+        not isinstance(max_age_days, int) or max_age_days < 0
+    ):
+        raise ValueError(f"{where}.max_age_days must be a non-negative integer")
+
+    return FeedFilter(
+        products=_string_set(raw.get("products", []), f"{where}.products"),
+        family_mask=family_mask,
+        versions=_string_set(raw.get("versions", []), f"{where}.versions"),
+        platforms=_string_set(raw.get("platforms", []), f"{where}.platforms"),
+        criticality=criticality,
+        released_from=_iso_date(raw.get("released_from"), f"{where}.released_from"),
+        released_to=_iso_date(raw.get("released_to"), f"{where}.released_to"),
+        max_age_days=max_age_days,
+    )
+
+
+def load_feed_config(path: Path = FEEDS_JSON) -> FeedConfig:
+    try:
+        raw = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as exc:
+        raise ValueError(f"{path.name}: cannot read feed definitions: {exc}") from None
+    if not isinstance(raw, dict):
+        raise ValueError(f"{path.name}: expected an object")
+
+    families: dict[str, ProductFamily] = {}
+    raw_families = raw.get("families") or {}
+    if len(raw_families) > MAX_FAMILIES:
+        raise ValueError(f"{path.name}: at most {MAX_FAMILIES} families are supported")
+    for name, family in raw_families.items():
+        where = f"{path.name}: families.{name}"
+        if not isinstance(family, dict):
+            raise ValueError(f"{where} must be an object")
+        families[name] = ProductFamily(
+            name=name,
+            label=str(family.get("label") or name),
+            products=_string_set(family.get("products", []), f"{where}.products"),
+            bit=1 << len(families),
+        )
+
+    feeds: list[FeedDefinition] = []
+    seen_paths: set[str] = set()
+    for i, feed in enumerate(raw.get("feeds") or []):
+        where = f"{path.name}: feeds[{i}]"
+        if not isinstance(feed, dict):
+            raise ValueError(f"{where} must be an object")
+        feed_id = str(feed.get("id", "")).strip()
+        relative_path = str(feed.get("path", "")).strip().lstrip("/")
+        if not feed_id or not relative_path:
+            raise ValueError(f"{where} needs an id and a path")
+        if any(existing.id == feed_id for existing in feeds):
+            raise ValueError(f"{where}: duplicate feed id {feed_id!r}")
+        if relative_path in seen_paths:
+            raise ValueError(f"{where}: duplicate path {relative_path!r}")
+        seen_paths.add(relative_path)
+        limit = feed.get("limit")
+        if limit is not None and (not isinstance(limit, int) or limit < 0):
+            raise ValueError(f"{where}.limit must be a non-negative integer (0 = full archive)")
+        page_size = feed.get("archive_page_size", 0)
+        if not isinstance(page_size, int) or page_size < 0:
+            raise ValueError(f"{where}.archive_page_size must be a non-negative integer")
+        feeds.append(
+            FeedDefinition(
+                id=feed_id,
+                relative_path=relative_path,
+                title=str(feed.get("title") or f"Simple Patch Finder - {feed_id} RSS"),
+                description=str(feed.get("description") or ""),
+                link=str(feed.get("link") or BASE_URL),
+                limit=limit,
+                archive_page_size=page_size,
+                filter=_parse_filter(feed.get("filter"), families, f"{where}.filter"),
+            )
+        )
+    return FeedConfig(families=families, feeds=tuple(feeds))
+
+
+def reference_date(dataset_lastmod: datetime | None) -> date:
+    """Day that max_age_days counts back from: the dataset update, else today."""
+    return (dataset_lastmod or datetime.now(timezone.utc)).date()
+
+
+def index_dimension(feed_filter: FeedFilter) -> str:
+    """Attribute a feed is indexed on in FeedIndex ("" means every entry)."""
+    if feed_filter.versions:
+        return "version"
+    if feed_filter.family_mask and not feed_filter.products:
+        return "family"
+    if feed_filter.products and not feed_filter.family_mask:
+        return "product"
+    if feed_filter.platforms:
+        return "platform"
+    if feed_filter.criticality:
+        return "criticality"
+    return ""
+
+
+def compile_filter(
+    feed_filter: FeedFilter, today: date, indexed: str = ""
+) -> Matcher | None:
+    """Turn a filter into one predicate; None means the feed takes every entry.
+
+    indexed names a dimension (see index_dimension) already guaranteed by the
+    caller; its check is left out.
+    """
+    checks: list[Matcher] = []
+    products = feed_filter.products
+    family_mask = feed_filter.family_mask
+    versions = feed_filter.versions
+    platforms = feed_filter.platforms
+    criticality = feed_filter.criticality
+    if criticality and indexed != "criticality":
+        checks.append(lambda entry: entry.critical_kind in criticality)
+    if versions and indexed != "version":
+        checks.append(lambda entry: entry.version in versions)
+    if products and family_mask:
+        checks.append(
+            lambda entry: bool(entry.family_mask & family_mask)
+            or not products.isdisjoint(entry.products_tokens)
+        )
+    elif family_mask and indexed != "family":
+        checks.append(lambda entry: bool(entry.family_mask & family_mask))
+    elif products and indexed != "product":
+        checks.append(lambda entry: not products.isdisjoint(entry.products_tokens))
+    if platforms and indexed != "platform":
+        checks.append(lambda entry: not platforms.isdisjoint(entry.platform_tokens))
+
+    lowest = []
+    if feed_filter.released_from:
+        lowest.append(feed_filter.released_from.toordinal())
+    if feed_filter.max_age_days is not None:
+        lowest.append((today - timedelta(days=feed_filter.max_age_days)).toordinal())
+    # Undated entries carry release_ordinal -1, so a lower bound of 0 drops them.
+    low = max(lowest, default=0)
+    high = feed_filter.released_to.toordinal() if feed_filter.released_to else None
+    if lowest or high is not None:
+        if high is None:
+            checks.append(lambda entry: entry.release_ordinal >= low)
+        else:
+            checks.append(lambda entry: low <= entry.release_ordinal <= high)
+
+    if not checks:
+        return None
+    if len(checks) == 1:
+        return checks[0]
+    if len(checks) == 2:
+        first, second = checks
+        return lambda entry: first(entry) and second(entry)
+    return lambda entry: all(check(entry) for check in checks)
+
+
+class FeedIndex:
+    """Inverted index from entry attributes to the feeds an entry can join.
+
+    Each feed is registered under one dimension of its filter (a version, a
+    criticality, a family bit, a product or platform token, or every entry)
+    and keeps a residual matcher for the rest of its filter. Looking up an
+    entry only touches the feeds registered under its own attribute values,
+    so routing costs O(entries x matching feeds) rather than
+    O(entries x feeds). Lookups for shared token tuples and family masks are
+    memoized.
+    """
+
+    def __init__(self, feeds: Iterable[FeedDefinition], today: date) -> None:
+        self._always: list[FeedMatch] = []
+        self._by_version: dict[str, list[FeedMatch]] = {}
+        self._by_criticality: dict[str, list[FeedMatch]] = {}
+        self._by_product: dict[str, list[FeedMatch]] = {}
+        self._by_platform: dict[str, list[FeedMatch]] = {}
+        self._families: list[tuple[int, str, Matcher | None]] = []
+        self._family_cache: dict[int, list[FeedMatch]] = {0: []}
+        self._product_cache: dict[tuple[str, ...], list[FeedMatch]] = {}
+        self._platform_cache: dict[tuple[str, ...], list[FeedMatch]] = {}
+        self.feed_ids: list[str] = []
+
+        for feed in feeds:
+            self.feed_ids.append(feed.id)
+            dimension = index_dimension(feed.filter)
+            match = (feed.id, compile_filter(feed.filter, today, dimension))
+            if dimension == "version":
+                for version in feed.filter.versions:
+                    self._by_version.setdefault(version, []).append(match)
+            elif dimension == "criticality":
+                for kind in feed.filter.criticality:
+                    self._by_criticality.setdefault(kind, []).append(match)
+            elif dimension == "family":
+                self._families.append((feed.filter.family_mask, *match))
+            elif dimension == "product":
+                for token in feed.filter.products:
+                    self._by_product.setdefault(token, []).append(match)
+            elif dimension == "platform":
+                for token in feed.filter.platforms:
+                    self._by_platform.setdefault(token, []).append(match)
+            else:
+                self._always.append(match)
+
+    @staticmethod
+    def _token_candidates(
+        index: dict[str, list[FeedMatch]],
+        cache: dict[tuple[str, ...], list[FeedMatch]],
+        tokens: tuple[str, ...],
+    ) -> list[FeedMatch]:
+        found = cache.get(tokens)
+        if found is None:
+            # A feed listing several of the entry's tokens is still one match.
+            found = list({match: None for token in tokens for match in index.get(token, ())})
+            cache[tokens] = found
+        return found
+
+    def feeds_for(self, entry: PatchEntry) -> list[str]:
+        """Ids of the feeds whose filter matches entry."""
+        out = [feed_id for feed_id, matcher in self._always if matcher is None or matcher(entry)]
+        candidates = self._family_cache.get(entry.family_mask)
+        if candidates is None:
+            candidates = [
+                (feed_id, matcher)
+                for mask, feed_id, matcher in self._families
+                if entry.family_mask & mask
+            ]
+            self._family_cache[entry.family_mask] = candidates
+        for group in (
+            self._by_version.get(entry.version, ()),
+            self._by_criticality.get(entry.critical_kind, ()),
+            candidates,
+            self._token_candidates(
+                self._by_product, self._product_cache, entry.products_tokens
+            )
+            if self._by_product
+            else (),
+            self._token_candidates(
+                self._by_platform, self._platform_cache, entry.platform_tokens
+            )
+            if self._by_platform
+            else (),
+        ):
+            for feed_id, matcher in group:
+                if matcher is None or matcher(entry):
+                    out.append(feed_id)
+        return out
+
+
+def route_entries(
+    entries: Iterable[PatchEntry], index: FeedIndex
+) -> dict[str, list[PatchEntry]]:
+    """Every entry of each indexed feed, in input order, from one pass."""
+    routes: dict[str, list[PatchEntry]] = {feed_id: [] for feed_id in index.feed_ids}
+    for entry in entries:
+        for feed_id in index.feeds_for(entry):
+            routes[feed_id].append(entry)
+    return routes
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""Atom 1.0 and JSON Feed 1.1 renderings of the RSS feeds.
+
+generate_rss.py selects a feed's entries once and turns them into FeedItem
+records (GUID, title, links, description and the resolved pubDate). Every
+writer here streams those same items to its own file, so each extra format
+costs one write and no extra parsing or selection.
+
+Alternate files sit next to the RSS feed: rss.xml -> atom.xml / feed.json,
+rss-<name>.xml -> atom-<name>.xml / feed-<name>.json and any other
+<name>.xml -> <name>.atom.xml / <name>.json. Alternates of a gzipped feed
+(*.xml.gz) are gzipped too.
+"""
+
+from __future__ import annotations
+
+import json
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from html import escape
+from pathlib import Path
+from typing import Iterable, TextIO
+
+from xml_stream import open_output
+
+JSON_FEED_VERSION = "https://jsonfeed.org/version/1.1"
+FEED_AUTHOR = "Simple Patch Finder"
+
+
+@dataclass(frozen=True, slots=True)
+class FeedItem:
+    guid: str
+    title: str
+    link: str
+    description: str
+    published: datetime
+    external_url: str = ""
+    tags: tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class FeedMeta:
+    title: str
+    description: str
+    site_link: str
+    feed_url: str
+    updated: datetime
+
+
+def rfc3339(value: datetime) -> str:
+    return value.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+class FeedWriter(ABC):
+    """Streams one feed format: head, one chunk per item, tail."""
+
+    name = ""
+    media_type = ""
+    # File name stems: rss[-x].xml -> <prefix>[-x]<extension>, else <stem><suffix>.
+    prefix = ""
+    extension = ""
+    suffix = ""
+
+    def output_name(self, rss_name: str) -> str:
+        # A gzipped feed gets gzipped alternates.
+        gz = ".gz" if rss_name.endswith(".gz") else ""
+        stem = rss_name.removesuffix(gz)
+        stem = stem[:-4] if stem.endswith(".xml") else stem
+        if stem == "rss" or stem.startswith("rss-"):
+            return f"{self.prefix}{stem[3:]}{self.extension}{gz}"
+        return f"{stem}{self.suffix}{gz}"
+
+    def output_path(self, rss_path: Path) -> Path:
+        return rss_path.with_name(self.output_name(rss_path.name))
+
+    def output_url(self, rss_url: str) -> str:
+        base, _, name = rss_url.rpartition("/")
+        return f"{base}/{self.output_name(name)}"
+
+    def write(self, path: Path, meta: FeedMeta, items: Iterable[FeedItem]) -> None:
+        with open_output(path) as out:
+            self.write_head(out, meta)
+            for i, item in enumerate(items):
+                self.write_item(out, item, i)
+            self.write_tail(out)
+
+    @abstractmethod
+    def write_head(self, out: TextIO, meta: FeedMeta) -> None: ...
+
+    @abstractmethod
+    def write_item(self, out: TextIO, item: FeedItem, index: int) -> None: ...
+
+    @abstractmethod
+    def write_tail(self, out: TextIO) -> None: ...
+
+
+class AtomWriter(FeedWriter):
+    name = "atom"
+    media_type = "application/atom+xml"
+    prefix = "atom"
+    extension = ".xml"
+    suffix = ".atom.xml"
+
+    def write_head(self, out: TextIO, meta: FeedMeta) -> None:
+        out.write(
+            "\n".join(
+                [
+                    '<?xml version="1.0" encoding="UTF-8"?>',
+                    '<feed xmlns="http://www.w3.org/2005/Atom" xml:lang="en-us">',
+                    f"  <title>{escape(meta.title, quote=False)}</title>",
+                    f"  <subtitle>{escape(meta.description, quote=False)}</subtitle>",
+                    f'  <link href="{escape(meta.site_link)}" />',
+                    f'  <link href="{escape(meta.feed_url)}" rel="self" type="{self.media_type}" />',
+                    f"  <id>{escape(meta.feed_url, quote=False)}</id>",
+                    f"  <updated>{rfc3339(meta.updated)}</updated>",
+                    f"  <author><name>{FEED_AUTHOR}</name></author>",
+                    "",
+                ]
+            )
+        )
+
+    def write_item(self, out: TextIO, item: FeedItem, index: int) -> None:
+        published = rfc3339(item.published)
+        lines = [
+            "  <entry>",
+            f"    <title>{escape(item.title, quote=False)}</title>",
+            f'    <link href="{escape(item.link)}" />',
+        ]
+        if item.external_url:
+            lines.append(f'    <link rel="related" href="{escape(item.external_url)}" />')
+        lines.extend(
+            [
+                f"    <id>{escape(item.guid, quote=False)}</id>",
+                f"    <published>{published}</published>",
+                f"    <updated>{published}</updated>",
+            ]
+        )
+        lines.extend(
+            f'    <category term="{escape(tag)}" />' for tag in item.tags
+        )
+        lines.extend(
+            [
+                f"    <summary>{escape(item.description, quote=False)}</summary>",
+                "  </entry>",
+                "",
+            ]
+        )
+        out.write("\n".join(lines))
+
+    def write_tail(self, out: TextIO) -> None:
+        out.write("</feed>\n")
+
+
+class JsonFeedWriter(FeedWriter):
+    name = "json"
+    media_type = "application/feed+json"
+    prefix = "feed"
+    extension = ".json"
+    suffix = ".json"
+
+    def write_head(self, out: TextIO, meta: FeedMeta) -> None:
+        head = {
+            "version": JSON_FEED_VERSION,
+            "title": meta.title,
+            "home_page_url": meta.site_link,
+            "feed_url": meta.feed_url,
+            "description": meta.description,
+            "language": "en-US",
+            "authors": [{"name": FEED_AUTHOR}],
+        }
+        # Stream the items array: write the head object without its closing brace.
+        body = json.dumps(head, indent=2, ensure_ascii=False)[:-2]
+        out.write(f'{body},\n  "items": [')
+
+    def write_item(self, out: TextIO, item: FeedItem, index: int) -> None:
+        obj = {
+            "id": item.guid,
+            "url": item.link,
+            "title": item.title,
+            "content_text": item.description,
+            "date_published": rfc3339(item.published),
+        }
+        if item.external_url:
+            obj["external_url"] = item.external_url
+        if item.tags:
+            obj["tags"] = list(item.tags)
+        separator = "\n" if index == 0 else ",\n"
+        out.write(f"{separator}    {json.dumps(obj, ensure_ascii=False)}")
+
+    def write_tail(self, out: TextIO) -> None:
+        out.write("\n  ]\n}\n")
+
+
+FEED_WRITERS: tuple[FeedWriter, ...] = (AtomWriter(), JsonFeedWriter())
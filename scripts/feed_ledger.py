@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""Persistent first-seen ledger for RSS items.
+
+The ledger maps each item GUID to the timestamp it was first published with
+and to the feeds (modes) it has appeared in. It replaces re-parsing the
+previously written rss*.xml on every run: the generators load it once, read
+pubDates and novelty from it, and save it once at the end.
+
+On disk (.build/feed-ledger.json) GUIDs are stored as their bare SHA-256 hex
+digest with ``[unix_seconds, mode_bitmask]``; bit N refers to ``modes[N]``.
+
+Feeds written before the ledger existed are imported from their XML exactly
+once (see ``import_feed``).
+"""
+
+from __future__ import annotations
+
+import json
+from collections.abc import Iterator, Mapping
+from datetime import datetime, timezone
+from pathlib import Path
+
+from patch_dataset import BUILD_DIR, GUID_PREFIX, guid_digest, write_text_lf
+
+FEED_LEDGER_JSON = BUILD_DIR / "feed-ledger.json"
+LEDGER_VERSION = 1
+
+
+class FeedLedger(Mapping):
+    """Read-only mapping of GUID -> first-seen datetime, plus mode membership."""
+
+    def __init__(self, path: Path = FEED_LEDGER_JSON) -> None:
+        self.path = path
+        self.modes: list[str] = []
+        self._mode_bits: dict[str, int] = {}
+        self.items: dict[str, list[int]] = {}
+        self.dirty = False
+        # (digest, mode, unix_seconds) of every change while journaling.
+        self.journal: list[tuple[str, str, int]] | None = None
+        try:
+            raw = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            raw = {}
+        if isinstance(raw, dict) and raw.get("version") == LEDGER_VERSION:
+            modes = raw.get("modes")
+            items = raw.get("items")
+            if isinstance(modes, list) and isinstance(items, dict):
+                self.modes = [str(mode) for mode in modes]
+                self.items = items
+        self._mode_bits = {mode: 1 << i for i, mode in enumerate(self.modes)}
+
+    def __getitem__(self, guid: str) -> datetime:
+        return datetime.fromtimestamp(self.items[guid_digest(guid)][0], tz=timezone.utc)
+
+    def __contains__(self, guid: object) -> bool:
+        return isinstance(guid, str) and guid_digest(guid) in self.items
+
+    def __iter__(self) -> Iterator[str]:
+        return (GUID_PREFIX + digest for digest in self.items)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def get(self, guid: str, default: datetime | None = None) -> datetime | None:
+        item = self.items.get(guid_digest(guid))
+        if item is None:
+            return default
+        return datetime.fromtimestamp(item[0], tz=timezone.utc)
+
+    def _mode_bit(self, mode: str) -> int:
+        bit = self._mode_bits.get(mode)
+        if bit is None:
+            bit = 1 << len(self.modes)
+            self.modes.append(mode)
+            self._mode_bits[mode] = bit
+            self.dirty = True
+        return bit
+
+    def has_mode(self, mode: str) -> bool:
+        """True once the ledger tracks mode (after a write or an XML import)."""
+        return mode in self._mode_bits
+
+    def is_new(self, guid: str, mode: str) -> bool:
+        item = self.items.get(guid_digest(guid))
+        bit = self._mode_bits.get(mode)
+        if item is None or bit is None:
+            return True
+        return not item[1] & bit
+
+    def record(self, guid: str, mode: str, published: datetime) -> None:
+        """Remember guid as part of mode; the first-seen timestamp never moves."""
+        self._record(guid_digest(guid), mode, int(published.timestamp()))
+
+    def _record(self, digest: str, mode: str, seconds: int) -> None:
+        bit = self._mode_bit(mode)
+        item = self.items.get(digest)
+        if item is None:
+            self.items[digest] = [seconds, bit]
+        elif not item[1] & bit:
+            item[1] |= bit
+        else:
+            return
+        self.dirty = True
+        if self.journal is not None:
+            self.journal.append((digest, mode, seconds))
+
+    def start_journal(self) -> None:
+        """Log changes from now on, to replay them in another process."""
+        self.journal = []
+
+    def take_journal(self) -> list[tuple[str, str, int]]:
+        journal, self.journal = self.journal or [], None
+        return journal
+
+    def apply_journal(self, journal: list[tuple[str, str, int]]) -> None:
+        for digest, mode, seconds in journal:
+            self._record(digest, mode, seconds)
+
+    def import_feed(self, mode: str, pub_dates: dict[str, datetime]) -> None:
+        """One-time migration from a feed written before the ledger existed."""
+        self._mode_bit(mode)
+        for guid, published in pub_dates.items():
+            self.record(guid, mode, published)
+
+    def save(self) -> None:
+        if not self.dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {"version": LEDGER_VERSION, "modes": self.modes, "items": self.items}
+        write_text_lf(
+            self.path,
+            json.dumps(payload, separators=(",", ":"), sort_keys=True) + "\n",
+        )
+        self.dirty = False
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""Refresh patches.json and patches.meta.json from the upstream feed.
+
+The upstream ETag and Last-Modified headers are kept in patches.meta.json
+(``etag``, ``last_modified``) and sent back as If-None-Match and
+If-Modified-Since, so an unchanged dataset costs a single 304 response. Only
+checked_at_utc is updated then.
+
+When the server answers 200, the response is streamed into a temporary file
+next to patches.json while its SHA-256 and size are computed, so the payload
+is never read back. It is compared with the patches_sha256 recorded in the
+meta (the old file is only hashed when the meta does not match its size) and
+replaces patches.json only when the bytes changed; updated_at_utc moves only
+then. The generators take the hash and size from the meta as well.
+
+--previous hard-links the old patches.json (copying it where links are not
+supported); the refresh replaces patches.json with a new file, so the link
+keeps the previous bytes.
+
+Examples:
+    python3 scripts/fetch_patches.py
+    python3 scripts/fetch_patches.py --previous .tmp/previous-patches.json
+    python3 scripts/fetch_patches.py --url http://127.0.0.1:8000/patches.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import os
+import shutil
+import urllib.error
+import urllib.request
+from datetime import datetime, timezone
+from pathlib import Path
+
+from artifact_writer import CHUNK_SIZE, AtomicFile
+from patch_dataset import PATCHES_JSON, PATCHES_META_JSON, read_meta, write_text_lf
+
+PATCHES_URL = "https://downloads.esri.com/patch_notification/patches.json"
+USER_AGENT = "simple-patch-finder-fetch/1"
+TIMEOUT_SECONDS = 60
+
+
+def conditional_headers(meta: dict, url: str, output: Path) -> dict[str, str]:
+    """Validators from the previous fetch of url, if patches.json still exists."""
+    if not output.exists() or meta.get("source_url") != url:
+        return {}
+    headers = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = str(meta["etag"])
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = str(meta["last_modified"])
+    return headers
+
+
+def known_sha256(meta: dict, output: Path) -> str | None:
+    """The meta's patches_sha256 when it still describes output (same size)."""
+    digest = str(meta.get("patches_sha256", "")).strip()
+    try:
+        size = output.stat().st_size
+    except OSError:
+        return None
+    return digest if digest and size == meta.get("bytes") else None
+
+
+def link_previous(output: Path, previous: Path) -> None:
+    previous.parent.mkdir(parents=True, exist_ok=True)
+    previous.unlink(missing_ok=True)
+    try:
+        os.link(output, previous)
+    except OSError:
+        shutil.copyfile(output, previous)
+
+
+def fetch(
+    url: str,
+    headers: dict[str, str],
+    timeout: float,
+    output: Path,
+    current_sha256: str | None,
+) -> tuple[int, dict[str, str], str, int, bool]:
+    """GET url into output.
+
+    Return (status, validators, sha256, bytes, changed); a 304 leaves output
+    alone and reports an empty digest. A failed or cut-short transfer exits
+    with an error and leaves output alone too.
+    """
+    request = urllib.request.Request(
+        url, headers={"User-Agent": USER_AGENT, **headers}
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            info = response.headers
+            target = AtomicFile(output)
+            try:
+                while chunk := response.read(CHUNK_SIZE):
+                    target.write_all(chunk)
+                # read() just returns b"" when the server closes the connection
+                # before Content-Length bytes arrived.
+                if response.length:
+                    raise http.client.HTTPException(
+                        f"transfer cut short after {target.size} of "
+                        f"{target.size + response.length} bytes"
+                    )
+            except BaseException:
+                target.abort()
+                raise
+            digest, size = target.sha256, target.size
+            changed = target.commit(current_sha256=current_sha256)
+            status = response.status
+    except urllib.error.HTTPError as error:
+        if error.code != 304:
+            raise SystemExit(f"Error: GET {url} failed: HTTP {error.code}") from None
+        status, info, digest, size, changed = 304, error.headers, "", 0, False
+    except (urllib.error.URLError, http.client.HTTPException, OSError) as error:
+        raise SystemExit(f"Error: GET {url} failed: {error}") from None
+    validators = {
+        key: info.get(header, "")
+        for key, header in (("etag", "ETag"), ("last_modified", "Last-Modified"))
+    }
+    return status, validators, digest, size, changed
+
+
+def write_meta(path: Path, meta: dict) -> None:
+    write_text_lf(path, json.dumps(meta, indent=2, sort_keys=True) + "\n")
+
+
+def refresh(
+    url: str, output: Path, meta_path: Path, previous: Path | None, timeout: float
+) -> list[str]:
+    run_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    meta = read_meta(meta_path)
+    if previous is not None and output.exists():
+        link_previous(output, previous)
+
+    status, validators, digest, size, changed = fetch(
+        url,
+        conditional_headers(meta, url, output),
+        timeout,
+        output,
+        known_sha256(meta, output),
+    )
+    if status == 304:
+        # Validators may be refreshed on a 304; keep the old ones otherwise.
+        meta.update({k: v for k, v in validators.items() if v})
+        meta["checked_at_utc"] = run_at
+        write_meta(meta_path, meta)
+        return [f"Dataset not modified (304): {output}", f"Wrote: {meta_path}"]
+
+    updated_at = "" if changed else str(meta.get("updated_at_utc", "")).strip()
+    meta = {
+        "source_url": url,
+        "updated_at_utc": updated_at or run_at,
+        "checked_at_utc": run_at,
+        "patches_sha256": digest,
+        "bytes": size,
+    }
+    meta.update({k: v for k, v in validators.items() if v})
+    messages = [f"Wrote: {output}" if changed else f"Dataset unchanged: {output}"]
+    write_meta(meta_path, meta)
+    messages.append(f"Wrote: {meta_path}")
+    return messages
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--url", default=PATCHES_URL, help="Upstream patches.json URL")
+    parser.add_argument(
+        "--output", type=Path, default=PATCHES_JSON, help="patches.json path"
+    )
+    parser.add_argument(
+        "--meta", type=Path, default=PATCHES_META_JSON, help="patches.meta.json path"
+    )
+    parser.add_argument(
+        "--previous",
+        type=Path,
+        default=None,
+        help="Keep the current patches.json here (hard link) before refreshing it",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=TIMEOUT_SECONDS,
+        help=f"Request timeout in seconds (default: {TIMEOUT_SECONDS})",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    messages = refresh(args.url, args.output, args.meta, args.previous, args.timeout)
+    print("\n".join(messages))
+
+
+if __name__ == "__main__":
+    main()
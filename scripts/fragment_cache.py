@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""Persistent cache of rendered feed item fragments.
+
+Rendering an RSS <item> escapes and formats every field, hashes the GUID and
+formats the pubDate. Almost every item is unchanged from one run to the next,
+so rendered fragments are stored in .build/rss-fragments.json keyed by
+(GUID, content hash, template version) and feed assembly becomes mostly
+concatenation.
+
+For every RSS file it writes, the generator also records here the SHA-256 of
+the text and the content hash of each item in it (``record_feed``).
+Incremental updates copy an existing <item> block only when the file is
+still exactly what was recorded and the item's content hash is unchanged
+(``written_items``), whatever happened to the dataset in between.
+
+The template version is stored once for the whole file; bumping it in the
+generator discards every fragment and feed record. On save, the records of
+feeds that were neither written nor kept in the run are dropped, and so are
+the fragments that are neither used in the run nor listed in a remaining
+record. Callers keep the records of the feeds they did not build
+(``keep_recorded``), so the file tracks the current feeds even when a run
+only builds some of them.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Callable
+
+from patch_dataset import BUILD_DIR, guid_digest, write_text_lf
+
+RSS_FRAGMENTS_JSON = BUILD_DIR / "rss-fragments.json"
+
+# (fragments put, GUID digests kept, feed records put, feed modes kept).
+Journal = tuple[dict[str, list[str]], set[str], dict[str, list], set[str]]
+
+
+class FragmentCache:
+    def __init__(self, template_version: int, path: Path = RSS_FRAGMENTS_JSON) -> None:
+        self.path = path
+        self.template_version = template_version
+        self.fragments: dict[str, list[str]] = {}
+        self.kept: set[str] = set()
+        # Feed mode -> [SHA-256 of its RSS text, {GUID digest: content hash}].
+        self.feeds: dict[str, list] = {}
+        self.kept_feeds: set[str] = set()
+        self.hits = 0
+        self.misses = 0
+        self.dirty = False
+        # Fragments put while journaling, to replay them in another process.
+        self.journal: dict[str, list[str]] | None = None
+        self.feed_journal: set[str] | None = None
+        try:
+            raw = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            raw = {}
+        if isinstance(raw, dict) and raw.get("template") == template_version:
+            fragments = raw.get("fragments")
+            if isinstance(fragments, dict):
+                self.fragments = fragments
+            feeds = raw.get("feeds")
+            if isinstance(feeds, dict):
+                self.feeds = feeds
+        elif raw:
+            self.dirty = True
+
+    def get(self, guid: str, content_hash: str) -> str | None:
+        digest = guid_digest(guid)
+        self.kept.add(digest)
+        cached = self.fragments.get(digest)
+        if cached is not None and cached[0] == content_hash:
+            self.hits += 1
+            return cached[1]
+        self.misses += 1
+        return None
+
+    def put(self, guid: str, content_hash: str, fragment: str) -> None:
+        digest = guid_digest(guid)
+        self.kept.add(digest)
+        self.fragments[digest] = [content_hash, fragment]
+        self.dirty = True
+        if self.journal is not None:
+            self.journal[digest] = [content_hash, fragment]
+
+    def keep(self, mode: str, guids: list[str]) -> None:
+        """Keep fragments and the record of a feed that was not re-rendered."""
+        self.kept.update(guid_digest(guid) for guid in guids)
+        self.kept_feeds.add(mode)
+
+    def keep_recorded(self, match: Callable[[str], bool]) -> None:
+        """Keep the records of matching feeds whose files were left alone."""
+        self.kept_feeds.update(mode for mode in self.feeds if match(mode))
+
+    def written_items(self, mode: str, xml: str) -> dict[str, str] | None:
+        """GUID digest -> content hash of the items of mode's RSS file.
+
+        None unless xml is exactly the text last recorded for mode.
+        """
+        record = self.feeds.get(mode)
+        if record is None:
+            return None
+        if hashlib.sha256(xml.encode("utf-8")).hexdigest() != record[0]:
+            return None
+        return record[1]
+
+    def record_feed(
+        self, mode: str, xml_sha256: str, guids: list[str], content_hashes: list[str]
+    ) -> None:
+        """Remember what mode's RSS file now holds (see written_items)."""
+        record = [
+            xml_sha256,
+            {guid_digest(guid): h for guid, h in zip(guids, content_hashes)},
+        ]
+        self.kept_feeds.add(mode)
+        if self.feeds.get(mode) != record:
+            self.feeds[mode] = record
+            self.dirty = True
+            if self.feed_journal is not None:
+                self.feed_journal.add(mode)
+
+    def start_journal(self) -> None:
+        self.journal = {}
+        self.feed_journal = set()
+        self.kept = set()
+        self.kept_feeds = set()
+
+    def take_journal(self) -> Journal:
+        journal, self.journal = self.journal or {}, None
+        modes, self.feed_journal = self.feed_journal or set(), None
+        feeds = {mode: self.feeds[mode] for mode in modes}
+        return journal, self.kept, feeds, self.kept_feeds
+
+    def apply_journal(self, journal: Journal) -> None:
+        fragments, kept, feeds, kept_feeds = journal
+        if fragments:
+            self.fragments.update(fragments)
+            self.dirty = True
+        if feeds:
+            self.feeds.update(feeds)
+            self.dirty = True
+        self.kept.update(kept)
+        self.kept_feeds.update(kept_feeds)
+
+    def save(self) -> None:
+        stale_feeds = self.feeds.keys() - self.kept_feeds
+        if stale_feeds:
+            for mode in stale_feeds:
+                del self.feeds[mode]
+            self.dirty = True
+        # Items of feeds that were not built this run stay in their files.
+        live = set(self.kept)
+        for _, items in self.feeds.values():
+            live.update(items)
+        stale = self.fragments.keys() - live
+        if stale:
+            for digest in stale:
+                del self.fragments[digest]
+            self.dirty = True
+        if not self.dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "template": self.template_version,
+            "fragments": self.fragments,
+            "feeds": self.feeds,
+        }
+        write_text_lf(
+            self.path,
+            json.dumps(payload, indent=0, sort_keys=True) + "\n",
+        )
+        self.dirty = False
@@ -1,156 +1,96 @@
 #!/usr/bin/env python3
-"""Generate RSS feeds for all patches and ArcGIS Enterprise-family patches.
+"""Generate the RSS feeds described in scripts/feeds.json.
 
-The enterprise-family feed intentionally aggregates server-side ArcGIS Enterprise
-components/extensions rather than relying only on the literal
-"ArcGIS Enterprise" product token.
+Every feed is also written as Atom 1.0 and JSON Feed 1.1 (see feed_formats.py)
+from the same selection.
+
+The default definitions cover all patches, ArcGIS Enterprise-family patches
+and security/critical patches. The enterprise-family feed intentionally
+aggregates server-side ArcGIS Enterprise components/extensions rather than
+relying only on the literal "ArcGIS Enterprise" product token.
+
+Feeds with an archive_page_size also keep paged, immutable archives of every
+item that left the feed (RFC 5005, see feed_archive.py).
 
 By default, an existing RSS file is rewritten only when the relevant feed gains
-at least one newly seen patch key compared with the previous dataset snapshot.
-Use --force to rewrite regardless.
+at least one newly seen patch key. Seen items and their first pubDate are kept
+in the .build/feed-ledger.json sidecar; a feed the ledger does not know yet is
+compared with the previous dataset snapshot instead. Use --force to rewrite
+regardless.
 """
 
 from __future__ import annotations
 
 import argparse
 import hashlib
-import json
-import re
-from dataclasses import dataclass
-from datetime import date, datetime, timezone
+import heapq
+from datetime import datetime, timedelta, timezone
 from email.utils import format_datetime, parsedate_to_datetime
 from html import escape
 from pathlib import Path
-from urllib.parse import quote
+from typing import Iterable, Iterator, Mapping, Sequence
 import xml.etree.ElementTree as ET
 
-BASE_URL = "https://simplepatchfinder.ceddc.dev/"
-ROOT = Path(__file__).resolve().parents[1]
-PATCHES_JSON = ROOT / "patches.json"
-PATCHES_META_JSON = ROOT / "patches.meta.json"
-RSS_XML = ROOT / "rss.xml"
-RSS_ENTERPRISE_XML = ROOT / "rss-enterprise.xml"
-RSS_SECURITY_CRITICAL_XML = ROOT / "rss-security-critical.xml"
-DEFAULT_LIMIT = 50
-
-# Keep this set in sync with the ArcGIS Enterprise aggregate used in js/app.js.
-ENTERPRISE_FAMILY_TOKENS = {
-    "ArcGIS Enterprise",
-    "ArcGIS Server",
-    "Portal for ArcGIS",
-    "ArcGIS Data Store",
-    "ArcGIS GeoEvent Server",
-    "GeoEvent",
-    "ArcGIS Notebook Server",
-    "ArcGIS Mission Server",
-    "ArcGIS Video Server",
-    "ArcGIS Knowledge Server",
-    "ArcGIS Workflow Manager Server",
-    "ArcGIS Image Server",
-    "ArcGIS Web Adaptor (IIS)",
-    "ArcGIS Web Adaptor (Java Platform)",
-    "ArcGIS GeoAnalytics Server",
-    "ArcGIS Data Interoperability for Server",
-    "ArcGIS Maritime for Server",
-    "Maritime Server",
-    "ArcGIS Roads and Highways for Server",
-    "ArcGIS Production Mapping for Server",
-    "ArcGIS Defense Mapping for Server",
-    "Esri Production Mapping for Server",
-    "Esri Defense Mapping for Server",
-}
-
-
-@dataclass(frozen=True)
-class PatchEntry:
-    key: str
-    name: str
-    qfe_id: str
-    version: str
-    critical_kind: str
-    release_date_text: str
-    release_date_iso: str
-    release_ordinal: int
-    products_tokens: tuple[str, ...]
-    patch_page_url: str
-    permalink: str
-
-
-def write_text_lf(path: Path, content: str) -> None:
-    with path.open("w", encoding="utf-8", newline="\n") as f:
-        f.write(content)
-
-
-def tokenize_csv(value: str) -> list[str]:
-    return [t.strip() for t in (value or "").split(",") if t.strip()]
-
-
-def slugify_patch_name(name: str) -> str:
-    s = (name or "").lower()
-    s = s.replace("&", " and ")
-    s = re.sub(r"[^a-z0-9]+", "-", s)
-    s = re.sub(r"(^-+|-+$)", "", s)
-    return s[:180]
-
-
-def parse_release_date(value: str) -> date | None:
-    m = re.match(r"^(\d{1,2})/(\d{1,2})/(\d{4})$", (value or "").strip())
-    if not m:
-        return None
-    mm, dd, yyyy = int(m.group(1)), int(m.group(2)), int(m.group(3))
-    try:
-        return date(yyyy, mm, dd)
-    except ValueError:
-        return None
-
-
-def classify_critical(raw: object) -> str:
-    value = str(raw if raw is not None else "").strip().lower()
-    if value == "security":
-        return "security"
-    if value == "true":
-        return "critical"
-    return "standard"
-
-
-def parse_isoish(value: str) -> datetime | None:
-    raw = (value or "").strip()
-    if not raw:
-        return None
-    try:
-        if raw.endswith("Z"):
-            raw = raw[:-1] + "+00:00"
-        dt = datetime.fromisoformat(raw)
-        return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
-    except ValueError:
-        return None
-
-
-def canonical_patch_url(qfe_id: str, name: str) -> str:
-    return f"{BASE_URL}?pid={quote(qfe_id, safe='')}&pn={quote(slugify_patch_name(name), safe='')}"
+from artifact_writer import save_changed_artifacts
+from build_profile import (
+    add_profile_arguments,
+    finish_profiler,
+    span,
+    start_profiler,
+)
+from build_cache import BuildCache, build_key, code_fingerprint
+from build_manifest import BuildManifest
+from feed_archive import (
+    HISTORY_NAMESPACE,
+    FeedArchives,
+    archive_page_path,
+    archive_page_url,
+    split_pages,
+)
+from feed_config import (
+    FeedDefinition,
+    FeedIndex,
+    load_feed_config,
+    reference_date,
+    route_entries,
+)
+from feed_formats import FEED_WRITERS, FeedItem, FeedMeta, FeedWriter
+from feed_ledger import FeedLedger
+from fragment_cache import FragmentCache
+from patch_dataset import (
+    GUID_PREFIX,
+    PATCHES_JSON,
+    PATCHES_META_JSON,
+    PatchEntry,
+    guid_digest,
+    load_dataset,
+    load_patch_entries,
+    parse_isoish,
+    read_meta,
+)
+from xml_stream import open_input, read_output, write_lines
 
+DEFAULT_LIMIT = 50
+# Bump whenever render_rss_item output changes to invalidate cached fragments.
+RSS_ITEM_TEMPLATE_VERSION = 1
+FEED_CONFIG = load_feed_config()
+FEED_OUTPUTS = tuple((feed.id, feed.path) for feed in FEED_CONFIG.feeds)
 
-def identity_key(
-    qfe_id: str, version: str, name: str, release_date: str, patch_page_url: str
-) -> str:
-    return "\x1f".join(
-        [
-            str(qfe_id or "").strip(),
-            str(version or "").strip(),
-            str(name or "").strip(),
-            str(release_date or "").strip(),
-            str(patch_page_url or "").strip(),
-        ]
-    )
-
+# Markers of the <item> blocks written by render_rss_item.
+RSS_ITEM_OPEN = "    <item>\n"
+RSS_ITEM_CLOSE = "\n    </item>"
+RSS_GUID_OPEN = '<guid isPermaLink="false">'
 
-def is_enterprise_family_patch(products_tokens: tuple[str, ...]) -> bool:
-    return any(token in ENTERPRISE_FAMILY_TOKENS for token in products_tokens)
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+EPOCH_ORDINAL = EPOCH.date().toordinal()
+US_PER_DAY = 86_400 * 1_000_000
+# Wider than any microsecond offset from 1970 for years 1..9999.
+ORDINAL_SPAN = 10**18
 
 
 def guid_for_key(key: str) -> str:
     digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
-    return f"urn:simple-patch-finder:{digest}"
+    return f"{GUID_PREFIX}{digest}"
 
 
 def load_existing_item_pubdates(path: Path) -> dict[str, datetime]:
@@ -158,7 +98,8 @@ def load_existing_item_pubdates(path: Path) -> dict[str, datetime]:
         return {}
 
     try:
-        root = ET.parse(path).getroot()
+        with open_input(path) as f:
+            root = ET.parse(f).getroot()
     except Exception:
         return {}
 
@@ -181,12 +122,12 @@ def load_existing_item_pubdates(path: Path) -> dict[str, datetime]:
 
 def effective_entry_pub_date(
     entry: PatchEntry,
-    existing_pub_dates: dict[str, datetime],
+    existing_pub_dates: Mapping[str, datetime],
     dataset_lastmod: datetime | None,
 ) -> datetime:
-    if entry.release_date_iso:
-        y, m, d = (int(part) for part in entry.release_date_iso.split("-"))
-        return datetime(y, m, d, tzinfo=timezone.utc)
+    if entry.release_ordinal >= 0:
+        # Midnight UTC of the release date, without re-parsing the ISO text.
+        return EPOCH + timedelta(days=entry.release_ordinal - EPOCH_ORDINAL)
     existing = existing_pub_dates.get(entry_guid(entry))
     if existing:
         return existing
@@ -195,128 +136,239 @@ def effective_entry_pub_date(
     return datetime.now(timezone.utc)
 
 
-def load_patch_entries(path: Path) -> list[PatchEntry]:
-    if not path.exists():
-        return []
+def entries_for_mode(
+    entries: list[PatchEntry], mode: str, dataset_lastmod: datetime | None = None
+) -> list[PatchEntry]:
+    """Entries of one configured feed; modes without a definition take all."""
+    feed = FEED_CONFIG.feed(mode)
+    if feed is None:
+        return entries
+    index = FeedIndex([feed], reference_date(dataset_lastmod))
+    return route_entries(entries, index)[mode]
 
-    raw = json.loads(path.read_text(encoding="utf-8"))
-    groups = raw.get("Product") if isinstance(raw, dict) else []
-    groups = groups if isinstance(groups, list) else []
 
-    deduped: dict[str, PatchEntry] = {}
-    for group in groups:
-        version = (
-            str(group.get("version", "")).strip() if isinstance(group, dict) else ""
-        )
-        patches = group.get("patches") if isinstance(group, dict) else []
-        patches = patches if isinstance(patches, list) else []
-        for patch in patches:
-            if not isinstance(patch, dict):
-                continue
+def feed_limit(mode: str, default: int) -> int:
+    feed = FEED_CONFIG.feed(mode)
+    return feed.limit if feed is not None and feed.limit is not None else default
 
-            qfe_id = str(patch.get("QFE_ID", "")).strip()
-            name = str(patch.get("Name", "")).strip()
-            critical_kind = classify_critical(patch.get("Critical"))
-            release_date_text = str(patch.get("ReleaseDate", "")).strip()
-            patch_page_url = str(patch.get("url", "")).strip()
-            products_tokens = tuple(tokenize_csv(str(patch.get("Products", ""))))
-            release_date = parse_release_date(release_date_text)
-            key = identity_key(qfe_id, version, name, release_date_text, patch_page_url)
 
-            if key in deduped:
-                continue
+def feed_step(mode: str) -> str:
+    """Build step that writes mode's feed; unconfigured modes are facet feeds."""
+    return f"rss:{mode}" if FEED_CONFIG.feed(mode) is not None else "rss:facets"
 
-            deduped[key] = PatchEntry(
-                key=key,
-                name=name,
-                qfe_id=qfe_id,
-                version=version,
-                critical_kind=critical_kind,
-                release_date_text=release_date_text,
-                release_date_iso=release_date.isoformat() if release_date else "",
-                release_ordinal=release_date.toordinal() if release_date else -1,
-                products_tokens=products_tokens,
-                patch_page_url=patch_page_url,
-                permalink=canonical_patch_url(qfe_id, name) if qfe_id else BASE_URL,
-            )
 
-    return list(deduped.values())
+def feed_archive_page_size(mode: str, limit: int) -> int:
+    """Archive page size of a feed; full-archive feeds (limit 0) need no pages."""
+    feed = FEED_CONFIG.feed(mode)
+    return feed.archive_page_size if feed is not None and limit > 0 else 0
 
 
-def entries_for_mode(entries: list[PatchEntry], mode: str) -> list[PatchEntry]:
-    filtered = entries
-    if mode == "enterprise":
-        filtered = [
-            entry
-            for entry in entries
-            if is_enterprise_family_patch(entry.products_tokens)
-        ]
-    elif mode == "security-critical":
-        filtered = [
-            entry
-            for entry in entries
-            if entry.critical_kind in {"security", "critical"}
-        ]
+def feed_sort_key(
+    entry: PatchEntry,
+    existing_pub_dates: Mapping[str, datetime],
+    dataset_lastmod: datetime | None,
+) -> tuple[int, str, str, str]:
+    """Ascending key that reproduces the newest-first feed order.
+
+    Release day and effective pubDate collapse into one integer rank: dated
+    entries publish at midnight of their release day, so the rank only needs
+    the pubDate (in microseconds) to order undated entries among themselves.
+    """
+    return (
+        feed_rank(entry, existing_pub_dates, dataset_lastmod),
+        entry.name.lower(),
+        entry.qfe_id.lower(),
+        entry.version.lower(),
+    )
 
-    return filtered
+
+def feed_rank(
+    entry: PatchEntry,
+    existing_pub_dates: Mapping[str, datetime],
+    dataset_lastmod: datetime | None,
+) -> int:
+    """First element of feed_sort_key: smaller is newer."""
+    if entry.release_ordinal >= 0:
+        pub_us = (entry.release_ordinal - EPOCH_ORDINAL) * US_PER_DAY
+    else:
+        pub_date = effective_entry_pub_date(entry, existing_pub_dates, dataset_lastmod)
+        pub_us = (pub_date - EPOCH) // timedelta(microseconds=1)
+    return -(entry.release_ordinal * ORDINAL_SPAN + pub_us)
 
 
 def feed_entries(
     entries: list[PatchEntry],
     mode: str,
     limit: int,
-    existing_pub_dates: dict[str, datetime],
+    existing_pub_dates: Mapping[str, datetime],
     dataset_lastmod: datetime | None,
 ) -> list[PatchEntry]:
-    filtered = entries_for_mode(entries, mode)
-
-    filtered.sort(
-        key=lambda entry: (
-            -entry.release_ordinal,
-            -effective_entry_pub_date(
-                entry, existing_pub_dates, dataset_lastmod
-            ).timestamp(),
-            entry.name.lower(),
-            entry.qfe_id.lower(),
-            entry.version.lower(),
-        )
+    return top_feed_entries(
+        entries_for_mode(entries, mode, dataset_lastmod),
+        limit,
+        existing_pub_dates,
+        dataset_lastmod,
     )
-    return filtered[:limit]
 
 
-def read_dataset_lastmod(meta_path: Path) -> datetime | None:
-    if not meta_path.exists():
-        return None
-    try:
-        meta = json.loads(meta_path.read_text(encoding="utf-8"))
-    except Exception:
-        return None
-    return parse_isoish(str(meta.get("updated_at_utc", "")).strip())
+def top_feed_entries(
+    filtered: list[PatchEntry],
+    limit: int,
+    existing_pub_dates: Mapping[str, datetime],
+    dataset_lastmod: datetime | None,
+) -> list[PatchEntry]:
+    """Newest-first selection from entries already routed to a feed."""
 
+    def key(entry: PatchEntry) -> tuple[int, str, str, str]:
+        return feed_sort_key(entry, existing_pub_dates, dataset_lastmod)
 
-def feed_channel(mode: str) -> tuple[str, str, str, str]:
-    if mode == "enterprise":
-        return (
-            "Simple Patch Finder - ArcGIS Enterprise RSS",
-            "Latest ArcGIS Enterprise server-side component patches from Simple Patch Finder.",
-            BASE_URL,
-            f"{BASE_URL}rss-enterprise.xml",
-        )
+    if limit <= 0:
+        # 0 selects the full archive; negative limits slice like a list.
+        return sorted(filtered, key=key)[: limit or None]
+    # nsmallest is stable, so ties keep input order exactly like sorted().
+    return heapq.nsmallest(limit, filtered, key=key)
 
-    if mode == "security-critical":
-        return (
-            "Simple Patch Finder - Security and Critical RSS",
-            "Latest security and critical patches from Simple Patch Finder.",
-            BASE_URL,
-            f"{BASE_URL}rss-security-critical.xml",
-        )
 
-    return (
-        "Simple Patch Finder - All patches RSS",
-        "Latest ArcGIS and Esri patches from Simple Patch Finder.",
-        BASE_URL,
-        f"{BASE_URL}rss.xml",
-    )
+class _Kept:
+    """Heap item in reverse order, so heap[0] is the worst entry kept."""
+
+    __slots__ = ("key", "seq", "entry")
+
+    def __init__(self, key: tuple, seq: int, entry: PatchEntry) -> None:
+        self.key = key
+        self.seq = seq
+        self.entry = entry
+
+    def __lt__(self, other: _Kept) -> bool:
+        return (self.key, self.seq) > (other.key, other.seq)
+
+
+class TopK:
+    """Bounded newest-first selection fed one entry at a time.
+
+    Keeps the same entries in the same order as heapq.nsmallest(limit, ...)
+    over the offered entries: an entry only displaces the worst kept one when
+    its key is strictly smaller, so ties keep offer order. A limit of 0 keeps
+    every entry (the full archive); a negative limit slices like
+    sorted()[:limit].
+    """
+
+    __slots__ = ("limit", "heap", "seq", "full", "worst_rank")
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.heap: list[_Kept] = []
+        self.seq = 0
+        # Once full, entries ranked after worst_rank cannot get in.
+        self.full = False
+        self.worst_rank = 0
+
+    def push(self, key: tuple, entry: PatchEntry) -> None:
+        self.seq += 1
+        if self.limit <= 0:
+            self.heap.append(_Kept(key, self.seq, entry))
+        elif not self.full:
+            heapq.heappush(self.heap, _Kept(key, self.seq, entry))
+            self.full = len(self.heap) >= self.limit
+            self.worst_rank = self.heap[0].key[0]
+        elif key < self.heap[0].key:
+            heapq.heapreplace(self.heap, _Kept(key, self.seq, entry))
+            self.worst_rank = self.heap[0].key[0]
+
+    def result(self) -> list[PatchEntry]:
+        kept = sorted(self.heap, key=lambda item: (item.key, item.seq))
+        if self.limit < 0:
+            kept = kept[: self.limit]
+        return [item.entry for item in kept]
+
+
+def route_feeds(
+    entries: list[PatchEntry],
+    feeds: list[FeedDefinition],
+    limits: Mapping[str, int],
+    existing_pub_dates: Mapping[str, datetime],
+    dataset_lastmod: datetime | None,
+    members: dict[str, list[PatchEntry]] | None = None,
+) -> dict[str, list[PatchEntry]]:
+    """Newest entries of every given feed, selected in a single pass.
+
+    Each entry is classified once through a FeedIndex and offered to one
+    bounded TopK per feed it belongs to. The integer rank is compared with
+    each heap's worst entry first, so the full sort key (with its lowercased
+    tie-breakers) is only built for entries that can still get in. Every
+    selection equals feed_entries() for that feed. Every entry of a feed
+    that has a list in members is also appended to it, in input order, as
+    entries_for_mode() would return them.
+    """
+    index = FeedIndex(feeds, reference_date(dataset_lastmod))
+    selections = {feed.id: TopK(limits[feed.id]) for feed in feeds}
+    for entry in entries:
+        feed_ids = index.feeds_for(entry)
+        if not feed_ids:
+            continue
+        if members:
+            for feed_id in feed_ids:
+                if feed_id in members:
+                    members[feed_id].append(entry)
+        rank = feed_rank(entry, existing_pub_dates, dataset_lastmod)
+        key = None
+        for feed_id in feed_ids:
+            top = selections[feed_id]
+            if top.full and rank > top.worst_rank:
+                continue
+            if key is None:
+                key = (
+                    rank,
+                    entry.name.lower(),
+                    entry.qfe_id.lower(),
+                    entry.version.lower(),
+                )
+            top.push(key, entry)
+    return {feed_id: top.result() for feed_id, top in selections.items()}
+
+
+def import_legacy_feed(ledger: FeedLedger, mode: str, output_path: Path) -> None:
+    """One-time migration for feeds written before the ledger existed."""
+    if ledger.has_mode(mode):
+        return
+    existing_pub_dates = load_existing_item_pubdates(output_path)
+    if existing_pub_dates:
+        ledger.import_feed(mode, existing_pub_dates)
+
+
+def select_feeds(
+    entries: list[PatchEntry],
+    feeds: list[FeedDefinition],
+    default_limit: int,
+    ledger: FeedLedger,
+    dataset_lastmod: datetime | None,
+) -> tuple[dict[str, list[PatchEntry]], dict[str, list[PatchEntry]]]:
+    """Route configured feeds in one pass, after importing any legacy feed.
+
+    Returns the newest entries of every feed and, for feeds with archive
+    pages, every entry of the feed (what update_feed_archive pages).
+    """
+    for feed in feeds:
+        import_legacy_feed(ledger, feed.id, feed.path)
+    limits = {feed.id: feed_limit(feed.id, default_limit) for feed in feeds}
+    members: dict[str, list[PatchEntry]] = {
+        feed.id: []
+        for feed in feeds
+        if feed_archive_page_size(feed.id, limits[feed.id])
+    }
+    selections = route_feeds(entries, feeds, limits, ledger, dataset_lastmod, members)
+    return selections, members
+
+
+def read_dataset_lastmod(meta_path: Path) -> datetime | None:
+    return parse_isoish(str(read_meta(meta_path).get("updated_at_utc", "")).strip())
+
+
+def feed_channel(mode: str) -> tuple[str, str, str, str]:
+    feed = FEED_CONFIG.feed(mode)
+    if feed is None:
+        raise ValueError(f"No feed definition for {mode!r} in feeds.json")
+    return feed.channel
 
 
 def entry_title(entry: PatchEntry) -> str:
@@ -346,50 +398,455 @@ def entry_description(entry: PatchEntry) -> str:
     return " | ".join(parts)
 
 
-def build_rss_xml(
-    entries: list[PatchEntry],
-    mode: str,
-    dataset_lastmod: datetime | None,
-    existing_pub_dates: dict[str, datetime],
-) -> str:
-    title, description, site_link, self_link = feed_channel(mode)
-    last_build = dataset_lastmod or max(
-        (
-            effective_entry_pub_date(entry, existing_pub_dates, dataset_lastmod)
-            for entry in entries
-        ),
-        default=datetime.now(timezone.utc),
+def render_signature(entry: PatchEntry) -> tuple:
+    """Every entry field that ends up in a rendered <item> (pubDate aside)."""
+    return (
+        entry.name,
+        entry.qfe_id,
+        entry.version,
+        entry.critical_kind,
+        entry.release_date_text,
+        entry.products_tokens,
+        entry.patch_page_url,
     )
 
+
+# Extra channel <atom:link>s as (rel, href) pairs, e.g. RFC 5005 archive links.
+FeedLinks = Sequence[tuple[str, str]]
+
+
+def rss_header_lines(
+    mode: str,
+    last_build: datetime,
+    channel: tuple[str, str, str, str] | None = None,
+    links: FeedLinks = (),
+    archived: bool = False,
+) -> list[str]:
+    title, description, site_link, self_link = channel or feed_channel(mode)
+    namespaces = 'xmlns:atom="http://www.w3.org/2005/Atom"'
+    if archived:
+        namespaces += f' xmlns:fh="{HISTORY_NAMESPACE}"'
     lines = [
         '<?xml version="1.0" encoding="UTF-8"?>',
-        '<rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom">',
+        f'<rss version="2.0" {namespaces}>',
         "  <channel>",
         f"    <title>{escape(title, quote=False)}</title>",
         f"    <description>{escape(description, quote=False)}</description>",
         f"    <link>{escape(site_link, quote=False)}</link>",
         f'    <atom:link href="{escape(self_link)}" rel="self" type="application/rss+xml" />',
-        f"    <lastBuildDate>{escape(format_datetime(last_build), quote=False)}</lastBuildDate>",
-        "    <language>en-us</language>",
     ]
+    lines.extend(
+        f'    <atom:link href="{escape(href)}" rel="{rel}" type="application/rss+xml" />'
+        for rel, href in links
+    )
+    if archived:
+        lines.append("    <fh:archive />")
+    lines.extend(
+        [
+            f"    <lastBuildDate>{escape(format_datetime(last_build), quote=False)}</lastBuildDate>",
+            "    <language>en-us</language>",
+        ]
+    )
+    return lines
+
 
+RSS_FOOTER_LINES = ["  </channel>", "</rss>"]
+
+
+def item_content_hash(entry: PatchEntry, pub_date: datetime) -> str:
+    name, qfe_id, version, critical_kind, release_date_text, products, url = (
+        render_signature(entry)
+    )
+    raw = "\x1f".join(
+        (
+            name,
+            qfe_id,
+            version,
+            critical_kind,
+            release_date_text,
+            "\x1e".join(products),
+            url,
+            str(int(pub_date.timestamp())),
+        )
+    )
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def render_rss_item(entry: PatchEntry, pub_date: datetime) -> str:
+    return "\n".join(
+        [
+            "    <item>",
+            f"      <title>{escape(entry_title(entry), quote=False)}</title>",
+            f"      <link>{escape(entry.permalink, quote=False)}</link>",
+            f'      <guid isPermaLink="false">{escape(entry_guid(entry), quote=False)}</guid>',
+            f"      <pubDate>{escape(format_datetime(pub_date), quote=False)}</pubDate>",
+            f"      <description>{escape(entry_description(entry), quote=False)}</description>",
+            "    </item>",
+        ]
+    )
+
+
+def rss_item_block(
+    entry: PatchEntry, pub_date: datetime, fragments: FragmentCache | None
+) -> str:
+    if fragments is None:
+        return render_rss_item(entry, pub_date)
+    guid = entry_guid(entry)
+    content_hash = item_content_hash(entry, pub_date)
+    block = fragments.get(guid, content_hash)
+    if block is None:
+        block = render_rss_item(entry, pub_date)
+        fragments.put(guid, content_hash, block)
+    return block
+
+
+def iter_feed_items(
+    entries: list[PatchEntry], guids: list[str], pub_dates: list[datetime]
+) -> Iterator[FeedItem]:
+    """Format-neutral items for the alternate writers, with resolved GUIDs and dates."""
+    for entry, guid, pub_date in zip(entries, guids, pub_dates):
+        yield FeedItem(
+            guid=guid,
+            title=entry_title(entry),
+            link=entry.permalink,
+            description=entry_description(entry),
+            published=pub_date,
+            external_url=entry.patch_page_url,
+            tags=entry.products_tokens,
+        )
+
+
+def feed_last_build(
+    entries: list[PatchEntry],
+    dataset_lastmod: datetime | None,
+    existing_pub_dates: Mapping[str, datetime],
+) -> datetime:
+    return dataset_lastmod or max(
+        (
+            effective_entry_pub_date(entry, existing_pub_dates, dataset_lastmod)
+            for entry in entries
+        ),
+        default=datetime.now(timezone.utc),
+    )
+
+
+def iter_rss_lines(
+    entries: list[PatchEntry],
+    mode: str,
+    dataset_lastmod: datetime | None,
+    existing_pub_dates: Mapping[str, datetime],
+    fragments: FragmentCache | None = None,
+    channel: tuple[str, str, str, str] | None = None,
+    links: FeedLinks = (),
+) -> Iterator[str]:
+    """Lines of a feed (without newlines), produced one item at a time."""
+    last_build = feed_last_build(entries, dataset_lastmod, existing_pub_dates)
+    yield from rss_header_lines(mode, last_build, channel, links)
     for entry in entries:
-        lines.extend(
-            [
-                "    <item>",
-                f"      <title>{escape(entry_title(entry), quote=False)}</title>",
-                f"      <link>{escape(entry.permalink, quote=False)}</link>",
-                f'      <guid isPermaLink="false">{escape(entry_guid(entry), quote=False)}</guid>',
-                f"      <pubDate>{escape(format_datetime(effective_entry_pub_date(entry, existing_pub_dates, dataset_lastmod)), quote=False)}</pubDate>",
-                f"      <description>{escape(entry_description(entry), quote=False)}</description>",
-                "    </item>",
-            ]
+        yield rss_item_block(
+            entry,
+            effective_entry_pub_date(entry, existing_pub_dates, dataset_lastmod),
+            fragments,
         )
+    yield from RSS_FOOTER_LINES
 
-    lines.extend(["  </channel>", "</rss>"])
+
+def build_rss_xml(
+    entries: list[PatchEntry],
+    mode: str,
+    dataset_lastmod: datetime | None,
+    existing_pub_dates: Mapping[str, datetime],
+    fragments: FragmentCache | None = None,
+    channel: tuple[str, str, str, str] | None = None,
+) -> str:
+    lines = iter_rss_lines(
+        entries, mode, dataset_lastmod, existing_pub_dates, fragments, channel
+    )
     return "\n".join(lines) + "\n"
 
 
+def split_rss_items(xml: str) -> dict[str, str]:
+    """Map GUID -> verbatim <item> block of a feed written by build_rss_xml."""
+    out: dict[str, str] = {}
+    find = xml.find
+    start = find(RSS_ITEM_OPEN)
+    while start != -1:
+        end = find(RSS_ITEM_CLOSE, start)
+        if end == -1:
+            break
+        end += len(RSS_ITEM_CLOSE)
+        guid_start = find(RSS_GUID_OPEN, start, end)
+        if guid_start != -1:
+            guid_start += len(RSS_GUID_OPEN)
+            guid_end = find("</guid>", guid_start, end)
+            if guid_end != -1:
+                out[xml[guid_start:guid_end]] = xml[start:end]
+        start = find(RSS_ITEM_OPEN, end)
+    return out
+
+
+def reusable_rss_blocks(
+    existing_xml: str,
+    written: Mapping[str, str] | None,
+    guids: list[str],
+    content_hashes: list[str],
+) -> tuple[dict[str, str], set[str]] | None:
+    """Existing <item> blocks to reuse and the GUIDs that must be rendered.
+
+    written maps the GUID digest of every item in existing_xml to the content
+    hash it was rendered from (see FragmentCache.written_items). Without it
+    the file cannot be trusted and None asks for a full build. A block is
+    only reused when its entry's content hash is unchanged since.
+    """
+    if written is None:
+        return None
+    blocks = split_rss_items(existing_xml)
+    stale = {
+        guid
+        for guid, content_hash in zip(guids, content_hashes)
+        if guid not in blocks or written.get(guid_digest(guid)) != content_hash
+    }
+    return blocks, stale
+
+
+def iter_merged_rss_lines(
+    blocks: Mapping[str, str],
+    entries: list[PatchEntry],
+    mode: str,
+    dataset_lastmod: datetime | None,
+    existing_pub_dates: Mapping[str, datetime],
+    new_guids: set[str],
+    fragments: FragmentCache | None = None,
+    channel: tuple[str, str, str, str] | None = None,
+    reused: list[int] | None = None,
+    links: FeedLinks = (),
+    guids: list[str] | None = None,
+) -> Iterator[str]:
+    """Feed lines that copy the blocks of unchanged entries verbatim.
+
+    Only entries in new_guids (or missing from blocks) are rendered; entries
+    that fell past the limit are simply not carried over. reused[0] counts
+    the copied blocks. guids, when already known, are the entries' GUIDs.
+    """
+    yield from rss_header_lines(
+        mode,
+        feed_last_build(entries, dataset_lastmod, existing_pub_dates),
+        channel,
+        links,
+    )
+    if guids is None:
+        guids = [entry_guid(entry) for entry in entries]
+    for entry, guid in zip(entries, guids):
+        block = None if guid in new_guids else blocks.get(guid)
+        if block is None:
+            pub_date = effective_entry_pub_date(entry, existing_pub_dates, dataset_lastmod)
+            block = rss_item_block(entry, pub_date, fragments)
+        elif reused is not None:
+            reused[0] += 1
+        yield block
+    yield from RSS_FOOTER_LINES
+
+
+def merge_rss_xml(
+    existing_xml: str,
+    written: Mapping[str, str] | None,
+    entries: list[PatchEntry],
+    mode: str,
+    dataset_lastmod: datetime | None,
+    existing_pub_dates: Mapping[str, datetime],
+    fragments: FragmentCache | None = None,
+    channel: tuple[str, str, str, str] | None = None,
+) -> tuple[str, int] | None:
+    """Rebuild a feed by reusing the existing <item> blocks of unchanged entries.
+
+    written describes existing_xml as in reusable_rss_blocks. Returns the XML
+    and the number of reused blocks, or None when a full build is needed.
+    """
+    guids = [entry_guid(entry) for entry in entries]
+    content_hashes = feed_item_hashes(entries, existing_pub_dates, dataset_lastmod)
+    reuse = reusable_rss_blocks(existing_xml, written, guids, content_hashes)
+    if reuse is None:
+        return None
+    blocks, new_guids = reuse
+    reused = [0]
+    lines = iter_merged_rss_lines(
+        blocks,
+        entries,
+        mode,
+        dataset_lastmod,
+        existing_pub_dates,
+        new_guids,
+        fragments,
+        channel,
+        reused,
+        guids=guids,
+    )
+    xml = "\n".join(lines) + "\n"
+    return xml, reused[0]
+
+
+def feed_item_hashes(
+    entries: list[PatchEntry],
+    existing_pub_dates: Mapping[str, datetime],
+    dataset_lastmod: datetime | None,
+) -> list[str]:
+    """item_content_hash of every entry, with its effective pubDate."""
+    return [
+        item_content_hash(
+            entry, effective_entry_pub_date(entry, existing_pub_dates, dataset_lastmod)
+        )
+        for entry in entries
+    ]
+
+
+def hashed_lines(lines: Iterable[str], digest: hashlib._Hash) -> Iterator[str]:
+    """Pass lines through, feeding them (newline-terminated) to digest."""
+    for line in lines:
+        digest.update(line.encode("utf-8"))
+        digest.update(b"\n")
+        yield line
+
+
+def feed_inputs(
+    mode: str,
+    selected: list[PatchEntry],
+    limit: int,
+    existing_pub_dates: Mapping[str, datetime],
+    dataset_lastmod: datetime | None,
+) -> dict:
+    """Declared build inputs of a feed (see build_manifest.py).
+
+    The feed only depends on its selected entries as rendered, not on the
+    whole dataset: a patch outside the feed leaves these inputs unchanged.
+    feeds.json is covered by the code fingerprint.
+    """
+    digest = hashlib.sha256()
+    for entry in selected:
+        pub_date = effective_entry_pub_date(entry, existing_pub_dates, dataset_lastmod)
+        digest.update(entry_guid(entry).encode("utf-8"))
+        digest.update(item_content_hash(entry, pub_date).encode("ascii"))
+    return {
+        "feed": mode,
+        "selection": digest.hexdigest(),
+        "items": len(selected),
+        "limit": limit,
+        "template": RSS_ITEM_TEMPLATE_VERSION,
+        "code": code_fingerprint(),
+    }
+
+
+def iter_archive_page_lines(
+    entries: list[PatchEntry],
+    mode: str,
+    page: int,
+    has_next: bool,
+    dataset_lastmod: datetime | None,
+    existing_pub_dates: Mapping[str, datetime],
+    channel: tuple[str, str, str, str] | None = None,
+) -> Iterator[str]:
+    """Lines of a sealed archive page; nothing in it depends on the run date."""
+    title, description, site_link, head_link = channel or feed_channel(mode)
+    links = [("current", head_link)]
+    if page > 1:
+        links.append(("prev-archive", archive_page_url(head_link, page - 1)))
+    if has_next:
+        links.append(("next-archive", archive_page_url(head_link, page + 1)))
+    pub_dates = [
+        effective_entry_pub_date(entry, existing_pub_dates, dataset_lastmod)
+        for entry in entries
+    ]
+    page_channel = (
+        f"{title} (archive page {page})",
+        description,
+        site_link,
+        archive_page_url(head_link, page),
+    )
+    yield from rss_header_lines(mode, max(pub_dates), page_channel, links, archived=True)
+    for entry, pub_date in zip(entries, pub_dates):
+        yield render_rss_item(entry, pub_date)
+    yield from RSS_FOOTER_LINES
+
+
+def update_feed_archive(
+    archives: FeedArchives,
+    page_size: int,
+    current_entries: list[PatchEntry],
+    members: list[PatchEntry],
+    selected: list[PatchEntry],
+    output_path: Path,
+    mode: str,
+    dataset_lastmod: datetime | None,
+    existing_pub_dates: Mapping[str, datetime],
+    channel: tuple[str, str, str, str] | None = None,
+) -> tuple[list[PatchEntry], FeedLinks, int]:
+    """Seal entries that left the head into archive pages.
+
+    members are the entries of the feed, as routed (entries_for_mode). Every
+    one that is neither in the selection nor sealed yet is queued for the
+    next page; current_entries is only scanned for queued items that left
+    the feed. Returns the head entries (the selection plus
+    queued items), the head's archive links and the number of pages sealed.
+    On a feed's first run every queued entry is sealed (backfill).
+    """
+    archive = archives.get(mode)
+    selected_guids = {entry_guid(entry) for entry in selected}
+    done = selected_guids | (archive.sealed() if archive is not None else set())
+    overflow = []
+    for entry in members:
+        guid = entry_guid(entry)
+        if guid not in done:
+            done.add(guid)
+            overflow.append(entry)
+    if archive is not None:
+        # Queued items stay until sealed even if they no longer match the
+        # feed; items removed from the dataset are dropped.
+        queued = archive.queued() - done
+        if queued:
+            overflow.extend(
+                entry for entry in current_entries if entry_guid(entry) in queued
+            )
+    overflow = top_feed_entries(overflow, 0, existing_pub_dates, dataset_lastmod)
+    sizes = split_pages(len(overflow), page_size, backfill=archive is None)
+    # overflow is newest first: pages are cut from its end, oldest page first.
+    end = len(overflow)
+    pages: list[list[PatchEntry]] = []
+    for size in sizes:
+        pages.append(overflow[end - size : end])
+        end -= size
+    first_page = (archive.page_count if archive is not None else 0) + 1
+    for i, page_entries in enumerate(pages):
+        path = archive_page_path(output_path, first_page + i)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_lines(
+            path,
+            iter_archive_page_lines(
+                page_entries,
+                mode,
+                first_page + i,
+                i + 1 < len(pages),
+                dataset_lastmod,
+                existing_pub_dates,
+                channel,
+            ),
+        )
+
+    head = selected
+    if end:
+        head = top_feed_entries(
+            selected + overflow[:end], 0, existing_pub_dates, dataset_lastmod
+        )
+    archive = archives.update(
+        mode,
+        [[entry_guid(entry) for entry in page] for page in pages],
+        [entry_guid(entry) for entry in head],
+    )
+    if not archive.page_count:
+        return head, (), 0
+    head_link = (channel or feed_channel(mode))[3]
+    links = (("prev-archive", archive_page_url(head_link, archive.page_count)),)
+    return head, links, len(pages)
+
+
 def maybe_write_feed(
     current_entries: list[PatchEntry],
     previous_entries: list[PatchEntry],
@@ -398,27 +855,164 @@ def maybe_write_feed(
     limit: int,
     dataset_lastmod: datetime | None,
     force: bool,
+    ledger: FeedLedger,
+    incremental: bool = False,
+    fragments: FragmentCache | None = None,
+    channel: tuple[str, str, str, str] | None = None,
+    selected: list[PatchEntry] | None = None,
+    formats: tuple[FeedWriter, ...] = FEED_WRITERS,
+    archives: FeedArchives | None = None,
+    members: list[PatchEntry] | None = None,
 ) -> str:
-    existing_pub_dates = load_existing_item_pubdates(output_path)
-    selected_current = feed_entries(
-        current_entries, mode, limit, existing_pub_dates, dataset_lastmod
-    )
+    """Write one feed when it gained a new patch (or when forced).
+
+    current_entries is the dataset; the feed's entries are picked from it by
+    mode (modes without a definition, such as facet feeds, take all of
+    them). When selected is given it is the newest-first selection already
+    made by route_feeds and current_entries is not scanned again; members
+    (every entry of the feed, from select_feeds) likewise spares the archive
+    a scan.
+    With fragments, items are taken from the rendered-fragment cache when
+    their content is unchanged, and what the RSS file holds is recorded
+    there. With incremental as well, items whose content is unchanged since
+    that record are copied verbatim from the existing file and only the
+    others are rendered. The same selection is also written in every
+    alternate format (Atom, JSON Feed) next to the RSS file. With archives,
+    feeds that have an archive_page_size also seal the entries that left the
+    feed into archive pages (see update_feed_archive).
+    """
+    import_legacy_feed(ledger, mode, output_path)
+    with span("select"):
+        selected_current = (
+            selected
+            if selected is not None
+            else feed_entries(current_entries, mode, limit, ledger, dataset_lastmod)
+        )
 
-    selected_current_guids = {entry_guid(entry) for entry in selected_current}
-    if existing_pub_dates:
-        has_new_patch = bool(selected_current_guids - set(existing_pub_dates))
+    selected_current_guids = [entry_guid(entry) for entry in selected_current]
+    if ledger.has_mode(mode):
+        has_new_patch = any(ledger.is_new(guid, mode) for guid in selected_current_guids)
     else:
         previous_guids = {
-            entry_guid(entry) for entry in entries_for_mode(previous_entries, mode)
+            entry_guid(entry)
+            for entry in entries_for_mode(previous_entries, mode, dataset_lastmod)
         }
-        has_new_patch = bool(selected_current_guids - previous_guids)
+        has_new_patch = bool(set(selected_current_guids) - previous_guids)
 
-    if output_path.exists() and not force and not has_new_patch:
+    page_size = feed_archive_page_size(mode, limit) if archives is not None else 0
+    needs_backfill = bool(page_size) and archives.get(mode) is None
+
+    alternate_paths = [writer.output_path(output_path) for writer in formats]
+    outputs_exist = output_path.exists() and all(p.exists() for p in alternate_paths)
+    if outputs_exist and not force and not has_new_patch and not needs_backfill:
+        if fragments is not None:
+            fragments.keep(mode, selected_current_guids)
         return f"Skipped {output_path.name}: no new {mode} patches"
 
-    xml = build_rss_xml(selected_current, mode, dataset_lastmod, existing_pub_dates)
-    write_text_lf(output_path, xml)
-    return f"Wrote {output_path.name}: {len(selected_current)} items"
+    hits_before = fragments.hits if fragments is not None else 0
+    misses_before = fragments.misses if fragments is not None else 0
+
+    links: FeedLinks = ()
+    sealed = 0
+    if page_size:
+        with span("archive pages"):
+            selected_current, links, sealed = update_feed_archive(
+                archives,
+                page_size,
+                current_entries,
+                members
+                if members is not None
+                else entries_for_mode(current_entries, mode, dataset_lastmod),
+                selected_current,
+                output_path,
+                mode,
+                dataset_lastmod,
+                ledger,
+                channel,
+            )
+        selected_current_guids = [entry_guid(entry) for entry in selected_current]
+
+    pub_dates = [
+        effective_entry_pub_date(entry, ledger, dataset_lastmod)
+        for entry in selected_current
+    ]
+    content_hashes = (
+        [item_content_hash(e, d) for e, d in zip(selected_current, pub_dates)]
+        if fragments is not None
+        else []
+    )
+    blocks = None
+    if incremental and fragments is not None and output_path.exists():
+        with span("parse previous feed"):
+            existing_xml = read_output(output_path)
+            reuse = reusable_rss_blocks(
+                existing_xml,
+                fragments.written_items(mode, existing_xml),
+                selected_current_guids,
+                content_hashes,
+            )
+        if reuse is not None:
+            blocks, new_guids = reuse
+
+    reused = [0]
+    if blocks is None:
+        lines = iter_rss_lines(
+            selected_current, mode, dataset_lastmod, ledger, fragments, channel, links
+        )
+    else:
+        lines = iter_merged_rss_lines(
+            blocks,
+            selected_current,
+            mode,
+            dataset_lastmod,
+            ledger,
+            new_guids,
+            fragments,
+            channel,
+            reused,
+            links,
+            selected_current_guids,
+        )
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    written = hashlib.sha256()
+    # Items are rendered lazily, so this span covers rendering and writing.
+    with span("render rss"):
+        write_lines(output_path, hashed_lines(lines, written))
+    if fragments is not None:
+        fragments.record_feed(
+            mode, written.hexdigest(), selected_current_guids, content_hashes
+        )
+    details = [] if blocks is None else [f"incremental: {reused[0]} reused"]
+    if page_size:
+        details.append(f"archive: {sealed} pages sealed")
+    if fragments is not None:
+        details.append(
+            f"fragments: {fragments.hits - hits_before} hit, "
+            f"{fragments.misses - misses_before} miss"
+        )
+    with span("render alternates"):
+        if formats:
+            title, description, site_link, self_link = channel or feed_channel(mode)
+            # Channel titles name the RSS format; the alternates drop that suffix.
+            title = title.removesuffix(" RSS")
+            last_build = feed_last_build(selected_current, dataset_lastmod, ledger)
+            for writer, path in zip(formats, alternate_paths):
+                meta = FeedMeta(
+                    title,
+                    description,
+                    site_link,
+                    writer.output_url(self_link),
+                    last_build,
+                )
+                items = iter_feed_items(
+                    selected_current, selected_current_guids, pub_dates
+                )
+                writer.write(path, meta, items)
+    for guid, pub_date in zip(selected_current_guids, pub_dates):
+        ledger.record(guid, mode, pub_date)
+    detail = f" ({'; '.join(details)})" if details else ""
+    also = f" + {', '.join(path.name for path in alternate_paths)}" if formats else ""
+    return f"Wrote {output_path.name}{also}: {len(selected_current)} items{detail}"
 
 
 def parse_args() -> argparse.Namespace:
@@ -436,55 +1030,145 @@ def parse_args() -> argparse.Namespace:
         "--meta", type=Path, default=PATCHES_META_JSON, help="patches.meta.json path"
     )
     parser.add_argument(
-        "--limit", type=int, default=DEFAULT_LIMIT, help="Max items per feed"
+        "--limit",
+        type=int,
+        default=DEFAULT_LIMIT,
+        help="Max items per feed unless feeds.json sets a limit (0 = full archive)",
     )
     parser.add_argument(
         "--force",
         action="store_true",
         help="Rewrite feeds even if no new patch is detected",
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Rebuild feeds even if the build cache says nothing changed",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Reuse the <item> blocks of unchanged entries from the existing feeds",
+    )
+    parser.add_argument(
+        "--facets",
+        action="store_true",
+        help="Also write per-product, per-version and per-platform feeds under feeds/",
+    )
+    add_profile_arguments(parser)
     return parser.parse_args()
 
 
 def main() -> None:
     args = parse_args()
-    current_entries = load_patch_entries(args.current)
-    previous_entries = load_patch_entries(args.previous) if args.previous else []
-    dataset_lastmod = read_dataset_lastmod(args.meta)
-
-    print(
-        maybe_write_feed(
-            current_entries=current_entries,
-            previous_entries=previous_entries,
-            output_path=RSS_XML,
-            mode="all",
-            limit=args.limit,
-            dataset_lastmod=dataset_lastmod,
-            force=args.force,
-        )
-    )
-    print(
-        maybe_write_feed(
-            current_entries=current_entries,
-            previous_entries=previous_entries,
-            output_path=RSS_ENTERPRISE_XML,
-            mode="enterprise",
-            limit=args.limit,
-            dataset_lastmod=dataset_lastmod,
-            force=args.force,
-        )
-    )
-    print(
-        maybe_write_feed(
-            current_entries=current_entries,
-            previous_entries=previous_entries,
-            output_path=RSS_SECURITY_CRITICAL_XML,
-            mode="security-critical",
-            limit=args.limit,
-            dataset_lastmod=dataset_lastmod,
-            force=args.force,
+    profiler = start_profiler(args, "generate_rss.py")
+    try:
+        build_feeds(args)
+    finally:
+        finish_profiler(profiler, args.profile_output)
+
+
+def build_feeds(args: argparse.Namespace) -> None:
+    cache = BuildCache()
+    manifest = BuildManifest()
+    meta = read_meta(args.meta)
+    key = build_key(meta, args.current, {"limit": args.limit})
+
+    steps = [(f"rss:{mode}", mode, output_path) for mode, output_path in FEED_OUTPUTS]
+    if args.facets:
+        # Imported here: facet_feeds builds on this module.
+        from facet_feeds import FACET_INDEX_JSON, write_facet_feeds
+
+        steps.append(("rss:facets", "", FACET_INDEX_JSON))
+
+    stale = []
+    for step, mode, output_path in steps:
+        if args.force or args.no_cache or not cache.is_fresh(step, key, [output_path]):
+            stale.append((step, mode, output_path))
+        else:
+            print(f"Skipped {output_path.name}: dataset, code and config unchanged")
+    if not stale:
+        print(save_changed_artifacts())
+        return
+
+    with span("load dataset"):
+        dataset = load_dataset(args.current, args.meta)
+    with span("load previous"):
+        previous_entries = load_patch_entries(args.previous) if args.previous else []
+    ledger = FeedLedger()
+    fragments = FragmentCache(RSS_ITEM_TEMPLATE_VERSION)
+    archives = FeedArchives()
+
+    stale_modes = {mode for _, mode, _ in stale}
+    with span("route feeds"):
+        selections, members = select_feeds(
+            dataset.entries,
+            [feed for feed in FEED_CONFIG.feeds if feed.id in stale_modes],
+            args.limit,
+            ledger,
+            dataset.lastmod,
         )
-    )
+    built_from = {
+        "patches_sha256": str(meta.get("patches_sha256", "")).strip(),
+        "updated_at_utc": dataset.updated_at_utc,
+    }
+    ran: set[str] = set()
+    for step, mode, output_path in stale:
+        with span(step):
+            if step == "rss:facets":
+                message = write_facet_feeds(
+                    entries=dataset.entries,
+                    catalog=dataset.catalog,
+                    previous_entries=previous_entries,
+                    limit=args.limit,
+                    dataset_lastmod=dataset.lastmod,
+                    force=args.force,
+                    ledger=ledger,
+                    incremental=args.incremental,
+                    fragments=fragments,
+                )
+            else:
+                limit = feed_limit(mode, args.limit)
+                inputs = feed_inputs(
+                    mode, selections[mode], limit, ledger, dataset.lastmod
+                )
+                outputs = [
+                    output_path,
+                    *(w.output_path(output_path) for w in FEED_WRITERS),
+                ]
+                if not (args.force or args.no_cache) and manifest.is_fresh(
+                    step, inputs, outputs
+                ):
+                    print(f"Skipped {output_path.name}: declared inputs unchanged")
+                    cache.record(step, key)
+                    continue
+                manifest.record(step, inputs, outputs, built_from)
+                message = maybe_write_feed(
+                    current_entries=dataset.entries,
+                    previous_entries=previous_entries,
+                    output_path=output_path,
+                    mode=mode,
+                    limit=limit,
+                    dataset_lastmod=dataset.lastmod,
+                    force=args.force,
+                    ledger=ledger,
+                    incremental=args.incremental,
+                    fragments=fragments,
+                    selected=selections[mode],
+                    archives=archives,
+                    members=members.get(mode),
+                )
+        print(message)
+        ran.add(step)
+        cache.record(step, key)
+    ledger.save()
+    archives.save()
+    # Feeds this run did not write keep their fragment records.
+    fragments.keep_recorded(lambda mode: feed_step(mode) not in ran)
+    fragments.save()
+    manifest.save()
+    cache.save()
+    print(save_changed_artifacts())
 
 
 if __name__ == "__main__":
@@ -4,7 +4,7 @@
 The sitemap includes:
 - homepage
 - single-product landing URLs (?p=...)
-- the latest patch deep links (?pid=...&pn=...)
+- the latest patch deep links (?pid=...&pn=...); --patch-limit 0 lists all
 
 Metadata included per URL:
 - lastmod
@@ -14,48 +14,31 @@ Metadata included per URL:
 
 from __future__ import annotations
 
-import json
-import re
+import argparse
 from dataclasses import dataclass
-from datetime import date, datetime
-from html import escape
 from pathlib import Path
+from typing import Iterable
 from urllib.parse import quote
 
-BASE_URL = "https://simplepatchfinder.ceddc.dev/"
-ROOT = Path(__file__).resolve().parents[1]
-PATCHES_JSON = ROOT / "patches.json"
-PATCHES_META_JSON = ROOT / "patches.meta.json"
+from artifact_writer import save_changed_artifacts
+from build_cache import BuildCache, build_key
+from build_profile import add_profile_arguments, finish_profiler, span, start_profiler
+from patch_dataset import (
+    BASE_URL,
+    PATCHES_JSON,
+    PATCHES_META_JSON,
+    ROOT,
+    Dataset,
+    load_dataset,
+    parse_isoish,
+    read_meta,
+    slugify_patch_name,
+)
+from xml_stream import XmlWriter, open_output
+
 SITEMAP_XML = ROOT / "sitemap.xml"
 LATEST_PATCH_LIMIT = 10
 
-# Keep this set in sync with js/app.js and scripts/generate_rss.py.
-ENTERPRISE_FAMILY_TOKENS = {
-    "ArcGIS Enterprise",
-    "ArcGIS Server",
-    "Portal for ArcGIS",
-    "ArcGIS Data Store",
-    "ArcGIS GeoEvent Server",
-    "GeoEvent",
-    "ArcGIS Notebook Server",
-    "ArcGIS Mission Server",
-    "ArcGIS Video Server",
-    "ArcGIS Knowledge Server",
-    "ArcGIS Workflow Manager Server",
-    "ArcGIS Image Server",
-    "ArcGIS Web Adaptor (IIS)",
-    "ArcGIS Web Adaptor (Java Platform)",
-    "ArcGIS GeoAnalytics Server",
-    "ArcGIS Data Interoperability for Server",
-    "ArcGIS Maritime for Server",
-    "Maritime Server",
-    "ArcGIS Roads and Highways for Server",
-    "ArcGIS Production Mapping for Server",
-    "ArcGIS Defense Mapping for Server",
-    "Esri Production Mapping for Server",
-    "Esri Defense Mapping for Server",
-}
-
 
 @dataclass(frozen=True)
 class UrlEntry:
@@ -65,60 +48,8 @@ class UrlEntry:
     priority: str = ""
 
 
-def write_text_lf(path: Path, content: str) -> None:
-    # Force Unix newlines even when generated on Windows.
-    with path.open("w", encoding="utf-8", newline="\n") as f:
-        f.write(content)
-
-
-def slugify_patch_name(name: str) -> str:
-    s = (name or "").lower()
-    s = s.replace("&", " and ")
-    s = re.sub(r"[^a-z0-9]+", "-", s)
-    s = re.sub(r"(^-+|-+$)", "", s)
-    return s[:180]
-
-
 def slugify_filter_token(value: str) -> str:
-    s = (value or "").lower()
-    s = s.replace("&", " and ")
-    s = re.sub(r"[^a-z0-9]+", "-", s)
-    s = re.sub(r"(^-+|-+$)", "", s)
-    return s[:180]
-
-
-def tokenize_csv(value: str) -> list[str]:
-    return [t.strip() for t in (value or "").split(",") if t.strip()]
-
-
-def parse_release_date(value: str) -> str:
-    """Convert MM/DD/YYYY to YYYY-MM-DD. Returns empty string if invalid."""
-    m = re.match(r"^(\d{1,2})/(\d{1,2})/(\d{4})$", (value or "").strip())
-    if not m:
-        return ""
-    mm, dd, yyyy = int(m.group(1)), int(m.group(2)), int(m.group(3))
-    try:
-        return date(yyyy, mm, dd).isoformat()
-    except ValueError:
-        return ""
-
-
-def parse_isoish(value: str) -> datetime | None:
-    raw = (value or "").strip()
-    if not raw:
-        return None
-
-    try:
-        if raw.endswith("Z"):
-            raw = raw[:-1] + "+00:00"
-        return datetime.fromisoformat(raw)
-    except ValueError:
-        pass
-
-    try:
-        return datetime.combine(date.fromisoformat(raw), datetime.min.time())
-    except ValueError:
-        return None
+    return slugify_patch_name(value)
 
 
 def newer_lastmod(a: str, b: str) -> str:
@@ -133,91 +64,69 @@ def newer_lastmod(a: str, b: str) -> str:
     return max(a, b)
 
 
-def read_dataset_lastmod() -> str:
-    if not PATCHES_META_JSON.exists():
-        return ""
-    try:
-        meta = json.loads(PATCHES_META_JSON.read_text(encoding="utf-8"))
-        return str(meta.get("updated_at_utc", "")).strip()
-    except Exception:
-        return ""
+def write_urlset(path: Path, entries: Iterable[UrlEntry]) -> None:
+    with open_output(path) as out:
+        xml = XmlWriter(out)
+        xml.line('<?xml version="1.0" encoding="UTF-8"?>')
+        xml.line('<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">')
+        for e in entries:
+            xml.line("  <url>")
+            xml.element("    ", "loc", e.loc)
+            if e.lastmod:
+                xml.element("    ", "lastmod", e.lastmod)
+            if e.changefreq:
+                xml.element("    ", "changefreq", e.changefreq)
+            if e.priority:
+                xml.element("    ", "priority", e.priority)
+            xml.line("  </url>")
+        xml.line("</urlset>")
+
+
+def build_entries_from_dataset(
+    dataset: Dataset, patch_limit: int = LATEST_PATCH_LIMIT
+) -> list[UrlEntry]:
+    families = dataset.catalog.taxonomy.families
+    dataset_lastmod = dataset.updated_at_utc
+    product_lastmods: dict[str, str] = {}
+    patch_entries: dict[str, UrlEntry] = {}
+    # Aggregate product selections (e.g. "ArcGIS Enterprise") by family label.
+    family_lastmods: dict[str, str] = {}
 
+    for record in dataset.records:
+        rel = record.release_date_iso or dataset_lastmod
+        products = record.products_tokens
 
-def write_urlset(path: Path, entries: list[UrlEntry]) -> None:
-    lines = [
-        '<?xml version="1.0" encoding="UTF-8"?>',
-        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">',
-    ]
-
-    for e in entries:
-        lines.append("  <url>")
-        lines.append(f"    <loc>{escape(e.loc, quote=False)}</loc>")
-        if e.lastmod:
-            lines.append(f"    <lastmod>{escape(e.lastmod, quote=False)}</lastmod>")
-        if e.changefreq:
-            lines.append(
-                f"    <changefreq>{escape(e.changefreq, quote=False)}</changefreq>"
+        for prod in products:
+            product_lastmods[prod] = newer_lastmod(
+                product_lastmods.get(prod, ""), rel
             )
-        if e.priority:
-            lines.append(f"    <priority>{escape(e.priority, quote=False)}</priority>")
-        lines.append("  </url>")
-
-    lines.append("</urlset>")
-    write_text_lf(path, "\n".join(lines) + "\n")
 
+        if record.family_mask:
+            for family in families:
+                if record.family_mask & family.bit:
+                    family_lastmods[family.label] = newer_lastmod(
+                        family_lastmods.get(family.label, ""), rel
+                    )
 
-def build_entries() -> list[UrlEntry]:
-    raw = json.loads(PATCHES_JSON.read_text(encoding="utf-8"))
-    groups = raw.get("Product") if isinstance(raw, dict) else []
-    groups = groups if isinstance(groups, list) else []
+        if not record.qfe_id:
+            continue
 
-    dataset_lastmod = read_dataset_lastmod()
-    product_lastmods: dict[str, str] = {}
-    patch_entries: dict[str, UrlEntry] = {}
-    enterprise_lastmod = ""
-
-    for g in groups:
-        patches = g.get("patches") if isinstance(g, dict) else []
-        patches = patches if isinstance(patches, list) else []
-        for p in patches:
-            if not isinstance(p, dict):
-                continue
-
-            rel = parse_release_date(str(p.get("ReleaseDate", ""))) or dataset_lastmod
-            products = tokenize_csv(str(p.get("Products", "")))
-
-            for prod in products:
-                if not prod:
-                    continue
-                product_lastmods[prod] = newer_lastmod(
-                    product_lastmods.get(prod, ""), rel
-                )
-
-            if any(prod in ENTERPRISE_FAMILY_TOKENS for prod in products):
-                enterprise_lastmod = newer_lastmod(enterprise_lastmod, rel)
-
-            pid = str(p.get("QFE_ID", "")).strip()
-            name = str(p.get("Name", "")).strip()
-            if not pid:
-                continue
-
-            pn = slugify_patch_name(name)
-            loc = f"{BASE_URL}?pid={quote(pid, safe='')}&pn={quote(pn, safe='')}"
-            current = patch_entries.get(loc)
-            if current is None:
-                patch_entries[loc] = UrlEntry(
-                    loc=loc,
-                    lastmod=rel,
-                    changefreq="monthly",
-                    priority="0.7",
-                )
-            else:
-                patch_entries[loc] = UrlEntry(
-                    loc=loc,
-                    lastmod=newer_lastmod(current.lastmod, rel),
-                    changefreq=current.changefreq,
-                    priority=current.priority,
-                )
+        loc = record.permalink
+        current = patch_entries.get(loc)
+        if current is None:
+            patch_entries[loc] = UrlEntry(
+                loc=loc,
+                lastmod=rel,
+                changefreq="monthly",
+                priority="0.7",
+            )
+        else:
+            patch_entries[loc] = UrlEntry(
+                loc=loc,
+                lastmod=newer_lastmod(current.lastmod, rel),
+                changefreq=current.changefreq,
+                priority=current.priority,
+            )
 
     entries: list[UrlEntry] = [
         UrlEntry(
@@ -228,8 +137,7 @@ def build_entries() -> list[UrlEntry]:
         )
     ]
 
-    if enterprise_lastmod:
-        product_lastmods["ArcGIS Enterprise"] = enterprise_lastmod
+    product_lastmods.update(family_lastmods)
 
     for prod in sorted(product_lastmods):
         pslug = slugify_filter_token(prod)
@@ -248,14 +156,78 @@ def build_entries() -> list[UrlEntry]:
         patch_entries.values(),
         key=lambda entry: (entry.lastmod, entry.loc),
         reverse=True,
-    )[:LATEST_PATCH_LIMIT]
+    )
+    if patch_limit > 0:
+        latest_patch_entries = latest_patch_entries[:patch_limit]
     entries.extend(latest_patch_entries)
     return entries
 
 
+def build_entries(
+    patches_path: Path = PATCHES_JSON,
+    meta_path: Path = PATCHES_META_JSON,
+    patch_limit: int = LATEST_PATCH_LIMIT,
+) -> list[UrlEntry]:
+    return build_entries_from_dataset(load_dataset(patches_path, meta_path), patch_limit)
+
+
+def write_sitemap(
+    dataset: Dataset, path: Path = SITEMAP_XML, patch_limit: int = LATEST_PATCH_LIMIT
+) -> str:
+    with span("sitemap entries"):
+        entries = build_entries_from_dataset(dataset, patch_limit)
+    with span("write sitemap"):
+        write_urlset(path, entries)
+    return f"Wrote {path.name}: {len(entries)} urls"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=SITEMAP_XML,
+        help="Sitemap path (a .gz suffix writes it gzip-compressed)",
+    )
+    parser.add_argument(
+        "--patch-limit",
+        type=int,
+        default=LATEST_PATCH_LIMIT,
+        help="Latest patch permalinks to list (0 lists every patch)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Regenerate even if the build cache says nothing changed",
+    )
+    add_profile_arguments(parser)
+    return parser.parse_args()
+
+
 def main() -> None:
-    entries = build_entries()
-    write_urlset(SITEMAP_XML, entries)
+    args = parse_args()
+    cache = BuildCache()
+    # With default options the step and key match build_all.py's sitemap
+    # step; other options get a step of their own so they do not evict it.
+    config: dict[str, object] = {}
+    step = "sitemap"
+    if args.output != SITEMAP_XML or args.patch_limit != LATEST_PATCH_LIMIT:
+        config = {"output": str(args.output), "patch_limit": args.patch_limit}
+        step = f"sitemap:{args.output}:{args.patch_limit}"
+    key = build_key(read_meta(PATCHES_META_JSON), PATCHES_JSON, config)
+    if not args.no_cache and cache.is_fresh(step, key, [args.output]):
+        print(f"Skipped {args.output.name}: dataset, code and config unchanged")
+    else:
+        profiler = start_profiler(args, "generate_sitemap.py")
+        try:
+            with span("load dataset"):
+                dataset = load_dataset()
+            print(write_sitemap(dataset, args.output, args.patch_limit))
+        finally:
+            finish_profiler(profiler, args.profile_output)
+        cache.record(step, key)
+        cache.save()
+    print(save_changed_artifacts())
 
 
 if __name__ == "__main__":
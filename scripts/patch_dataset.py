@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""Shared, normalized in-memory model of patches.json for the generators.
+
+Every generator used to re-read patches.json, re-tokenize ``Products`` and
+re-slugify every patch name on its own. This module does that work once:
+``load_dataset`` streams the upstream file and returns a ``Dataset`` whose
+``PatchEntry`` records carry the parsed release date, product tokens and
+canonical permalink, ready to be shared by the sitemap and RSS generators.
+
+Records are kept compact so multi-snapshot histories fit in memory:
+``PatchEntry`` uses ``__slots__``, repeated strings (versions, dates,
+criticality, product and platform tokens) are interned, and products,
+versions and platforms are dictionary-encoded into integer ids through the
+dataset's ``Catalog``. Identical ``Products``/``Platform`` strings share one
+token tuple. Product ids start from the stable ids of the product taxonomy
+(taxonomy.py), and each entry carries its product-family bitmask.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import sys
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable
+from urllib.parse import quote
+
+from artifact_writer import write_text_atomic
+from build_profile import span
+from patch_stream import iter_patch_records
+
+if TYPE_CHECKING:
+    from taxonomy import Taxonomy
+
+BASE_URL = "https://simplepatchfinder.ceddc.dev/"
+ROOT = Path(__file__).resolve().parents[1]
+PATCHES_JSON = ROOT / "patches.json"
+PATCHES_META_JSON = ROOT / "patches.meta.json"
+# Build state that must survive between workflow runs (committed, not served).
+BUILD_DIR = ROOT / ".build"
+# Feed item GUIDs are this prefix plus a SHA-256 hex digest of the entry key.
+GUID_PREFIX = "urn:simple-patch-finder:"
+
+
+class StringTable:
+    """Dictionary encoding: every distinct string gets a stable integer id."""
+
+    __slots__ = ("_ids", "values")
+
+    def __init__(self) -> None:
+        self._ids: dict[str, int] = {}
+        self.values: list[str] = []
+
+    def encode(self, value: str) -> int:
+        value_id = self._ids.get(value)
+        if value_id is None:
+            value_id = len(self.values)
+            value = sys.intern(value)
+            self._ids[value] = value_id
+            self.values.append(value)
+        return value_id
+
+    def decode(self, value_id: int) -> str:
+        return self.values[value_id]
+
+    def get(self, value: str) -> int | None:
+        return self._ids.get(value)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class Catalog:
+    """Per-dataset dictionaries for versions, products and platforms."""
+
+    __slots__ = (
+        "versions",
+        "products",
+        "platforms",
+        "taxonomy",
+        "_product_csv",
+        "_platform_csv",
+        "_family_masks",
+    )
+
+    def __init__(self, taxonomy: Taxonomy | None = None) -> None:
+        if taxonomy is None:
+            # Imported here: taxonomy builds on this module.
+            from taxonomy import default_taxonomy
+
+            taxonomy = default_taxonomy()
+        self.taxonomy = taxonomy
+        self.versions = StringTable()
+        self.products = StringTable()
+        self.platforms = StringTable()
+        for token in taxonomy.products:
+            self.products.encode(token)
+        # Raw CSV value -> (token tuple, id tuple), shared by every record.
+        self._product_csv: dict[str, tuple[tuple[str, ...], tuple[int, ...]]] = {}
+        self._platform_csv: dict[str, tuple[tuple[str, ...], tuple[int, ...]]] = {}
+        self._family_masks: dict[str, int] = {}
+
+    @staticmethod
+    def _tokens(
+        table: StringTable,
+        cache: dict[str, tuple[tuple[str, ...], tuple[int, ...]]],
+        raw: str,
+    ) -> tuple[tuple[str, ...], tuple[int, ...]]:
+        cached = cache.get(raw)
+        if cached is None:
+            ids = tuple(table.encode(token) for token in tokenize_csv(raw))
+            cached = (tuple(table.values[i] for i in ids), ids)
+            cache[raw] = cached
+        return cached
+
+    def product_tokens(self, raw: str) -> tuple[tuple[str, ...], tuple[int, ...]]:
+        return self._tokens(self.products, self._product_csv, raw)
+
+    def platform_tokens(self, raw: str) -> tuple[tuple[str, ...], tuple[int, ...]]:
+        return self._tokens(self.platforms, self._platform_csv, raw)
+
+    def family_mask(self, raw: str) -> int:
+        """OR of the family bits of every product token in a Products value."""
+        mask = self._family_masks.get(raw)
+        if mask is None:
+            mask = self.taxonomy.mask(self.product_tokens(raw)[0])
+            self._family_masks[raw] = mask
+        return mask
+
+
+@lru_cache(maxsize=None)
+def default_catalog() -> Catalog:
+    """Catalog shared by records normalized without one of their own."""
+    return Catalog()
+
+
+@dataclass(frozen=True, slots=True)
+class PatchEntry:
+    name: str
+    qfe_id: str
+    version: str
+    critical_kind: str
+    release_date_text: str
+    release_date_iso: str
+    release_ordinal: int
+    products_tokens: tuple[str, ...]
+    platform_tokens: tuple[str, ...]
+    patch_page_url: str
+    permalink: str
+    version_id: int = -1
+    product_ids: tuple[int, ...] = ()
+    platform_ids: tuple[int, ...] = ()
+    family_mask: int = 0
+
+    @property
+    def key(self) -> str:
+        # Derived on demand rather than stored: it is as long as the fields
+        # it joins and is only needed for de-duplication and GUIDs. The fields
+        # are already stripped, so this equals identity_key() on them.
+        return "\x1f".join(
+            (
+                self.qfe_id,
+                self.version,
+                self.name,
+                self.release_date_text,
+                self.patch_page_url,
+            )
+        )
+
+
+@dataclass(frozen=True)
+class Dataset:
+    # Every patch record in upstream order, duplicates included.
+    records: list[PatchEntry]
+    # Records de-duplicated on their identity key, first occurrence wins.
+    entries: list[PatchEntry]
+    meta: dict
+    catalog: Catalog = field(default_factory=Catalog)
+
+    @property
+    def updated_at_utc(self) -> str:
+        return str(self.meta.get("updated_at_utc", "")).strip()
+
+    @property
+    def lastmod(self) -> datetime | None:
+        return parse_isoish(self.updated_at_utc)
+
+
+def write_text_lf(path: Path, content: str) -> None:
+    # Unix newlines, written atomically and only when the bytes change.
+    write_text_atomic(path, content)
+
+
+def guid_digest(guid: str) -> str:
+    """The bare hex digest of a feed item GUID, as build state stores it."""
+    return guid[len(GUID_PREFIX) :] if guid.startswith(GUID_PREFIX) else guid
+
+
+def tokenize_csv(value: str) -> list[str]:
+    return [t.strip() for t in (value or "").split(",") if t.strip()]
+
+
+def slugify_patch_name(name: str) -> str:
+    s = (name or "").lower()
+    s = s.replace("&", " and ")
+    s = re.sub(r"[^a-z0-9]+", "-", s)
+    s = re.sub(r"(^-+|-+$)", "", s)
+    return s[:180]
+
+
+def parse_release_date(value: str) -> date | None:
+    m = re.match(r"^(\d{1,2})/(\d{1,2})/(\d{4})$", (value or "").strip())
+    if not m:
+        return None
+    mm, dd, yyyy = int(m.group(1)), int(m.group(2)), int(m.group(3))
+    try:
+        return date(yyyy, mm, dd)
+    except ValueError:
+        return None
+
+
+def classify_critical(raw: object) -> str:
+    value = str(raw if raw is not None else "").strip().lower()
+    if value == "security":
+        return "security"
+    if value == "true":
+        return "critical"
+    return "standard"
+
+
+def parse_isoish(value: str) -> datetime | None:
+    raw = (value or "").strip()
+    if not raw:
+        return None
+    try:
+        if raw.endswith("Z"):
+            raw = raw[:-1] + "+00:00"
+        dt = datetime.fromisoformat(raw)
+        return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+
+
+def canonical_patch_url(qfe_id: str, name: str) -> str:
+    return f"{BASE_URL}?pid={quote(qfe_id, safe='')}&pn={quote(slugify_patch_name(name), safe='')}"
+
+
+def identity_key(
+    qfe_id: str, version: str, name: str, release_date: str, patch_page_url: str
+) -> str:
+    return "\x1f".join(
+        [
+            str(qfe_id or "").strip(),
+            str(version or "").strip(),
+            str(name or "").strip(),
+            str(release_date or "").strip(),
+            str(patch_page_url or "").strip(),
+        ]
+    )
+
+
+def normalize_record(
+    version: str, patch: dict, catalog: Catalog | None = None
+) -> PatchEntry:
+    catalog = catalog if catalog is not None else default_catalog()
+    qfe_id = str(patch.get("QFE_ID", "")).strip()
+    name = str(patch.get("Name", "")).strip()
+    release_date_text = sys.intern(str(patch.get("ReleaseDate", "")).strip())
+    patch_page_url = str(patch.get("url", "")).strip()
+    release_date = parse_release_date(release_date_text)
+    version_id = catalog.versions.encode(version)
+    products_raw = str(patch.get("Products", ""))
+    products_tokens, product_ids = catalog.product_tokens(products_raw)
+    platform_tokens, platform_ids = catalog.platform_tokens(str(patch.get("Platform", "")))
+
+    return PatchEntry(
+        name=name,
+        qfe_id=qfe_id,
+        version=catalog.versions.decode(version_id),
+        critical_kind=classify_critical(patch.get("Critical")),
+        release_date_text=release_date_text,
+        release_date_iso=sys.intern(release_date.isoformat()) if release_date else "",
+        release_ordinal=release_date.toordinal() if release_date else -1,
+        products_tokens=products_tokens,
+        platform_tokens=platform_tokens,
+        patch_page_url=patch_page_url,
+        permalink=canonical_patch_url(qfe_id, name) if qfe_id else BASE_URL,
+        version_id=version_id,
+        product_ids=product_ids,
+        platform_ids=platform_ids,
+        family_mask=catalog.family_mask(products_raw),
+    )
+
+
+def dedupe_entries(records: Iterable[PatchEntry]) -> list[PatchEntry]:
+    deduped: dict[str, PatchEntry] = {}
+    for record in records:
+        deduped.setdefault(record.key, record)
+    return list(deduped.values())
+
+
+def load_records(path: Path, catalog: Catalog | None = None) -> list[PatchEntry]:
+    if not path.exists():
+        return []
+    catalog = catalog if catalog is not None else default_catalog()
+    return [
+        normalize_record(version, patch, catalog)
+        for version, patch in iter_patch_records(path)
+    ]
+
+
+def load_patch_entries(path: Path) -> list[PatchEntry]:
+    return dedupe_entries(load_records(path))
+
+
+def read_meta(meta_path: Path) -> dict:
+    if not meta_path.exists():
+        return {}
+    try:
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+    return meta if isinstance(meta, dict) else {}
+
+
+def load_dataset(
+    patches_path: Path = PATCHES_JSON, meta_path: Path = PATCHES_META_JSON
+) -> Dataset:
+    catalog = Catalog()
+    with span("parse patches.json"):
+        records = load_records(patches_path, catalog)
+    with span("dedupe entries"):
+        entries = dedupe_entries(records)
+    return Dataset(
+        records=records,
+        entries=entries,
+        meta=read_meta(meta_path),
+        catalog=catalog,
+    )
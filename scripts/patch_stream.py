@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""Incremental reader for the upstream patches.json document.
+
+The upstream file has the shape ``{"Product": [{"version": ..., "patches":
+[...]}, ...]}``. Instead of materialising the whole tree with ``json.loads``,
+this module walks the outer structure by hand and only hands individual patch
+objects to ``json.JSONDecoder.raw_decode``. Peak memory is therefore bounded by
+the read buffer plus the largest single patch record, not by the dataset size.
+
+Only the standard library is used.
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Iterator, TextIO
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+_WHITESPACE = " \t\n\r"
+
+
+class _Reader:
+    """Buffered cursor over a text stream that decodes one JSON value at a time."""
+
+    def __init__(self, fh: TextIO, chunk_size: int) -> None:
+        self.fh = fh
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self, size: int) -> bool:
+        if self.eof:
+            return False
+        data = self.fh.read(size)
+        if not data:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos :] + data
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            buf, pos = self.buf, self.pos
+            n = len(buf)
+            while pos < n and buf[pos] in _WHITESPACE:
+                pos += 1
+            self.pos = pos
+            if pos < n:
+                return buf[pos]
+            if not self._fill(self.chunk_size):
+                return ""
+
+    def expect(self, ch: str) -> None:
+        got = self.peek()
+        if got != ch:
+            raise ValueError(f"Expected {ch!r} at offset {self.pos}, got {got!r}")
+        self.pos += 1
+
+    def value(self) -> object:
+        self.peek()
+        size = self.chunk_size
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill(size):
+                    raise
+                size *= 2
+                continue
+            # A number (or literal) that ends exactly at the buffer edge may
+            # continue in the next chunk.
+            if end == len(self.buf) and not self.eof and self._fill(size):
+                size *= 2
+                continue
+            self.pos = end
+            return obj
+
+    def iter_object_keys(self) -> Iterator[str]:
+        """Yield each key of the object at the cursor.
+
+        The caller must consume the member value before advancing the iterator.
+        """
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(":")
+            yield str(key)
+            sep = self.peek()
+            self.pos += 1
+            if sep == "}":
+                return
+            if sep != ",":
+                raise ValueError(f"Expected ',' or '}}' at offset {self.pos - 1}")
+
+    def iter_array(self) -> Iterator[None]:
+        """Yield once per element of the array at the cursor.
+
+        The caller must consume the element before advancing the iterator.
+        """
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield None
+            sep = self.peek()
+            self.pos += 1
+            if sep == "]":
+                return
+            if sep != ",":
+                raise ValueError(f"Expected ',' or ']' at offset {self.pos - 1}")
+
+
+def _iter_group(reader: _Reader) -> Iterator[tuple[str, dict]]:
+    if reader.peek() != "{":
+        reader.value()
+        return
+
+    version = ""
+    version_seen = False
+    pending: list[dict] = []
+    for key in reader.iter_object_keys():
+        if key == "version":
+            version = str(reader.value()).strip()
+            version_seen = True
+        elif key == "patches" and reader.peek() == "[":
+            for _ in reader.iter_array():
+                patch = reader.value()
+                if not isinstance(patch, dict):
+                    continue
+                if version_seen:
+                    yield version, patch
+                else:
+                    # "version" normally precedes "patches"; buffer this group
+                    # only when the upstream key order is unusual.
+                    pending.append(patch)
+        else:
+            reader.value()
+
+    for patch in pending:
+        yield version, patch
+
+
+def iter_patch_records(
+    path: Path, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[tuple[str, dict]]:
+    """Yield ``(version, patch)`` for every patch object in a patches.json file.
+
+    ``version`` is the stripped parent ``Product[].version``. Non-object
+    patches and malformed groups are skipped, mirroring the tolerant
+    ``json.loads`` based loaders.
+    """
+    with path.open("r", encoding="utf-8") as fh:
+        reader = _Reader(fh, chunk_size)
+        if reader.peek() != "{":
+            return
+        for key in reader.iter_object_keys():
+            if key == "Product" and reader.peek() == "[":
+                for _ in reader.iter_array():
+                    yield from _iter_group(reader)
+            else:
+                reader.value()
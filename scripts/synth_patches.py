@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""Generate a synthetic, upstream-shaped patches.json for scale testing.
+
+The real patches.json is used as a profile: every synthetic patch copies the
+product list, platform, criticality, file count and checksum layout of a
+randomly drawn real patch of the same version group, and gets a release date
+near that patch's date. Version group sizes follow the real ones and patches
+repeated inside a group (the same QFE_ID listed twice upstream) are re-emitted
+at the real rate, so dedupe_entries has the same work to do.
+
+Names, QFE_IDs, URLs, file names and checksums are generated and unique per
+patch. The output only depends on --seed, --count and the profile.
+
+Examples:
+    python3 scripts/synth_patches.py --count 10k --output .tmp/patches-10k.json
+    python3 scripts/synth_patches.py --count 1M --seed 7 \\
+        --output .tmp/patches-1m.json --meta .tmp/patches-1m.meta.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import hashlib
+import json
+import random
+import re
+from collections import deque
+from datetime import date, timedelta
+from pathlib import Path
+
+from patch_dataset import PATCHES_JSON
+
+DATE_FORMAT = "%m/%d/%Y"
+DATE_JITTER_DAYS = 45
+DUPLICATE_WINDOW = 256
+COUNT_SUFFIXES = {"k": 1_000, "m": 1_000_000}
+FILE_HOST = "https://gisupdates.esri.com/QFE"
+PAGE_HOST = "https://support.esri.com/en-us/patches-updates"
+
+
+def parse_count(value: str) -> int:
+    """10000, 10k, 1M -> patch count."""
+    text = value.strip().lower().replace("_", "")
+    scale = COUNT_SUFFIXES.get(text[-1:], 1)
+    number = text[:-1] if scale != 1 else text
+    try:
+        count = int(float(number) * scale)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid count: {value}") from None
+    if count < 1:
+        raise argparse.ArgumentTypeError("count must be positive")
+    return count
+
+
+def _parse_date(value: str) -> date | None:
+    try:
+        month, day, year = (int(part) for part in value.split("/"))
+        return date(year, month, day)
+    except (AttributeError, ValueError):
+        return None
+
+
+class Profile:
+    """Real patches grouped by version, with the observed duplicate rate."""
+
+    def __init__(self, source: Path) -> None:
+        raw = json.loads(source.read_text(encoding="utf-8"))
+        groups = raw.get("Product") if isinstance(raw, dict) else None
+        self.groups: list[tuple[str, list[dict]]] = []
+        duplicates = total = 0
+        latest = None
+        for group in groups if isinstance(groups, list) else []:
+            if not isinstance(group, dict):
+                continue
+            patches = [p for p in group.get("patches") or [] if isinstance(p, dict)]
+            if not patches:
+                continue
+            seen: set[str] = set()
+            for patch in patches:
+                qfe_id = str(patch.get("QFE_ID") or "")
+                duplicates += qfe_id in seen
+                seen.add(qfe_id)
+                released = _parse_date(str(patch.get("ReleaseDate") or ""))
+                if released and (latest is None or released > latest):
+                    latest = released
+            total += len(patches)
+            self.groups.append((str(group.get("version") or ""), patches))
+        if not total:
+            raise SystemExit(f"No patches in profile {source}")
+        self.duplicate_rate = duplicates / total
+        self.latest = latest or date.today()
+        # Cumulative group sizes, to draw a version with its real frequency.
+        self.cumulative = []
+        running = 0
+        for _, patches in self.groups:
+            running += len(patches)
+            self.cumulative.append(running)
+
+    def group_counts(self, rng: random.Random, count: int) -> list[int]:
+        """Split count patches over the version groups by their real share."""
+        counts = [0] * len(self.groups)
+        total = self.cumulative[-1]
+        for _ in range(count):
+            counts[bisect.bisect_right(self.cumulative, rng.randrange(total))] += 1
+        return counts
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
+
+
+def _file_name(path: str) -> str:
+    return path.rsplit("/", 1)[-1]
+
+
+def _extension(name: str) -> str:
+    for extension in (".tar.gz", ".msp", ".tar", ".exe", ".zip"):
+        if name.endswith(extension):
+            return extension
+    return ".msp"
+
+
+def synth_patch(
+    rng: random.Random, profile: Profile, template: dict, version: str, serial: int
+) -> dict:
+    compact = version.replace(".", "")
+    prefix = str(template.get("QFE_ID") or "QFE").split("-", 1)[0] or "QFE"
+    qfe_id = f"{prefix}-{compact}-P-{serial}"
+    name = f"{template.get('Name') or 'ArcGIS Patch'} S{serial}"
+
+    released = _parse_date(str(template.get("ReleaseDate") or "")) or profile.latest
+    released += timedelta(days=rng.randint(-DATE_JITTER_DAYS, DATE_JITTER_DAYS))
+    released = min(released, profile.latest)
+
+    files = []
+    for i, path in enumerate(template.get("PatchFiles") or []):
+        extension = _extension(_file_name(str(path)))
+        files.append(
+            f"{FILE_HOST}/{qfe_id}/ArcGIS-{compact}-{prefix}-Patch-{i + 1}{extension}"
+        )
+    names = [_file_name(path) for path in files] or [
+        f"ArcGIS-{compact}-{prefix}-Patch.msp"
+    ]
+
+    def sums(template_sums: object, bits: int) -> list[str]:
+        return [
+            f"{names[i % len(names)]}:{rng.getrandbits(bits):0{bits // 4}X}"
+            for i in range(
+                len(template_sums) if isinstance(template_sums, list) else 0
+            )
+        ]
+
+    return {
+        "Name": name,
+        "Products": template.get("Products", ""),
+        "Platform": template.get("Platform", ""),
+        "url": f"{PAGE_HOST}/{released.year}/{_slug(name)}",
+        "QFE_ID": qfe_id,
+        "ReleaseDate": released.strftime(DATE_FORMAT),
+        "Critical": template.get("Critical", ""),
+        "PatchFiles": files,
+        "SHA256sums": sums(template.get("SHA256sums"), 256),
+        "MD5sums": sums(template.get("MD5sums"), 128),
+    }
+
+
+def write_synthetic_dataset(
+    profile: Profile, count: int, seed: int, output: Path
+) -> int:
+    """Stream count patches (duplicates included) to output; return its size."""
+    rng = random.Random(seed)
+    counts = profile.group_counts(rng, count)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    serial = 0
+    with output.open("w", encoding="utf-8", newline="\n") as f:
+        f.write('{"Product":[')
+        first_group = True
+        for (version, templates), size in zip(profile.groups, counts):
+            if not size:
+                continue
+            if not first_group:
+                f.write(",")
+            first_group = False
+            f.write(json.dumps({"version": version}, separators=(",", ":"))[:-1])
+            f.write(',"patches":[')
+            # Upstream repeats are close together; draw them from recent patches.
+            emitted: deque[str] = deque(maxlen=DUPLICATE_WINDOW)
+            for i in range(size):
+                if emitted and rng.random() < profile.duplicate_rate:
+                    record = rng.choice(emitted)
+                else:
+                    serial += 1
+                    template = rng.choice(templates)
+                    record = json.dumps(
+                        synth_patch(rng, profile, template, version, serial),
+                        separators=(",", ":"),
+                    )
+                    emitted.append(record)
+                f.write(record if i == 0 else f",{record}")
+            f.write("]}")
+        f.write("]}")
+    return output.stat().st_size
+
+
+def write_meta(path: Path, output: Path, updated_at_utc: str) -> None:
+    digest = hashlib.sha256()
+    with output.open("rb") as f:
+        while chunk := f.read(1 << 20):
+            digest.update(chunk)
+    meta = {
+        "source_url": f"synthetic:{output.name}",
+        "updated_at_utc": updated_at_utc,
+        "checked_at_utc": updated_at_utc,
+        "patches_sha256": digest.hexdigest(),
+        "bytes": output.stat().st_size,
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(meta, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--count",
+        type=parse_count,
+        default=parse_count("10k"),
+        help="Number of patches, e.g. 10k, 100k or 1M (default: 10k)",
+    )
+    parser.add_argument("--seed", type=int, default=1, help="Random seed (default: 1)")
+    parser.add_argument(
+        "--profile",
+        type=Path,
+        default=PATCHES_JSON,
+        help="Real patches.json whose distributions are followed",
+    )
+    parser.add_argument(
+        "--output", type=Path, required=True, help="Output patches.json path"
+    )
+    parser.add_argument(
+        "--meta",
+        type=Path,
+        default=None,
+        help="Also write a matching patches.meta.json",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    profile = Profile(args.profile)
+    size = write_synthetic_dataset(profile, args.count, args.seed, args.output)
+    if args.meta:
+        updated = f"{profile.latest.isoformat()}T00:00:00Z"
+        write_meta(args.meta, args.output, updated)
+    print(
+        f"Wrote {args.output}: {args.count} patches, "
+        f"{size / 1e6:.1f} MB (seed {args.seed})"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Stable product ids and product-family bitmasks, shared with the browser.
+
+Every product token gets an integer id that never changes once assigned: ids
+are read back from the committed taxonomy.json and new tokens are appended.
+Each product family declared in scripts/feeds.json owns one bit, and every
+product token maps to the mask of the families that contain it. The dataset
+Catalog seeds its product ids from here and stores the OR of a patch's token
+masks on ``PatchEntry.family_mask``, so family checks are one bitwise AND.
+
+taxonomy.json publishes the same ids, bits and masks so js/app.js classifies
+patches with identical precomputed masks instead of its own token list.
+"""
+
+from __future__ import annotations
+
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable
+
+from feed_config import ProductFamily, load_feed_config
+from patch_dataset import ROOT, Catalog, write_text_lf
+
+TAXONOMY_JSON = ROOT / "taxonomy.json"
+TAXONOMY_VERSION = 1
+
+
+class Taxonomy:
+    __slots__ = ("families", "products", "product_masks")
+
+    def __init__(self, families: Iterable[ProductFamily], products: Iterable[str] = ()) -> None:
+        self.families = sorted(families, key=lambda family: family.bit)
+        # Stable id order: previously published products first, then any
+        # family member not seen before.
+        self.products: list[str] = list(dict.fromkeys(products))
+        known = set(self.products)
+        self.product_masks: dict[str, int] = {}
+        for family in self.families:
+            for token in sorted(family.products):
+                self.product_masks[token] = self.product_masks.get(token, 0) | family.bit
+                if token not in known:
+                    known.add(token)
+                    self.products.append(token)
+
+    def family_bit(self, name: str) -> int:
+        for family in self.families:
+            if family.name == name:
+                return family.bit
+        raise ValueError(f"Unknown product family: {name}")
+
+    def mask(self, products_tokens: Iterable[str]) -> int:
+        mask = 0
+        for token in products_tokens:
+            mask |= self.product_masks.get(token, 0)
+        return mask
+
+    def to_json(self, products: list[str]) -> dict:
+        """Serializable taxonomy; products[i] is the token with id i."""
+        return {
+            "version": TAXONOMY_VERSION,
+            "families": [
+                {"name": family.name, "label": family.label, "bit": family.bit}
+                for family in self.families
+            ],
+            "products": products,
+            "masks": [self.product_masks.get(token, 0) for token in products],
+        }
+
+
+def read_published_products(path: Path = TAXONOMY_JSON) -> list[str]:
+    try:
+        raw = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return []
+    if not isinstance(raw, dict) or raw.get("version") != TAXONOMY_VERSION:
+        return []
+    products = raw.get("products")
+    if not isinstance(products, list):
+        return []
+    return [str(token) for token in products]
+
+
+def load_taxonomy(path: Path = TAXONOMY_JSON) -> Taxonomy:
+    return Taxonomy(load_feed_config().families.values(), read_published_products(path))
+
+
+@lru_cache(maxsize=None)
+def default_taxonomy() -> Taxonomy:
+    return load_taxonomy()
+
+
+def write_taxonomy(catalog: Catalog, path: Path = TAXONOMY_JSON) -> str:
+    """Publish every product id the catalog assigned, including new tokens."""
+    taxonomy = catalog.taxonomy
+    products = list(catalog.products.values)
+    write_text_lf(
+        path,
+        json.dumps(taxonomy.to_json(products), indent=2, ensure_ascii=False) + "\n",
+    )
+    return (
+        f"Wrote {path.name}: {len(products)} products, "
+        f"{len(taxonomy.families)} families"
+    )
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Streaming output for the generated XML and JSON files.
+
+Generators used to collect every line in a list and join it before a single
+write, so peak memory grew with the number of items. ``XmlWriter`` instead
+writes escaped elements and pre-rendered chunks straight to a buffered file
+handle as they are produced.
+
+A path ending in ``.gz`` is written gzip-compressed (with a zero mtime, so the
+bytes are reproducible) and read back transparently by ``read_output`` and
+``open_input``. Outputs are committed atomically and left untouched when
+their bytes did not change (see artifact_writer.py).
+"""
+
+from __future__ import annotations
+
+import gzip
+import io
+from contextlib import contextmanager
+from html import escape
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, TextIO
+
+from artifact_writer import AtomicFile
+
+BUFFER_SIZE = 1 << 16
+
+
+def is_gzip_path(path: Path) -> bool:
+    return path.suffix == ".gz"
+
+
+@contextmanager
+def open_output(path: Path) -> Iterator[TextIO]:
+    """Buffered UTF-8 text output with Unix newlines, gzipped for *.gz paths.
+
+    Written through an AtomicFile: the target is only replaced, atomically,
+    when the block completes and the bytes differ from the existing file.
+    """
+    target = AtomicFile(path)
+    try:
+        compressed = None
+        binary: BinaryIO = target
+        if is_gzip_path(path):
+            compressed = binary = gzip.GzipFile(
+                filename=path.name[:-3], mode="wb", fileobj=target, mtime=0
+            )
+        out = io.TextIOWrapper(
+            io.BufferedWriter(binary, BUFFER_SIZE), encoding="utf-8", newline="\n"
+        )
+        yield out
+        out.flush()
+        if compressed is not None:
+            # Writes the gzip trailer; GzipFile leaves target open.
+            compressed.close()
+    except BaseException:
+        target.abort()
+        raise
+    target.commit()
+
+
+def open_input(path: Path) -> BinaryIO:
+    return gzip.open(path, "rb") if is_gzip_path(path) else path.open("rb")
+
+
+def read_output(path: Path) -> str:
+    with open_input(path) as f:
+        return f.read().decode("utf-8")
+
+
+class XmlWriter:
+    """Write XML line by line; every line ends with a newline."""
+
+    def __init__(self, out: TextIO) -> None:
+        self.out = out
+
+    def line(self, text: str) -> None:
+        self.out.write(text)
+        self.out.write("\n")
+
+    def lines(self, texts: Iterable[str]) -> None:
+        for text in texts:
+            self.line(text)
+
+    def element(self, indent: str, tag: str, text: str) -> None:
+        self.line(f"{indent}<{tag}>{escape(text, quote=False)}</{tag}>")
+
+
+def write_lines(path: Path, lines: Iterable[str]) -> None:
+    """Stream lines (each followed by a newline) to path."""
+    with open_output(path) as out:
+        XmlWriter(out).lines(lines)